@@ -0,0 +1,46 @@
+"""
+Бенчмарк get_each_cards_datas: время агрегации по картам при росте числа карт от 10 до 100 000.
+
+Запуск: python -m benchmarks.bench_cards
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.utils import get_each_cards_datas
+
+
+def make_cards_frame(cards: int, rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Функция создает DataFrame с транзакциями по заданному числу карт.
+
+    :param cards: число карт
+    :param rows: число транзакций
+    :param seed: зерно генератора случайных чисел
+    :return: DataFrame с транзакциями
+    """
+    rng = np.random.default_rng(seed)
+    card_numbers = np.array([f"*{number:05d}" for number in range(cards)], dtype=object)
+    return pd.DataFrame(
+        {
+            "Номер карты": card_numbers[rng.integers(0, cards, rows)],
+            "Сумма платежа": rng.normal(-500, 2000, rows).round(2),
+            "Бонусы (включая кэшбэк)": rng.integers(0, 50, rows),
+        }
+    )
+
+
+def main() -> None:
+    rows = 200_000
+    for cards in [10, 100, 1_000, 10_000, 100_000]:
+        df = make_cards_frame(cards, rows)
+        start = time.perf_counter()
+        result = get_each_cards_datas(df)
+        elapsed = time.perf_counter() - start
+        print(f"cards={cards:>7} rows={rows} result={len(result):>7} time={elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Бенчмарк времени импорта модулей проекта (python -X importtime) с проверкой бюджета на запуск.
+Импорт модулей проекта не должен загружать тяжелые библиотеки (pandas, numpy, requests, dotenv).
+
+Запуск: python -m benchmarks.bench_import [--budget-ms 150] [--repeat 3]
+Код возврата 1, если бюджет превышен или загружена тяжелая библиотека.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+MODULES = ["src.views", "src.services", "src.reports", "src.market_cache", "src.store", "src.utils"]
+HEAVY_MODULES = ["pandas", "numpy", "requests", "dotenv", "black"]
+
+directory_name = Path(__file__).resolve().parent.parent
+
+
+def import_time(module: str) -> tuple[float, list[str]]:
+    """
+    Функция импортирует модуль в отдельном процессе и возвращает время импорта и загруженные тяжелые библиотеки.
+
+    :param module: имя модуля
+    :return: суммарное время импорта модуля в миллисекундах и список загруженных тяжелых библиотек
+    """
+    code = f"import sys, {module}; print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    env = {**os.environ, "PYTHONPATH": str(directory_name)}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=directory_name,
+        env=env,
+        check=True,
+    )
+    elapsed = 0.0
+    for line in completed.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            elapsed = int(fields[1]) / 1000
+    loaded = [name for name in completed.stdout.strip().split(",") if name]
+    return elapsed, loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="бюджет времени импорта одного модуля")
+    parser.add_argument("--repeat", type=int, default=3, help="число запусков (берется лучшее время)")
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        results = [import_time(module) for _ in range(args.repeat)]
+        elapsed = min(result[0] for result in results)
+        loaded = results[-1][1]
+        status = "ok" if elapsed <= args.budget_ms and not loaded else "FAIL"
+        failed = failed or status == "FAIL"
+        print(f"{module:<18} {elapsed:8.1f} ms  heavy={','.join(loaded) or '-':<20} {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
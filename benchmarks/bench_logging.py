@@ -0,0 +1,90 @@
+"""
+Бенчмарк поиска (simple_search, search_by_phonenumber) с выключенным логированием,
+с записью в файл напрямую (FileHandler) и через очередь (QueueHandler/QueueListener).
+
+Запуск: python -m benchmarks.bench_logging [--rows 20000] [--repeat 20]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from typing import Callable
+
+from src.logging_utils import start_queue_logging
+from src.logging_utils import stop_queue_logging
+from src.services import search_by_phonenumber
+from src.services import simple_search
+
+CATEGORIES = ["Супермаркеты", "Переводы", "Фастфуд", "Мобильная связь", "Такси"]
+DESCRIPTIONS = ["Магнит", "Валерий А.", "Тинькофф Мобайл +7 995 555-55-55", "Ситидрайв", "Колхоз"]
+
+
+def make_transactions(rows: int) -> list[dict]:
+    """
+    Функция создает список транзакций для поиска.
+
+    :param rows: число транзакций
+    :return: транзакции в формате списка словарей
+    """
+    return [
+        {
+            "Дата операции": f"{position % 28 + 1:02d}.12.2021 12:00:00",
+            "Номер карты": f"*{position % 7:04d}",
+            "Сумма платежа": -float(position % 1000),
+            "Категория": CATEGORIES[position % len(CATEGORIES)],
+            "Описание": DESCRIPTIONS[position % len(DESCRIPTIONS)],
+        }
+        for position in range(rows)
+    ]
+
+
+def run(search: Callable[[], str], repeat: int) -> float:
+    """
+    Функция возвращает среднее время вызова search в миллисекундах.
+
+    :param search: функция поиска без аргументов
+    :param repeat: число вызовов
+    :return: среднее время в миллисекундах
+    """
+    search()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        search()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000, help="число транзакций")
+    parser.add_argument("--repeat", type=int, default=20, help="число вызовов")
+    args = parser.parse_args()
+
+    transactions = make_transactions(args.rows)
+    searches = {
+        "simple_search": lambda: simple_search("Магнит", transactions),
+        "search_by_phonenumber": lambda: search_by_phonenumber(transactions),
+    }
+    root = logging.getLogger()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_file = os.path.join(tmp_dir, "bench.log")
+        for mode in ["off", "file", "queue"]:
+            file_handler = logging.FileHandler(log_file, encoding="utf-8")
+            if mode == "off":
+                root.setLevel(logging.WARNING)
+            elif mode == "file":
+                root.addHandler(file_handler)
+                root.setLevel(logging.DEBUG)
+            else:
+                start_queue_logging([file_handler], logging.DEBUG)
+            for name, search in searches.items():
+                elapsed = run(search, args.repeat)
+                print(f"logging={mode:<5} {name:<22} rows={args.rows} time={elapsed:8.2f} ms")
+            root.removeHandler(file_handler)
+            stop_queue_logging()
+            file_handler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Синтетические транзакции в формате data/operations.xlsx (те же столбцы, типы и форматы дат)
+для бенчмарков на 10 тысячах, 100 тысячах и миллионе строк.
+"""
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    "Дата операции",
+    "Дата платежа",
+    "Номер карты",
+    "Статус",
+    "Сумма операции",
+    "Валюта операции",
+    "Сумма платежа",
+    "Валюта платежа",
+    "Кэшбэк",
+    "Категория",
+    "MCC",
+    "Описание",
+    "Бонусы (включая кэшбэк)",
+    "Округление на инвесткопилку",
+    "Сумма операции с округлением",
+]
+CARDS = {"*7197": 0.72, "*4556": 0.17, None: 0.097, "*5091": 0.008, "*5441": 0.002, "*1112": 0.002, "*6002": 0.001}
+CATEGORIES = {
+    "Супермаркеты": (0.34, 5411, ["Магнит", "Колхоз", "SPAR", "Пятёрочка"]),
+    "Фастфуд": (0.19, 5814, ["Бургер Кинг", "McDonald's", "Kofe s sobojj"]),
+    "Транспорт": (0.06, 4131, ["Метро Санкт-Петербург", "Яндекс Такси"]),
+    "Переводы": (0.05, None, ["Николай Н.", "Валерий А.", "Перевод с карты", "Светлана Т."]),
+    "Ж/д билеты": (0.04, 4112, ["РЖД"]),
+    "Различные товары": (0.04, 5399, ["Ozon.ru", "DNS"]),
+    "Мобильная связь": (0.04, 4814, ["Тинькофф Мобайл +7 995 555-55-55", "Я МТС +7 921 11-22-33"]),
+    "Пополнения": (0.03, None, ["Пополнение через Газпромбанк", "Внесение наличных через банкомат"]),
+    "Аптеки": (0.03, 5912, ["Аптека Вита"]),
+    "Каршеринг": (0.02, 7512, ["Ситидрайв", "Делимобиль"]),
+    "Рестораны": (0.02, 5812, ["Pho Ban", "IP Sharova T.V"]),
+    "Наличные": (0.02, 6011, ["Снятие в банкомате"]),
+    "Бонусы": (0.02, None, ["Кэшбэк за обычные покупки"]),
+    "Другое": (0.10, 5999, ["AviaKassa.com", "Detki", "Линзомат ТЦ Юность"]),
+}
+
+
+def _choice(rng: np.random.Generator, weights: dict, size: int) -> np.ndarray:
+    """Случайный выбор ключей словаря с вероятностями из его значений."""
+    keys = np.array(list(weights), dtype=object)
+    probabilities = np.array(list(weights.values()), dtype=float)
+    return keys[rng.choice(len(keys), size=size, p=probabilities / probabilities.sum())]
+
+
+def make_operations(
+    rows: int, seed: int = 0, start: str = "2018-01-01", end: str = "2021-12-31 23:59:59"
+) -> pd.DataFrame:
+    """
+    Функция создает транзакции в формате read_excel("operations"): даты - строки 'dd.mm.YYYY HH:MM:SS'
+    и 'dd.mm.YYYY' (часть дат платежа пустая), операции от новых к старым, как в выгрузке банка.
+
+    :param rows: число транзакций
+    :param seed: зерно генератора случайных чисел
+    :param start: самая ранняя дата операции
+    :param end: самая поздняя дата операции
+    :return: DataFrame с транзакциями
+    """
+    rng = np.random.default_rng(seed)
+    low, high = pd.Timestamp(start).value // 10**9, pd.Timestamp(end).value // 10**9
+    seconds = np.sort(rng.integers(low, high, rows))[::-1]
+    operation_dates = pd.to_datetime(seconds, unit="s")
+    payment_dates = (operation_dates + pd.to_timedelta(rng.integers(0, 3, rows), unit="D")).normalize()
+
+    categories = _choice(rng, {name: weight for name, (weight, _, _) in CATEGORIES.items()}, rows)
+    mcc = np.array([CATEGORIES[category][1] for category in categories], dtype=float)
+    descriptions = np.array(
+        [
+            CATEGORIES[category][2][index % len(CATEGORIES[category][2])]
+            for index, category in zip(rng.integers(0, 1000, rows), categories)
+        ],
+        dtype=object,
+    )
+    incoming = np.isin(categories, ["Пополнения", "Бонусы"]) | (rng.random(rows) < 0.02)
+    amounts = np.round(rng.lognormal(5, 1.3, rows), 2)
+    amounts = np.where(incoming, amounts, -amounts)
+    foreign = rng.random(rows) < 0.02
+    failed = rng.random(rows) < 0.006
+    cashback = np.where(rng.random(rows) < 0.09, np.floor(np.abs(amounts) / 100), np.nan)
+    rounding = np.where(rng.random(rows) < 0.002, rng.integers(1, 100, rows), 0)
+
+    payment_strings = payment_dates.strftime("%d.%m.%Y").to_numpy(dtype=object)
+    payment_strings[rng.random(rows) < 0.0015] = np.nan
+    cards = _choice(rng, CARDS, rows)
+    cards[pd.isna(cards)] = np.nan
+    df = pd.DataFrame(
+        {
+            "Дата операции": operation_dates.strftime("%d.%m.%Y %H:%M:%S"),
+            "Дата платежа": payment_strings,
+            "Номер карты": cards,
+            "Статус": np.where(failed, "FAILED", "OK"),
+            "Сумма операции": amounts,
+            "Валюта операции": np.where(foreign, "EUR", "RUB"),
+            "Сумма платежа": np.where(foreign, np.round(amounts * 90, 2), amounts),
+            "Валюта платежа": "RUB",
+            "Кэшбэк": cashback,
+            "Категория": categories,
+            "MCC": mcc,
+            "Описание": descriptions,
+            "Бонусы (включая кэшбэк)": np.maximum(np.floor(-amounts / 100), 0).astype("int64"),
+            "Округление на инвесткопилку": rounding.astype("int64"),
+            "Сумма операции с округлением": np.round(np.abs(amounts) + rounding, 2),
+        },
+        columns=COLUMNS,
+    )
+    return df
@@ -0,0 +1,30 @@
+"""
+Память DataFrame с транзакциями до и после compact_frame на синтетических данных (benchmarks.datasets).
+
+Запуск: python -m benchmarks.memory [--rows 1000000] [--seed 0]
+"""
+
+import argparse
+
+import pandas as pd
+
+from benchmarks.datasets import make_operations
+from src.store import TransactionStore
+from src.store import memory_report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="размер набора транзакций")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора транзакций")
+    args = parser.parse_args()
+
+    raw = make_operations(args.rows, args.seed)
+    typed = TransactionStore.from_frame(raw).frame
+    compact = TransactionStore.from_frame(raw, compact=True).frame
+    with pd.option_context("display.max_columns", None, "display.width", 160):
+        print(memory_report(typed, compact))
+
+
+if __name__ == "__main__":
+    main()
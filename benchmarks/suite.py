@@ -0,0 +1,252 @@
+"""
+Набор бенчмарков публичных функций на синтетических транзакциях (benchmarks.datasets) из 10 тысяч,
+100 тысяч и миллиона строк. Сеть не используется: курсы валют и цены акций подменяются заглушкой.
+Результаты сохраняются в JSON, их можно сравнить с результатами другого коммита (--compare).
+
+Запуск: python -m benchmarks.suite [--sizes 10000 100000 1000000] [--repeat 5] [--output results.json]
+        [--compare baseline.json --threshold 0.2]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+from typing import Callable
+from typing import Optional
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import src.utils
+from benchmarks.datasets import make_operations
+from src.reports import spending_by_category
+from src.reports import spending_by_weekday
+from src.reports import spending_by_workday
+from src.rollup import MonthlyRollup
+from src.services import investment_bank
+from src.services import raised_cashback_for_categories
+from src.services import search_by_name
+from src.services import search_by_phonenumber
+from src.services import simple_search
+from src.store import TransactionStore
+from src.utils import get_each_cards_datas
+from src.utils import read_excel
+from src.utils import top_transactions_by_paymant
+from src.views import get_page_main_datas
+
+SIZES = [10_000, 100_000, 1_000_000]
+EXCEL_MAX_ROWS = 100_000
+REPORT_DATE = "31.12.2021"
+MAIN_PAGE_DATE = "2021-12-10 08:16:00"
+MARKET_DATA = (
+    [{"currency": "USD", "rate": 73.21}, {"currency": "EUR", "rate": 87.08}],
+    [{"stock": "AAPL", "price": 150.12}, {"stock": "AMZN", "price": 3173.18}],
+)
+
+Benchmark = Callable[[TransactionStore, str], Callable[[], Any]]
+
+
+def _read_excel(store: TransactionStore, tmp_dir: str) -> Callable[[], Any]:
+    """Чтение data/operations.xlsx из временной папки проекта."""
+    os.makedirs(os.path.join(tmp_dir, "data"), exist_ok=True)
+    excel_file = os.path.join(tmp_dir, "data", "operations.xlsx")
+    if not os.path.exists(excel_file):
+        store.raw.to_excel(excel_file, index=False, engine="openpyxl")
+
+    def run() -> Any:
+        with mock.patch.object(src.utils, "directory_name", tmp_dir):
+            return read_excel("operations")
+
+    return run
+
+
+def _cold_records(store: TransactionStore) -> list[dict]:
+    """Новый список транзакций: индекс поиска и признаки строятся заново, как при первом запросе."""
+    return list(store.records)
+
+
+def _main_page(store: TransactionStore, tmp_dir: str) -> Callable[[], Any]:
+    """Главная страница по хранилищу с синтетическими транзакциями и заглушкой курсов и цен акций."""
+
+    def run() -> Any:
+        with (
+            mock.patch("src.views.get_store", return_value=store),
+            mock.patch("src.views.get_cached_market_data", return_value=MARKET_DATA),
+        ):
+            return get_page_main_datas(MAIN_PAGE_DATE)
+
+    return run
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    "read_excel": _read_excel,
+    "get_each_cards_datas": lambda store, _: lambda: get_each_cards_datas(store.raw),
+    "top_transactions_by_paymant": lambda store, _: lambda: top_transactions_by_paymant(store.raw),
+    "top_transactions_by_paymant[argpartition]": lambda store, _: lambda: top_transactions_by_paymant(
+        store.raw, method="argpartition"
+    ),
+    "simple_search[cold]": lambda store, _: (lambda records: lambda: simple_search("Магнит", records))(
+        _cold_records(store)
+    ),
+    "simple_search[warm]": lambda store, _: lambda: simple_search("Магнит", store.records),
+    "search_by_phonenumber[cold]": lambda store, _: (lambda records: lambda: search_by_phonenumber(records))(
+        _cold_records(store)
+    ),
+    "search_by_name[cold]": lambda store, _: (lambda records: lambda: search_by_name(records))(_cold_records(store)),
+    "investment_bank[records]": lambda store, _: lambda: investment_bank("2021-12", store.records, 50),
+    "investment_bank[frame]": lambda store, _: lambda: investment_bank("2021-12", store.frame, 50),
+    "raised_cashback_for_categories": lambda store, _: (
+        lambda df: lambda: raised_cashback_for_categories(df, 2021, 12)
+    )(store.raw.copy()),
+    "spending_by_category": lambda store, _: lambda: spending_by_category.__wrapped__(
+        store.raw, "Супермаркеты", REPORT_DATE
+    ),
+    "spending_by_weekday": lambda store, _: lambda: spending_by_weekday.__wrapped__(store.raw, REPORT_DATE),
+    "spending_by_workday": lambda store, _: lambda: spending_by_workday.__wrapped__(store.raw, REPORT_DATE),
+    "spending_by_workday[rollup]": lambda store, _: lambda: spending_by_workday.__wrapped__(store.rollup, REPORT_DATE),
+    "raised_cashback_for_categories[rollup]": lambda store, _: (
+        lambda rollup: lambda: raised_cashback_for_categories(rollup, 2021, 12)
+    )(MonthlyRollup(store.frame, store.rollup.cubes)),
+    "get_page_main_datas": _main_page,
+}
+
+
+def measure(factory: Callable[[], Callable[[], Any]], repeat: int) -> dict[str, float]:
+    """
+    Функция измеряет время вызова: перед каждым замером выполняется подготовка (factory, не замеряется).
+
+    :param factory: функция подготовки, возвращает замеряемую функцию без аргументов
+    :param repeat: число замеров
+    :return: словарь min_ms, median_ms, mean_ms
+    """
+    timings = []
+    for _ in range(repeat):
+        call = factory()
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Текущий коммит репозитория или None, если git недоступен."""
+    try:
+        output = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    sizes: list[int],
+    repeat: int,
+    names: Optional[list[str]] = None,
+    excel_max_rows: int = EXCEL_MAX_ROWS,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """
+    Функция запускает бенчмарки на синтетических транзакциях каждого размера.
+
+    :param sizes: размеры наборов транзакций
+    :param repeat: число замеров каждой функции
+    :param names: названия бенчмарков (по умолчанию все из BENCHMARKS)
+    :param excel_max_rows: наибольший размер набора для read_excel (запись xlsx из миллиона строк очень долгая)
+    :param seed: зерно генератора транзакций
+    :return: результаты в формате {"meta": {...}, "results": [...]}
+    """
+    results = []
+    for rows in sizes:
+        store = TransactionStore.from_frame(make_operations(rows, seed), f"synthetic-{rows}")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in names or list(BENCHMARKS):
+                if name == "read_excel" and rows > excel_max_rows:
+                    continue
+                timing = measure(lambda: BENCHMARKS[name](store, tmp_dir), repeat)
+                results.append({"name": name, "rows": rows, "repeat": repeat, **timing})
+                print(f"{name:<42} rows={rows:>8} median={timing['median_ms']:10.2f} ms", file=sys.stderr)
+    meta = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "seed": seed,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[dict[str, Any]]:
+    """
+    Функция сравнивает медианы времени с результатами другого запуска.
+
+    :param baseline: результаты базового запуска
+    :param current: результаты текущего запуска
+    :param threshold: допустимый относительный рост медианы (0.2 - на 20%)
+    :return: список регрессий: name, rows, baseline_ms, current_ms, ratio
+    """
+    base = {(result["name"], result["rows"]): result["median_ms"] for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        baseline_ms = base.get((result["name"], result["rows"]))
+        if not baseline_ms:
+            continue
+        ratio = result["median_ms"] / baseline_ms
+        if ratio > 1 + threshold:
+            regressions.append(
+                {
+                    "name": result["name"],
+                    "rows": result["rows"],
+                    "baseline_ms": baseline_ms,
+                    "current_ms": result["median_ms"],
+                    "ratio": round(ratio, 3),
+                }
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="размеры наборов транзакций")
+    parser.add_argument("--repeat", type=int, default=5, help="число замеров каждой функции")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="запустить только эти бенчмарки")
+    parser.add_argument("--excel-max-rows", type=int, default=EXCEL_MAX_ROWS, help="наибольший размер для read_excel")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора транзакций")
+    parser.add_argument("--output", help="файл для результатов JSON (по умолчанию stdout)")
+    parser.add_argument("--compare", help="файл с результатами базового запуска")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимый рост медианы при сравнении")
+    args = parser.parse_args()
+
+    report = run_suite(args.sizes, args.repeat, args.only, args.excel_max_rows, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=4)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=4))
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as file:
+        regressions = compare(json.load(file), report, args.threshold)
+    for regression in regressions:
+        print(
+            f"регрессия {regression['name']} rows={regression['rows']}: "
+            f"{regression['baseline_ms']} -> {regression['current_ms']} ms (x{regression['ratio']})",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Iterable
+from typing import Optional
+from typing import Union
+
+from src.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+CASHBACK_EXCLUDED_CATEGORIES = ["Наличные", "Пополнения"]
+WEEKDAYS_COUNT = 7
+TOP_COLUMNS = ["Дата платежа", "Сумма операции", "Категория", "Описание"]
+
+
+class CardTotals:
+    """
+    Суммы расходов и бонусов по картам, которые накапливаются по частям транзакций (update).
+    Карты идут в порядке первого появления.
+    """
+
+    def __init__(self) -> None:
+        self.totals: dict[Any, list[float]] = {}
+
+    def update(self, chunk: pd.DataFrame) -> "CardTotals":
+        """
+        Добавляет к суммам часть транзакций.
+
+        :param chunk: часть транзакций
+        :return: накопитель
+        """
+        sums = chunk.groupby("Номер карты", observed=True, sort=False).agg(
+            total_spent=("Сумма платежа", "sum"), cashback=("Бонусы (включая кэшбэк)", "sum")
+        )
+        for card_number, total_spent, cashback in zip(sums.index, sums["total_spent"], sums["cashback"]):
+            entry = self.totals.setdefault(card_number, [0.0, 0.0])
+            entry[0] += float(total_spent)
+            entry[1] += float(cashback)
+        return self
+
+    def result(self) -> list[dict]:
+        """Список словарей в формате get_each_cards_datas."""
+        return [
+            {"last_digits": card_number, "total_spent": total_spent, "cashback": cashback}
+            for card_number, (total_spent, cashback) in self.totals.items()
+        ]
+
+
+class MonthlyCashback:
+    """
+    Суммы операций с округлением по (год, месяц, категория) для анализа кешбэка (1%),
+    которые накапливаются по частям транзакций (update). Категории CASHBACK_EXCLUDED_CATEGORIES не учитываются.
+    """
+
+    def __init__(self) -> None:
+        self.sums: dict[tuple[int, int], dict[str, float]] = {}
+
+    def update(self, chunk: pd.DataFrame) -> "MonthlyCashback":
+        """
+        Добавляет к суммам часть транзакций.
+
+        :param chunk: часть транзакций (дата операции - строка или datetime64)
+        :return: накопитель
+        """
+        dates = chunk["Дата операции"]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S")
+        sums = (
+            chunk["Сумма операции с округлением"]
+            .groupby([dates.dt.year, dates.dt.month, chunk["Категория"]], sort=False, observed=True)
+            .sum()
+        )
+        for (year, month, category), amount in sums.items():
+            if category in CASHBACK_EXCLUDED_CATEGORIES:
+                continue
+            month_sums = self.sums.setdefault((int(year), int(month)), {})
+            month_sums[category] = month_sums.get(category, 0.0) + float(amount)
+        return self
+
+    def result(self) -> dict[tuple[int, int], dict[str, float]]:
+        """Кешбэк в формате cashback_by_month: (год, месяц) - {категория: кешбэк}."""
+        return {
+            key: {category: round(amount / 100, 2) for category, amount in month_sums.items()}
+            for key, month_sums in self.sums.items()
+        }
+
+
+class WeekdayTotals:
+    """
+    Сумма и количество трат по дням недели для дат платежа от start до end включительно,
+    которые накапливаются по частям транзакций (update).
+    """
+
+    def __init__(self, start: Any, end: Any) -> None:
+        self.start = pd.Timestamp(start)
+        self.end = pd.Timestamp(end)
+        self.sums = np.zeros(WEEKDAYS_COUNT)
+        self.counts = np.zeros(WEEKDAYS_COUNT, dtype="int64")
+
+    def update(self, chunk: pd.DataFrame) -> "WeekdayTotals":
+        """
+        Добавляет к суммам часть транзакций.
+
+        :param chunk: часть транзакций (дата платежа - datetime64)
+        :return: накопитель
+        """
+        dates = chunk["Дата платежа"]
+        in_period = (dates >= self.start) & (dates <= self.end)
+        amounts = chunk["Сумма платежа"][in_period].to_numpy(dtype="float64")
+        weekdays = dates[in_period].dt.dayofweek.to_numpy()
+        valid = ~np.isnan(amounts)
+        self.sums += np.bincount(weekdays[valid], weights=amounts[valid], minlength=WEEKDAYS_COUNT)
+        self.counts += np.bincount(weekdays[valid], minlength=WEEKDAYS_COUNT)
+        return self
+
+    def totals(self) -> pd.DataFrame:
+        """DataFrame со столбцами sum и count, строки - дни недели 0 (понедельник) ... 6 (воскресенье)."""
+        return pd.DataFrame({"sum": self.sums, "count": self.counts}, index=range(WEEKDAYS_COUNT))
+
+
+class DailyTotals:
+    """
+    Сумма и количество трат по датам платежа, которые накапливаются по частям транзакций (update).
+    По ним считаются траты по дням недели за любой период (weekday_totals) без повторного чтения транзакций.
+    """
+
+    def __init__(self) -> None:
+        self.days: dict[Any, list[float]] = {}
+
+    def update(self, chunk: pd.DataFrame) -> "DailyTotals":
+        """
+        Добавляет к суммам часть транзакций.
+
+        :param chunk: часть транзакций (дата платежа - datetime64)
+        :return: накопитель
+        """
+        totals = chunk["Сумма платежа"].groupby(chunk["Дата платежа"].dt.normalize()).agg(["sum", "count"])
+        for day, amount, count in zip(totals.index, totals["sum"], totals["count"]):
+            entry = self.days.setdefault(day, [0.0, 0])
+            entry[0] += float(amount)
+            entry[1] += int(count)
+        return self
+
+    def weekday_totals(self, start: Any, end: Any) -> pd.DataFrame:
+        """
+        Сумма и количество трат по дням недели для дат платежа от start до end включительно.
+
+        :param start: начало периода
+        :param end: конец периода
+        :return: DataFrame в формате WeekdayTotals.totals
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        sums = np.zeros(WEEKDAYS_COUNT)
+        counts = np.zeros(WEEKDAYS_COUNT, dtype="int64")
+        for day, (amount, count) in self.days.items():
+            if start <= day <= end:
+                sums[day.dayofweek] += amount
+                counts[day.dayofweek] += count
+        return pd.DataFrame({"sum": sums, "count": counts}, index=range(WEEKDAYS_COUNT))
+
+
+class TopTransactions:
+    """
+    limit транзакций с наибольшей суммой операции с округлением среди всех добавленных частей.
+    Хранится в куче (heapq) из limit элементов и обновляется на месте; при равных суммах
+    остается транзакция, добавленная раньше (как у Series.nlargest(keep="first")).
+    """
+
+    def __init__(self, limit: int = 5) -> None:
+        self.limit = limit
+        self.heap: list[tuple[float, int, tuple]] = []
+        self.seen = 0
+
+    def update(self, chunk: pd.DataFrame) -> "TopTransactions":
+        """
+        Добавляет в кучу подходящие транзакции части.
+
+        :param chunk: часть транзакций
+        :return: накопитель
+        """
+        amounts = chunk["Сумма операции с округлением"].reset_index(drop=True)
+        for position, amount in amounts.nlargest(self.limit).items():
+            item = (float(amount), -(self.seen + position), tuple(chunk[TOP_COLUMNS].iloc[position]))
+            if len(self.heap) < self.limit:
+                heapq.heappush(self.heap, item)
+            elif item[:2] > self.heap[0][:2]:
+                heapq.heapreplace(self.heap, item)
+        self.seen += len(chunk)
+        return self
+
+    def result(self, limit: Optional[int] = None) -> list[tuple]:
+        """
+        Транзакции по убыванию суммы: кортежи значений столбцов TOP_COLUMNS.
+
+        :param limit: число транзакций, не больше limit накопителя
+        :return: список кортежей
+        """
+        limit = self.limit if limit is None else limit
+        if limit > self.limit:
+            raise ValueError(f"накопитель хранит только {self.limit} транзакций")
+        return [item[2] for item in sorted(self.heap, key=lambda item: item[:2], reverse=True)[:limit]]
+
+
+_engine_numbers = itertools.count()
+
+
+class AggregateEngine:
+    """
+    Агрегаты по всем транзакциям, которые обновляются пачками новых операций (append) без пересчета с нуля:
+    суммы по картам, кешбэк по месяцам и категориям, траты по датам платежа (для отчетов по дням недели)
+    и топ транзакций. Объект можно передавать вместо DataFrame в get_each_cards_datas,
+    top_transactions_by_paymant, cashback_by_month, raised_cashback_for_categories и отчеты по дням недели.
+    append и методы чтения (card_totals, cashback_by_month, weekday_totals, top_transactions) выполняются
+    под одной блокировкой, поэтому чтение из другого потока видит агрегаты целиком до или после пачки.
+    """
+
+    def __init__(self, top_limit: int = 5) -> None:
+        self.cards = CardTotals()
+        self.cashback = MonthlyCashback()
+        self.daily = DailyTotals()
+        self.top = TopTransactions(top_limit)
+        self.rows = 0
+        self.version = 0
+        self.name = f"engine:{next(_engine_numbers)}"
+        self._lock = threading.Lock()
+
+    def append(self, batch: Union[pd.DataFrame, list[dict]]) -> "AggregateEngine":
+        """
+        Добавляет пачку новых операций ко всем агрегатам.
+
+        :param batch: новые операции (DataFrame или список словарей, даты - строки или datetime64)
+        :return: движок агрегатов
+        """
+        from src.ingest import type_chunk
+
+        chunk = type_chunk(batch.copy() if isinstance(batch, pd.DataFrame) else pd.DataFrame(batch))
+        if chunk.empty:
+            return self
+        with self._lock:
+            consume([chunk], self.cards, self.cashback, self.daily, self.top)
+            self.rows += len(chunk)
+            self.version += 1
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame], top_limit: int = 5) -> "AggregateEngine":
+        """
+        Создает движок по частям транзакций (например, src.ingest.iter_chunks).
+
+        :param chunks: части транзакций
+        :param top_limit: размер топа транзакций
+        :return: движок агрегатов
+        """
+        engine = cls(top_limit)
+        for chunk in chunks:
+            engine.append(chunk)
+        return engine
+
+    @property
+    def fingerprint(self) -> str:
+        """Отпечаток состояния для ключей кэша (меняется после каждого append)."""
+        with self._lock:
+            return f"{self.name}:{self.version}"
+
+    def card_totals(self) -> list[dict]:
+        """Суммы расходов и бонусов по картам в формате get_each_cards_datas."""
+        with self._lock:
+            return self.cards.result()
+
+    def cashback_by_month(self) -> dict[tuple[int, int], dict[str, float]]:
+        """Кешбэк в формате cashback_by_month: (год, месяц) - {категория: кешбэк}."""
+        with self._lock:
+            return self.cashback.result()
+
+    def weekday_totals(self, start: Any, end: Any) -> pd.DataFrame:
+        """
+        Сумма и количество трат по дням недели для дат платежа от start до end включительно.
+
+        :param start: начало периода
+        :param end: конец периода
+        :return: DataFrame в формате WeekdayTotals.totals
+        """
+        with self._lock:
+            return self.daily.weekday_totals(start, end)
+
+    def top_transactions(self, limit: Optional[int] = None) -> list[tuple]:
+        """
+        Транзакции с наибольшей суммой операции с округлением (см. TopTransactions.result).
+
+        :param limit: число транзакций, не больше top_limit движка
+        :return: список кортежей значений столбцов TOP_COLUMNS
+        """
+        with self._lock:
+            return self.top.result(limit)
+
+    def __len__(self) -> int:
+        return self.rows
+
+
+def consume(chunks: Iterable[pd.DataFrame], *aggregators: Any) -> tuple[Any, ...]:
+    """
+    Функция за один проход по частям транзакций обновляет все накопители (CardTotals, MonthlyCashback, ...).
+    Части не сохраняются, поэтому память ограничена размером одной части.
+
+    :param chunks: части транзакций (например, src.ingest.iter_chunks)
+    :param aggregators: накопители с методом update
+    :return: накопители
+    """
+    for chunk in chunks:
+        for aggregator in aggregators:
+            aggregator.update(chunk)
+    return aggregators
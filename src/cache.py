@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import uuid
+import zipfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+from src.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+directory_name = Path(__file__).resolve().parent.parent
+cache_dir_default = os.path.join(directory_name, "data", ".cache")
+
+CACHE_VERSION = 1
+
+PROC_STATUS = "/proc/self/status"
+
+_file_mode: Optional[int] = None
+
+logger = logging.getLogger(__name__)
+
+
+def source_key(source_file: str) -> dict:
+    """
+    Функция возвращает ключ версии исходного файла: время изменения и размер.
+
+    :param source_file: путь к исходному файлу
+    :return: словарь с mtime (в наносекундах) и размером файла
+    """
+    stat = os.stat(source_file)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def cache_path(name: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Функция возвращает путь к файлу кэша с заданным именем.
+
+    :param name: имя кэша (например, 'operations')
+    :param cache_dir: опциональная папка кэша, по умолчанию data/.cache
+    :return: путь к файлу кэша .npz
+    """
+    return os.path.join(cache_dir or cache_dir_default, name + ".npz")
+
+
+def _encode_values(values: Any) -> tuple[str, dict[str, np.ndarray]]:
+    """
+    Кодирует одномерный массив значений в набор массивов NumPy без pickle.
+
+    :param values: значения столбца или категорий
+    :return: вид кодирования и массивы для сохранения
+    """
+    if isinstance(values, pd.Series):
+        values = values.array
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        kind, arrays = _encode_values(pd.Index(values.categories))
+        encoded = {"codes": np.asarray(values.codes)}
+        encoded.update({f"categories.{key}": array for key, array in arrays.items()})
+        return f"category:{kind}:{int(values.ordered)}", encoded
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        raise TypeError(f"неподдерживаемый тип столбца: {values.dtype}")
+    array = np.asarray(values)
+    if array.dtype.kind == "M":
+        return f"datetime:{array.dtype.str}", {"values": array.view("i8")}
+    if array.dtype.kind in "biuf":
+        return "numeric", {"values": array}
+    if array.dtype.kind in "OU":
+        mask = pd.isna(array)
+        if not all(isinstance(item, str) for item in array[~mask]):
+            raise TypeError(f"неподдерживаемый тип столбца: {array.dtype}")
+        strings = np.where(mask, "", array).astype(str)
+        return "string", {"values": strings, "mask": mask}
+    raise TypeError(f"неподдерживаемый тип столбца: {array.dtype}")
+
+
+def _decode_values(kind: str, arrays: dict[str, np.ndarray]) -> Any:
+    """
+    Восстанавливает значения столбца из массивов, сохраненных функцией _encode_values.
+
+    :param kind: вид кодирования
+    :param arrays: сохраненные массивы
+    :return: массив значений
+    """
+    if kind.startswith("category:"):
+        _, categories_kind, ordered = kind.split(":", 2)
+        categories_arrays = {
+            key[len("categories.") :]: array for key, array in arrays.items() if key.startswith("categories.")
+        }
+        categories = _decode_values(categories_kind, categories_arrays)
+        return pd.Categorical.from_codes(arrays["codes"], categories=categories, ordered=bool(int(ordered)))
+    if kind.startswith("datetime:"):
+        return arrays["values"].view(kind.split(":", 1)[1])
+    if kind == "numeric":
+        return arrays["values"]
+    if kind == "string":
+        values = arrays["values"].astype(object)
+        values[arrays["mask"]] = np.nan
+        return values
+    raise ValueError(f"неизвестный вид кодирования: {kind}")
+
+
+def _umask_from_proc() -> Optional[int]:
+    """umask процесса из строки Umask файла PROC_STATUS (Linux) или None, если его нет."""
+    try:
+        with open(PROC_STATUS, encoding="ascii") as file:
+            for line in file:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def file_mode(directory: str = ".") -> int:
+    """
+    Функция возвращает права, с которыми open создает файл в процессе (0o666 без битов umask).
+    umask процесса не меняется (os.umask(0) открыл бы окно, в котором другие потоки создают файлы
+    с правами 0666): он читается из PROC_STATUS, а без него права берутся у пробного файла в directory.
+    Результат вычисляется один раз.
+
+    :param directory: папка для пробного файла
+    :return: права файла
+    """
+    global _file_mode
+    if _file_mode is None:
+        umask = _umask_from_proc()
+        if umask is not None:
+            _file_mode = 0o666 & ~umask
+        else:
+            probe = os.path.join(directory, f".{uuid.uuid4().hex}.umask")
+            descriptor = os.open(probe, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            try:
+                _file_mode = os.fstat(descriptor).st_mode & 0o777
+            finally:
+                os.close(descriptor)
+                os.remove(probe)
+    return _file_mode
+
+
+def atomic_write(path: str, write: Callable[[Any], None], text: bool = False) -> None:
+    """
+    Функция записывает файл атомарно: во временный файл с уникальным именем рядом (tempfile.mkstemp)
+    и затем os.replace, поэтому одновременные записи не смешиваются, а читатели видят только целый файл.
+    Права файла - как у файла, созданного open (по umask процесса), а не 0600 от mkstemp.
+
+    :param path: путь к файлу
+    :param write: функция, которая пишет содержимое в открытый файл
+    :param text: открыть временный файл в текстовом режиме (utf-8), иначе в двоичном
+    """
+    directory = os.path.dirname(path) or "."
+    descriptor, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") if text else os.fdopen(descriptor, "wb") as file:
+            write(file)
+        os.chmod(tmp_path, file_mode(directory))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_frame(df: pd.DataFrame, path: str, key: dict) -> None:
+    """
+    Функция сохраняет DataFrame в столбцовый файл .npz вместе с ключом версии исходных данных.
+    Типы столбцов (даты, категории, числа, строки) сохраняются. Запись атомарная.
+
+    :param df: DataFrame для сохранения
+    :param path: путь к файлу кэша
+    :param key: ключ версии исходных данных (см. source_key)
+    """
+    arrays: dict[str, Any] = {}
+    columns = []
+    for position, column in enumerate(df.columns):
+        kind, encoded = _encode_values(df[column])
+        columns.append({"name": column, "kind": kind})
+        arrays.update({f"c{position}.{name}": array for name, array in encoded.items()})
+    index_kind, index_arrays = _encode_values(df.index)
+    arrays.update({f"index.{name}": array for name, array in index_arrays.items()})
+    meta = {"version": CACHE_VERSION, "key": key, "columns": columns, "index": index_kind}
+    arrays["__meta__"] = np.array(json.dumps(meta, ensure_ascii=False))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    atomic_write(path, lambda file: np.savez(file, **arrays))
+
+
+def load_frame(path: str, key: Optional[dict] = None) -> Optional[pd.DataFrame]:
+    """
+    Функция читает DataFrame из файла кэша.
+    Если файла нет, он поврежден (в том числе обрезан) или ключ версии не совпадает, возвращает None.
+
+    :param path: путь к файлу кэша
+    :param key: ожидаемый ключ версии исходных данных, None - не проверять
+    :return: DataFrame или None
+    """
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+        meta = json.loads(str(arrays.pop("__meta__")))
+        if meta["version"] != CACHE_VERSION or (key is not None and meta["key"] != key):
+            logger.info(f"кэш {path} устарел")
+            return None
+        data = {}
+        for position, column in enumerate(meta["columns"]):
+            prefix = f"c{position}."
+            encoded = {name[len(prefix) :]: array for name, array in arrays.items() if name.startswith(prefix)}
+            data[column["name"]] = _decode_values(column["kind"], encoded)
+        index_arrays = {name[len("index.") :]: array for name, array in arrays.items() if name.startswith("index.")}
+        index = pd.Index(_decode_values(meta["index"], index_arrays))
+        return pd.DataFrame(data, index=index, columns=[column["name"] for column in meta["columns"]])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, EOFError, zipfile.BadZipFile) as ex:
+        logger.error(f"Ошибка чтения кэша {path}: {ex}")
+        return None
+
+
+def load_or_build(
+    source_file: str, name: str, builder: Callable[[], pd.DataFrame], cache_dir: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Функция возвращает DataFrame из кэша, если исходный файл не изменился (mtime и размер),
+    иначе строит его функцией builder и сохраняет в кэш. Пустой результат не кэшируется.
+
+    :param source_file: путь к исходному файлу
+    :param name: имя кэша
+    :param builder: функция, которая строит DataFrame из исходного файла
+    :param cache_dir: опциональная папка кэша
+    :return: DataFrame
+    """
+    key = source_key(source_file)
+    path = cache_path(name, cache_dir)
+    df = load_frame(path, key)
+    if df is not None:
+        logger.info(f"данные получены из кэша {path}")
+        return df
+    df = builder()
+    if df.empty:
+        return df
+    try:
+        save_frame(df, path, key)
+        logger.info(f"кэш {path} сохранен")
+    except (OSError, TypeError) as ex:
+        logger.error(f"Ошибка сохранения кэша {path}: {ex}")
+    return df
+
+
+def invalidate_cache(name: str, cache_dir: Optional[str] = None) -> bool:
+    """
+    Функция удаляет файл кэша с заданным именем.
+
+    :param name: имя кэша
+    :param cache_dir: опциональная папка кэша
+    :return: True, если файл кэша был удален
+    """
+    try:
+        os.remove(cache_path(name, cache_dir))
+        logger.info(f"кэш {name} удален")
+        return True
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,96 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+from typing import Union
+
+from src.logging_utils import apply_levels
+from src.logging_utils import level_number
+from src.logging_utils import parse_levels
+from src.logging_utils import start_queue_logging
+
+directory_name = Path(__file__).resolve().parent.parent
+logs_dir = os.path.join(directory_name, "logs")
+
+LOG_FORMAT = "%(asctime)s - %(filename)s - %(levelname)s:  %(message)s"
+
+_env_loaded = False
+_logging_configured = False
+_setup_lock = threading.Lock()
+
+
+def load_env(path: Optional[str] = None) -> bool:
+    """
+    Функция один раз загружает переменные окружения из файла .env (python-dotenv импортируется только здесь).
+    Уже заданные переменные окружения не перезаписываются.
+
+    :param path: опциональный путь к файлу .env, по умолчанию .env в корне проекта
+    :return: True, если загрузка выполнена при этом вызове
+    """
+    global _env_loaded
+    with _setup_lock:
+        if _env_loaded:
+            return False
+        _env_loaded = True
+    from dotenv import load_dotenv
+
+    load_dotenv(path or os.path.join(directory_name, ".env"))
+    return True
+
+
+def env(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Функция возвращает значение переменной окружения (перед первым чтением загружается .env, см. load_env).
+
+    :param name: название переменной
+    :param default: значение по умолчанию
+    :return: значение переменной
+    """
+    load_env()
+    return os.getenv(name, default)
+
+
+def setup_logging(
+    filename: str = "app",
+    level: Optional[Union[int, str]] = None,
+    filemode: str = "w",
+    levels: Optional[dict[str, Union[int, str]]] = None,
+) -> bool:
+    """
+    Функция один раз настраивает логирование приложения в файл logs/<filename>.log через очередь
+    (QueueHandler/QueueListener, см. start_queue_logging): потоки, которые пишут в лог, не ждут запись в файл.
+    Уровень корневого логгера берется из level или переменной окружения LOG_LEVEL (по умолчанию DEBUG),
+    уровни модулей - из LOG_LEVELS ('src.services=INFO,src.utils=WARNING') и levels.
+    Модули проекта только получают свои логгеры (logging.getLogger(__name__)) и не настраивают логирование
+    при импорте; вызывать функцию должна точка входа (скрипт, бенчмарк, сервер).
+
+    :param filename: имя файла лога без расширения
+    :param level: уровень корневого логгера
+    :param filemode: режим открытия файла лога
+    :param levels: уровни логирования отдельных модулей
+    :return: True, если логирование настроено при этом вызове
+    """
+    global _logging_configured
+    with _setup_lock:
+        if _logging_configured:
+            return False
+        _logging_configured = True
+    os.makedirs(logs_dir, exist_ok=True)
+    handler = logging.FileHandler(os.path.join(logs_dir, filename + ".log"), mode=filemode, encoding="utf-8")
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    start_queue_logging([handler], level_number(level or env("LOG_LEVEL", "DEBUG")))
+    module_levels = parse_levels(env("LOG_LEVELS"))
+    module_levels.update({name: level_number(value) for name, value in (levels or {}).items()})
+    apply_levels(module_levels)
+    return True
+
+
+def setup(log_filename: str = "app") -> None:
+    """
+    Функция настраивает окружение и логирование приложения. Вызывается один раз в точке входа.
+
+    :param log_filename: имя файла лога без расширения
+    """
+    load_env()
+    setup_logging(log_filename)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+import logging
+import os
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+
+from src.lazy import lazy_import
+from src.store import DATE_FORMATS
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50_000
+JSON_READ_SIZE = 1 << 16
+
+
+def frame_from_rows(rows: list[Any], columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Функция собирает DataFrame из строк (кортежей или словарей) так же, как его строит read_excel:
+    пустые значения - NaN, полностью пустой столбец - float.
+
+    :param rows: строки
+    :param columns: названия столбцов (для строк-кортежей)
+    :return: DataFrame
+    """
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    for column in df.columns[df.dtypes == object]:
+        values = df[column]
+        missing = values.isna()
+        if missing.all():
+            df[column] = values.astype("float64")
+        elif missing.any():
+            df[column] = values.where(~missing, np.nan)
+    return df
+
+
+def type_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Функция разбирает даты в части транзакций (форматы из DATE_FORMATS). Остальные столбцы не меняются;
+    категории не переводятся в category, чтобы части из разных мест файла можно было объединять.
+
+    :param df: часть транзакций
+    :return: часть транзакций с датами datetime64
+    """
+    for column, date_format in DATE_FORMATS.items():
+        if column in df and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column], format=date_format)
+    return df
+
+
+def _batched(rows: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """Делит поток строк на списки не длиннее size."""
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def iter_xlsx_chunks(path: str, chunksize: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Функция читает первый лист Excel-файла построчно (openpyxl read_only) и выдает части по chunksize строк.
+    Первая строка листа - названия столбцов.
+
+    :param path: путь к файлу .xlsx
+    :param chunksize: число строк в части
+    :return: генератор частей DataFrame
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(name) for name in next(rows, ())]
+        for batch in _batched(rows, chunksize):
+            yield frame_from_rows(batch, header)
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(path: str, chunksize: int = CHUNK_SIZE, **read_csv_kwargs: Any) -> Iterator[pd.DataFrame]:
+    """
+    Функция читает CSV-файл частями по chunksize строк (pandas.read_csv с chunksize).
+    Разделитель определяется по первой строке (',' или ';'), если он не передан.
+
+    :param path: путь к файлу .csv
+    :param chunksize: число строк в части
+    :param read_csv_kwargs: дополнительные параметры pandas.read_csv
+    :return: генератор частей DataFrame
+    """
+    if "sep" not in read_csv_kwargs:
+        with open(path, encoding=read_csv_kwargs.get("encoding", "utf-8"), newline="") as file:
+            sample = file.readline()
+        try:
+            read_csv_kwargs["sep"] = csv.Sniffer().sniff(sample, delimiters=",;").delimiter
+        except csv.Error:
+            read_csv_kwargs["sep"] = ","
+    with pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs) as reader:
+        yield from reader
+
+
+def iter_json_records(path: str) -> Iterator[dict]:
+    """
+    Функция читает транзакции из JSON-файла со списком объектов ([{...}, {...}]) или из JSON Lines
+    (один объект в строке) по одному объекту, не загружая весь файл в память.
+
+    :param path: путь к файлу .json или .jsonl
+    :return: генератор транзакций
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as file:
+        buffer = file.read(JSON_READ_SIZE).lstrip()
+        position = 1 if buffer.startswith("[") else 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if buffer.startswith("]", position):
+                return
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                block = file.read(JSON_READ_SIZE)
+                if not block:
+                    if buffer[position:].strip():
+                        raise
+                    return
+                buffer = buffer[position:] + block
+                position = 0
+                continue
+            yield record
+
+
+def iter_json_chunks(path: str, chunksize: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Функция читает JSON-файл с транзакциями частями по chunksize строк (см. iter_json_records).
+
+    :param path: путь к файлу .json или .jsonl
+    :param chunksize: число строк в части
+    :return: генератор частей DataFrame
+    """
+    for batch in _batched(iter_json_records(path), chunksize):
+        yield frame_from_rows(batch)
+
+
+def iter_chunks(path: str, chunksize: int = CHUNK_SIZE, typed: bool = True) -> Iterator[pd.DataFrame]:
+    """
+    Функция потоково читает файл с операциями (.xlsx, .csv, .json, .jsonl) и выдает части по chunksize строк.
+    В памяти одновременно находится только одна часть, поэтому так можно обработать выгрузки
+    из миллионов строк (см. src.aggregates).
+
+    :param path: путь к файлу
+    :param chunksize: число строк в части
+    :param typed: разобрать даты в частях (см. type_chunk)
+    :return: генератор частей DataFrame
+    """
+    extension = os.path.splitext(path)[1].lower()
+    readers = {
+        ".xlsx": iter_xlsx_chunks,
+        ".csv": iter_csv_chunks,
+        ".json": iter_json_chunks,
+        ".jsonl": iter_json_chunks,
+    }
+    if extension not in readers:
+        raise ValueError(f"неподдерживаемый формат файла: {path}")
+    logger.info(f"потоковое чтение {path} частями по {chunksize} строк")
+    for chunk in readers[extension](path, chunksize):
+        yield type_chunk(chunk) if typed else chunk
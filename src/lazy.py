@@ -0,0 +1,52 @@
+import importlib
+import sys
+import threading
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule:
+    """
+    Модуль, который импортируется при первом обращении к его атрибуту.
+    Тяжелые библиотеки (pandas, numpy, requests) не замедляют импорт модулей проекта,
+    пока они действительно не нужны. Атрибуты, присвоенные самому объекту (например, unittest.mock.patch),
+    имеют приоритет над атрибутами модуля.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        """Импортирует модуль (один раз) и возвращает его."""
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = module
+        loaded: ModuleType = module
+        return loaded
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __dir__(self) -> list[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name: str) -> Any:
+    """
+    Функция возвращает модуль, если он уже импортирован, иначе - LazyModule.
+
+    :param name: полное имя модуля, например 'pandas'
+    :return: модуль или объект, импортирующий модуль при первом обращении
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -0,0 +1,144 @@
+import atexit
+import logging
+import queue
+import reprlib
+import threading
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from typing import Any
+from typing import Optional
+
+LOG_RESULT_LIMIT = 1000
+
+_log_repr = reprlib.Repr()
+_log_repr.maxstring = LOG_RESULT_LIMIT
+_log_repr.maxother = LOG_RESULT_LIMIT
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_listener_lock = threading.Lock()
+
+
+def short_repr(value: Any, limit: int = LOG_RESULT_LIMIT) -> str:
+    """
+    Функция возвращает строковое представление значения для лога, не длиннее limit символов.
+
+    :param value: значение
+    :param limit: максимальная длина строки
+    :return: строковое представление (обрезанное, если оно длиннее limit)
+    """
+    text = value[: limit + 1] if isinstance(value, str) else _log_repr.repr(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({type(value).__name__})"
+
+
+class LazyRepr:
+    """
+    Значение для аргумента сообщения лога (logger.info("... %s", lazy_repr(value))).
+    Строка (обрезанная, см. short_repr) строится, только если сообщение действительно записывается.
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int = LOG_RESULT_LIMIT) -> None:
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return short_repr(self.value, self.limit)
+
+    __repr__ = __str__
+
+
+def lazy_repr(value: Any, limit: int = LOG_RESULT_LIMIT) -> LazyRepr:
+    """
+    Функция оборачивает большое значение для ленивого и обрезанного вывода в лог.
+
+    :param value: значение
+    :param limit: максимальная длина строки в логе
+    :return: обертка LazyRepr
+    """
+    return LazyRepr(value, limit)
+
+
+def parse_levels(spec: Optional[str]) -> dict[str, int]:
+    """
+    Функция разбирает уровни логирования модулей из строки вида 'src.services=INFO,src.utils=WARNING'.
+
+    :param spec: строка с уровнями
+    :return: словарь имя логгера - уровень
+    """
+    levels: dict[str, int] = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        name, separator, level = item.partition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"неверный уровень логирования: {item!r}")
+        levels[name.strip()] = level_number(level)
+    return levels
+
+
+def level_number(level: Any) -> int:
+    """
+    Функция переводит уровень логирования (число или название, например 'INFO') в число.
+
+    :param level: уровень логирования
+    :return: числовой уровень
+    """
+    if isinstance(level, int):
+        return level
+    number = logging.getLevelName(str(level).strip().upper())
+    if not isinstance(number, int):
+        raise ValueError(f"неизвестный уровень логирования: {level!r}")
+    return number
+
+
+def apply_levels(levels: dict[str, int]) -> None:
+    """
+    Функция задает уровни логирования отдельных модулей.
+
+    :param levels: словарь имя логгера - уровень
+    """
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+
+def start_queue_logging(handlers: list[logging.Handler], level: int = logging.DEBUG) -> QueueListener:
+    """
+    Функция подключает к корневому логгеру QueueHandler: запись в лог из рабочих потоков только кладет
+    сообщение в очередь, а в файлы его пишет фоновый поток QueueListener. Повторный вызов заменяет обработчики.
+
+    :param handlers: обработчики, которые пишут сообщения (например, FileHandler)
+    :param level: уровень корневого логгера
+    :return: запущенный QueueListener
+    """
+    global _listener, _queue_handler
+    stop_queue_logging()
+    messages: queue.SimpleQueue = queue.SimpleQueue()
+    with _listener_lock:
+        _queue_handler = QueueHandler(messages)
+        _listener = QueueListener(messages, *handlers, respect_handler_level=True)
+        root = logging.getLogger()
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+        _listener.start()
+        return _listener
+
+
+def stop_queue_logging() -> None:
+    """Функция дописывает сообщения из очереди, останавливает QueueListener и закрывает его обработчики."""
+    global _listener, _queue_handler
+    with _listener_lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_queue_handler)  # type: ignore[arg-type]
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _queue_handler = None
+
+
+atexit.register(stop_queue_logging)
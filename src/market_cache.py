@@ -0,0 +1,236 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+from src.cache import atomic_write
+from src.config import env
+from src.utils import get_rate_currency_concurrent
+from src.utils import stock_price_concurrent
+
+logger = logging.getLogger(__name__)
+
+
+def is_failed(value: Any) -> bool:
+    """
+    Функция проверяет, что ответ внешнего API ошибочный ([{}] или пустой список).
+
+    :param value: результат функции получения данных
+    :return: True, если данные получить не удалось
+    """
+    return not value or value == [{}]
+
+
+def is_valid_entry(entry: Any) -> bool:
+    """
+    Функция проверяет сохраненное значение кэша: словарь с данными (список) и временем получения (число).
+
+    :param entry: значение из файла кэша
+    :return: True, если значение можно использовать
+    """
+    if not isinstance(entry, dict) or not isinstance(entry.get("value"), list):
+        return False
+    fetched_at = entry.get("fetched_at")
+    return isinstance(fetched_at, (int, float)) and not isinstance(fetched_at, bool)
+
+
+class MarketDataCache:
+    """
+    Кэш рыночных данных (курсы валют, стоимость акций) со своим TTL для каждого источника.
+    Свежие значения отдаются из памяти; устаревшие отдаются сразу, а в фоне запускается обновление.
+    Если API вернул ошибку, остается последнее удачное значение. Кэш можно сохранять в JSON-файл.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[dict[str, float]] = None,
+        default_ttl: float = 60.0,
+        persist_path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.persist_path = persist_path
+        self.clock = clock
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._refreshing: dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        if persist_path:
+            self._load()
+
+    def _load(self) -> None:
+        """Читает сохраненные значения из файла persist_path. Поврежденные значения пропускаются."""
+        try:
+            with open(self.persist_path, encoding="utf-8") as file:  # type: ignore[arg-type]
+                entries = json.load(file)
+            if not isinstance(entries, dict):
+                raise ValueError("ожидался словарь источников")
+            for source, entry in entries.items():
+                if is_valid_entry(entry):
+                    self._entries[source] = entry
+                else:
+                    logger.error(f"Ошибка чтения рыночных данных {source} из {self.persist_path}: {entry!r}")
+            logger.info(f"рыночные данные загружены из {self.persist_path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as ex:
+            logger.error(f"Ошибка чтения рыночных данных из {self.persist_path}: {ex}")
+
+    def _save(self) -> None:
+        """
+        Атомарно сохраняет значения в файл persist_path (см. atomic_write). Сохранения идут по одному,
+        поэтому более старый снимок значений не может заменить в файле более новый.
+        """
+        if not self.persist_path:
+            return
+        try:
+            with self._save_lock:
+                with self._lock:
+                    data = json.dumps(self._entries, ensure_ascii=False)
+                atomic_write(self.persist_path, lambda file: file.write(data), text=True)
+        except OSError as ex:
+            logger.error(f"Ошибка сохранения рыночных данных в {self.persist_path}: {ex}")
+
+    def ttl(self, source: str) -> float:
+        """TTL источника в секундах."""
+        return self.ttls.get(source, self.default_ttl)
+
+    def refresh(self, source: str, fetcher: Callable[[], list[dict]]) -> list[dict]:
+        """
+        Получает данные источника и обновляет кэш. При ошибке API возвращает последнее удачное значение.
+
+        :param source: название источника
+        :param fetcher: функция получения данных
+        :return: данные источника
+        """
+        value = fetcher()
+        with self._lock:
+            entry = self._entries.get(source)
+            if is_failed(value):
+                if entry is not None:
+                    logger.error(f"Ошибка получения {source}, используется последнее удачное значение")
+                    last_value: list[dict] = entry["value"]
+                    return last_value
+                return value
+            self._entries[source] = {"value": value, "fetched_at": self.clock()}
+        self._save()
+        return value
+
+    def _refresh_in_background(self, source: str, fetcher: Callable[[], list[dict]]) -> None:
+        """Запускает фоновое обновление источника, если оно еще не запущено."""
+
+        def run() -> None:
+            try:
+                self.refresh(source, fetcher)
+            except Exception as ex:
+                logger.error(f"Ошибка фонового обновления {source}: {ex}")
+            finally:
+                with self._lock:
+                    self._refreshing.pop(source, None)
+
+        with self._lock:
+            if source in self._refreshing:
+                return
+            thread = threading.Thread(target=run, name=f"refresh-{source}", daemon=True)
+            self._refreshing[source] = thread
+        logger.info(f"фоновое обновление {source}")
+        thread.start()
+
+    def get(self, source: str, fetcher: Callable[[], list[dict]]) -> list[dict]:
+        """
+        Возвращает данные источника: свежие - из кэша, устаревшие - из кэша с фоновым обновлением,
+        отсутствующие - получает сразу.
+
+        :param source: название источника
+        :param fetcher: функция получения данных
+        :return: данные источника
+        """
+        return self.get_many({source: fetcher})[source]
+
+    def get_many(self, fetchers: dict[str, Callable[[], list[dict]]]) -> dict[str, list[dict]]:
+        """
+        Возвращает данные нескольких источников. Отсутствующие в кэше источники получаются параллельно.
+
+        :param fetchers: словарь название источника - функция получения данных
+        :return: словарь название источника - данные
+        """
+        now = self.clock()
+        result = {}
+        missing = []
+        for source, fetcher in fetchers.items():
+            with self._lock:
+                entry = self._entries.get(source)
+            if entry is None:
+                missing.append(source)
+                continue
+            if now - entry["fetched_at"] >= self.ttl(source):
+                self._refresh_in_background(source, fetcher)
+            result[source] = entry["value"]
+        if len(missing) == 1:
+            result[missing[0]] = self.refresh(missing[0], fetchers[missing[0]])
+        elif missing:
+            with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                futures = {source: executor.submit(self.refresh, source, fetchers[source]) for source in missing}
+            result.update({source: future.result() for source, future in futures.items()})
+        return result
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Ждет завершения фоновых обновлений (для остановки процесса и тестов)."""
+        with self._lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def invalidate(self, source: Optional[str] = None) -> None:
+        """
+        Удаляет значение источника из кэша (или все значения, если источник не передан).
+
+        :param source: название источника
+        """
+        with self._lock:
+            if source is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(source, None)
+        self._save()
+
+
+_market_cache: Optional[MarketDataCache] = None
+_market_cache_lock = threading.Lock()
+
+
+def get_market_cache() -> MarketDataCache:
+    """
+    Функция возвращает общий для процесса кэш рыночных данных. Он создается при первом вызове
+    с TTL и файлом из переменных окружения CURRENCY_RATES_TTL, STOCK_PRICES_TTL, MARKET_CACHE_FILE.
+
+    :return: кэш рыночных данных
+    """
+    global _market_cache
+    with _market_cache_lock:
+        if _market_cache is None:
+            _market_cache = MarketDataCache(
+                ttls={
+                    "currency_rates": float(env("CURRENCY_RATES_TTL", "600") or 600),
+                    "stock_prices": float(env("STOCK_PRICES_TTL", "60") or 60),
+                },
+                persist_path=env("MARKET_CACHE_FILE") or None,
+            )
+        return _market_cache
+
+
+def get_cached_market_data(cache: Optional[MarketDataCache] = None) -> tuple[list[dict], list[dict]]:
+    """
+    Функция возвращает курсы валют и стоимость акций через кэш рыночных данных.
+
+    :param cache: кэш рыночных данных, по умолчанию общий (см. get_market_cache)
+    :return: курсы валют и стоимость акций
+    """
+    cache = cache or get_market_cache()
+    values = cache.get_many({"currency_rates": get_rate_currency_concurrent, "stock_prices": stock_price_concurrent})
+    return values["currency_rates"], values["stock_prices"]
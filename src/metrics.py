@@ -0,0 +1,210 @@
+import bisect
+import threading
+import time
+from functools import wraps
+from typing import Any
+from typing import Callable
+from typing import Optional
+from typing import ParamSpec
+from typing import TypeVar
+
+from src.config import env
+
+METRIC_NAME = "dashboard_stage_duration_seconds"
+ERRORS_METRIC_NAME = "dashboard_stage_errors_total"
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics_enabled: Optional[bool] = None
+
+_env_enabled: Optional[bool] = None
+_stages: dict[str, "StageStats"] = {}
+_lock = threading.Lock()
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class StageStats:
+    """Число вызовов, ошибок, сумма и гистограмма времени выполнения одного этапа (границы BUCKETS, в секундах)."""
+
+    __slots__ = ("count", "errors", "total", "max", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds: float, failed: bool) -> None:
+        self.count += 1
+        self.errors += failed
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+
+def is_enabled() -> bool:
+    """
+    Функция проверяет, включен ли сбор метрик: переменная модуля metrics_enabled или
+    переменная окружения METRICS_ENABLED (1, true, yes, on; читается один раз). По умолчанию выключен.
+
+    :return: True, если время этапов записывается
+    """
+    global _env_enabled
+    if metrics_enabled is not None:
+        return metrics_enabled
+    if _env_enabled is None:
+        _env_enabled = (env("METRICS_ENABLED", "") or "").strip().lower() in ("1", "true", "yes", "on")
+    return _env_enabled
+
+
+def record(stage: str, seconds: float, failed: bool = False) -> None:
+    """
+    Функция записывает время выполнения этапа.
+
+    :param stage: название этапа
+    :param seconds: время в секундах
+    :param failed: этап завершился исключением
+    """
+    with _lock:
+        stats = _stages.get(stage)
+        if stats is None:
+            stats = _stages[stage] = StageStats()
+        stats.add(seconds, failed)
+
+
+class _Timer:
+    """Контекстный менеджер, который записывает время блока (см. timed)."""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        record(self.stage, time.perf_counter() - self.start, exc_type is not None)
+
+
+class _NoopTimer:
+    """Контекстный менеджер выключенного сбора метрик: ничего не делает."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopTimer":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        return None
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def timed(stage: str) -> Any:
+    """
+    Функция возвращает контекстный менеджер, который записывает время выполнения блока как этап stage.
+    Если сбор метрик выключен (см. is_enabled), возвращается общий пустой менеджер без замера времени.
+
+    :param stage: название этапа, например 'views.market_data'
+    :return: контекстный менеджер
+    """
+    return _Timer(stage) if is_enabled() else _NOOP_TIMER
+
+
+def instrument(stage: Optional[str] = None) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """
+    Декоратор записывает время выполнения функции (см. timed). Если сбор метрик выключен,
+    функция вызывается напрямую: стоимость - одна проверка is_enabled.
+    С memoize_report декоратор ставится внутри, тогда замеряются только расчеты без кэша.
+
+    :param stage: название этапа, по умолчанию <модуль>.<функция>, например 'utils.read_excel'
+    :return: функция с замером времени
+    """
+
+    def wrapper(func: Callable[P, R]) -> Callable[P, R]:
+        name = stage or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        @wraps(func)
+        def inner(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not is_enabled():
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                record(name, time.perf_counter() - start, failed)
+
+        return inner
+
+    return wrapper
+
+
+def reset_metrics() -> None:
+    """Функция удаляет все записанные метрики."""
+    with _lock:
+        _stages.clear()
+
+
+def metrics_snapshot() -> dict[str, Any]:
+    """
+    Функция возвращает снимок метрик для JSON: по каждому этапу число вызовов и ошибок,
+    суммарное, среднее и максимальное время (в секундах) и накопленную гистограмму
+    (число вызовов не дольше границы, '+Inf' - все вызовы).
+
+    :return: словарь {"enabled": ..., "stages": {этап: {...}}}, этапы по алфавиту
+    """
+    with _lock:
+        stages = {}
+        for stage in sorted(_stages):
+            stats = _stages[stage]
+            cumulative, buckets = 0, {}
+            for bound, count in zip([*map(str, BUCKETS), "+Inf"], stats.buckets):
+                cumulative += count
+                buckets[bound] = cumulative
+            stages[stage] = {
+                "count": stats.count,
+                "errors": stats.errors,
+                "sum_seconds": round(stats.total, 6),
+                "mean_seconds": round(stats.total / stats.count, 6) if stats.count else 0.0,
+                "max_seconds": round(stats.max, 6),
+                "buckets": buckets,
+            }
+    return {"enabled": is_enabled(), "stages": stages}
+
+
+def metrics_prometheus() -> str:
+    """
+    Функция возвращает метрики в текстовом формате Prometheus: гистограмма METRIC_NAME
+    и счетчик ошибок ERRORS_METRIC_NAME с меткой stage.
+
+    :return: текст для ответа /metrics
+    """
+    stages = metrics_snapshot()["stages"]
+    lines = [
+        f"# HELP {METRIC_NAME} Время выполнения этапа в секундах.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for stage, stats in stages.items():
+        label = stage.replace("\\", "\\\\").replace('"', '\\"')
+        for bound, count in stats["buckets"].items():
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{label}",le="{bound}"}} {count}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{label}"}} {stats["sum_seconds"]}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{label}"}} {stats["count"]}')
+    lines += [
+        f"# HELP {ERRORS_METRIC_NAME} Число вызовов этапа с исключением.",
+        f"# TYPE {ERRORS_METRIC_NAME} counter",
+    ]
+    for stage, stats in stages.items():
+        label = stage.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'{ERRORS_METRIC_NAME}{{stage="{label}"}} {stats["errors"]}')
+    return "\n".join(lines) + "\n"
@@ -1,36 +1,178 @@
+from __future__ import annotations
+
+import atexit
 import datetime
+import hashlib
+import inspect
 import json
 import logging
+import math
 import os
+import queue
+import sys
+import threading
+from collections import OrderedDict
 from functools import wraps
 from json import JSONDecodeError
 from pathlib import Path
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import Callable
+from typing import Iterable
 from typing import Optional
+from typing import ParamSpec
+from typing import TypeVar
+from typing import cast
 
-import pandas as pd
 from dateutil.relativedelta import relativedelta
 
+from src.aggregates import AggregateEngine
+from src.aggregates import WeekdayTotals
+from src.cache import atomic_write
+from src.lazy import lazy_import
+from src.logging_utils import lazy_repr
+from src.metrics import instrument
+from src.rollup import MonthlyRollup
+from src.serializers import dumps
+from src.serializers import json_default
+from src.store import date_window
+from src.store import owned_fingerprint
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
 directory_name = Path(__file__).resolve().parent.parent
-log_path = os.path.join(directory_name, "logs", "reports.log")
 
-logging.basicConfig(
-    filename=log_path,
-    format="%(asctime)s - %(filename)s - %(levelname)s:  %(message)s",
-    filemode="w",
-    level=logging.DEBUG,
-    encoding="utf-8",
-)
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+DATE_FORMAT = "%d.%m.%Y"
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def write_json_atomic(path: str, result: Any) -> None:
+    """
+    Функция записывает результат в JSON-файл атомарно: во временный файл рядом и затем os.replace
+    (см. atomic_write). Права файла - по umask процесса, как у файла, созданного open.
+
+    :param path: путь к файлу
+    :param result: результат функции
+    """
+    atomic_write(path, lambda file: json.dump(result, file, default=json_default), text=True)
+
+
+class ReportWriter:
+    """
+    Фоновая запись результатов в файлы: очередь и один поток-писатель.
+    Если файл записывается повторно, пока предыдущая запись еще в очереди, сохраняется только последний результат.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[str, Any] = {}
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, path: str, result: Any) -> None:
+        """
+        Ставит результат в очередь на запись в файл.
+
+        :param path: путь к файлу
+        :param result: результат функции
+        """
+        with self._lock:
+            queued = path in self._pending
+            self._pending[path] = result
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="report-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if not queued:
+            self._queue.put(path)
+
+    def _run(self) -> None:
+        """Цикл потока-писателя."""
+        while True:
+            path = self._queue.get()
+            try:
+                with self._lock:
+                    result = self._pending.pop(path)
+                write_json_atomic(path, result)
+                _remember_written(path, result_digest(result))
+            except Exception as ex:
+                logger.error(f"Ошибка сохранение результат функции в файл {path}: {ex}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Ждет, пока все результаты из очереди будут записаны (для остановки процесса и тестов)."""
+        self._queue.join()
+
+
+report_writer = ReportWriter()
+LAST_RESULTS_SIZE = 32
+_written_digests: OrderedDict[str, str] = OrderedDict()
+_written_lock = threading.Lock()
 
-logger = logging.getLogger()
 
+def result_digest(result: Any) -> Optional[str]:
+    """
+    Функция возвращает хэш (blake2b) JSON-представления результата, как его записывает write_json_atomic.
+
+    :param result: результат функции
+    :return: хэш или None, если результат не кодируется в JSON
+    """
+    try:
+        text = json.dumps(result, default=json_default)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _is_written(path: str, digest: Optional[str]) -> bool:
+    """Проверяет, что в файл path уже успешно записан результат с хэшем digest."""
+    with _written_lock:
+        if digest is None or _written_digests.get(path) != digest:
+            return False
+        _written_digests.move_to_end(path)
+    return os.path.exists(path)
+
+
+def _remember_written(path: str, digest: Optional[str]) -> None:
+    """
+    Функция запоминает хэш результата, успешно записанного в файл path (None - забывает прежний).
+    Хранятся хэши не больше чем LAST_RESULTS_SIZE файлов, давно не записанные вытесняются.
+
+    :param path: путь к файлу отчета
+    :param digest: хэш записанного результата (см. result_digest)
+    """
+    with _written_lock:
+        _written_digests.pop(path, None)
+        if digest is not None:
+            _written_digests[path] = digest
+        while len(_written_digests) > LAST_RESULTS_SIZE:
+            _written_digests.popitem(last=False)
 
-def log_json_data(filename: str = "user_settings") -> Callable[..., Any]:
+
+def flush_reports() -> None:
+    """Функция ждет завершения фоновой записи всех результатов log_json_data(async_write=True)."""
+    report_writer.flush()
+
+
+def log_json_data(filename: str = "user_settings", async_write: bool = False) -> Callable[..., Any]:
     """
     Декоратор  результат  функции сохраняет в файл.
+    Файл записывается атомарно; в лог попадает не больше LOG_RESULT_LIMIT символов результата.
+    Если функция вернула тот же результат, что уже успешно записан в файл (сравниваются хэши JSON,
+    см. result_digest), файл не перезаписывается; хэш запоминается только после записи.
+    С async_write=True запись идет в фоновом потоке (см. ReportWriter, flush_reports).
 
     :param filename: Название файла, где сохраняет результат  функции
+    :param async_write: записывать файл в фоновом потоке
     :return: результат функции(если функция не выдает ошибки) или строка(если функция выдает ошибки)
     """
 
@@ -41,9 +183,17 @@ def log_json_data(filename: str = "user_settings") -> Callable[..., Any]:
                 logger.info("получение результат  функции ")
                 user_settings_file = os.path.join(directory_name, filename + ".json")
                 result = func(*args, **kwargs)
-                logger.info(f"сохранение результат функции в файл : {result}")
-                with open(user_settings_file, "w", encoding="utf-8") as file:
-                    json.dump(result, file)
+                digest = result_digest(result)
+                if _is_written(user_settings_file, digest):
+                    logger.info("результат функции не изменился, файл не перезаписывается")
+                    return result
+                _remember_written(user_settings_file, None)
+                logger.info("сохранение результат функции в файл : %s", lazy_repr(result))
+                if async_write:
+                    report_writer.submit(user_settings_file, result)
+                else:
+                    write_json_atomic(user_settings_file, result)
+                    _remember_written(user_settings_file, digest)
                 return result
             except AssertionError as ex:
                 logger.error(f"Ошибка сохранение результат функции в файл: {ex}")
@@ -54,10 +204,114 @@ def log_json_data(filename: str = "user_settings") -> Callable[..., Any]:
     return wrapper
 
 
+def _result_size(result: Any) -> int:
+    """Примерный размер результата в байтах для ограничения кэша."""
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(index=True).sum())
+    if isinstance(result, str):
+        return len(result)
+    return sys.getsizeof(result)
+
+
+def memoize_report(maxsize: int = 128, max_bytes: Optional[int] = None) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """
+    Декоратор кэширует результаты отчета. Ключ - отпечаток данных (см. owned_fingerprint,
+    AggregateEngine.fingerprint, MonthlyRollup.fingerprint) и аргументы;
+    дата по умолчанию (None) заменяется текущей датой.
+    Кэшируются только данные с отпечатком: DataFrame хранилища (TransactionStore), AggregateEngine и
+    MonthlyRollup по ним. Остальные DataFrame могут измениться на месте, поэтому для них отчет считается
+    при каждом вызове и в статистику кэша не попадает.
+    Вытесняются давно не использованные результаты, когда их больше maxsize или их общий размер больше max_bytes.
+    Из кэша DataFrame возвращается копией.
+    С log_json_data декоратор ставится внутри: @log_json_data(...) над @memoize_report().
+
+    :param maxsize: максимальное число результатов в кэше
+    :param max_bytes: опциональный максимальный общий размер результатов в байтах
+    :return: функция с кэшем (cache_info() - статистика, cache_clear() - очистка)
+    """
+
+    def wrapper(func: Callable[P, R]) -> Callable[P, R]:
+        signature = inspect.signature(func)
+        cache: OrderedDict[Any, tuple[Any, int]] = OrderedDict()
+        stats = {"hits": 0, "misses": 0, "bytes": 0}
+        lock = threading.Lock()
+
+        def make_key(df: pd.DataFrame, *args: Any, **kwargs: Any) -> Any:
+            arguments = signature.bind(df, *args, **kwargs)
+            arguments.apply_defaults()
+            values = dict(arguments.arguments)
+            values.pop(next(iter(signature.parameters)))
+            if "date" in values and not values["date"]:
+                values["date"] = datetime.datetime.now().strftime("%d.%m.%Y")
+            fingerprint = df.fingerprint if isinstance(df, (AggregateEngine, MonthlyRollup)) else owned_fingerprint(df)
+            if fingerprint is None:
+                return None
+            key = (fingerprint, tuple(values.items()))
+            hash(key)
+            return key
+
+        @wraps(func)
+        def inner(df: pd.DataFrame, *args: Any, **kwargs: Any) -> Any:
+            try:
+                key = make_key(df, *args, **kwargs)
+            except TypeError:
+                key = None
+            if key is None:
+                return func(df, *args, **kwargs)
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    stats["hits"] += 1
+                    result = cache[key][0]
+                    return result.copy() if isinstance(result, pd.DataFrame) else result
+                stats["misses"] += 1
+            result = func(df, *args, **kwargs)
+            size = _result_size(result)
+            with lock:
+                if key not in cache:
+                    cache[key] = (result, size)
+                    stats["bytes"] += size
+                while cache and (len(cache) > maxsize or (max_bytes is not None and stats["bytes"] > max_bytes)):
+                    stats["bytes"] -= cache.popitem(last=False)[1][1]
+            return result.copy() if isinstance(result, pd.DataFrame) else result
+
+        def cache_info() -> dict:
+            with lock:
+                return {**stats, "size": len(cache), "maxsize": maxsize, "max_bytes": max_bytes}
+
+        def cache_clear() -> None:
+            with lock:
+                cache.clear()
+                stats.update(hits=0, misses=0, bytes=0)
+
+        inner.cache_info = cache_info  # type: ignore[attr-defined]
+        inner.cache_clear = cache_clear  # type: ignore[attr-defined]
+        return cast(Callable[P, R], inner)
+
+    return wrapper
+
+
+def report_period(date: Optional[str] = None) -> tuple[datetime.datetime, datetime.datetime]:
+    """
+    Функция возвращает период отчета: три месяца до переданной даты (включительно).
+    Если дата не передана, то берется текущая дата.
+
+    :param date: опциональную дату в формате 'dd.mm.YYYY'
+    :return: начало и конец периода
+    """
+    if not date:
+        date = datetime.datetime.now().strftime(DATE_FORMAT)
+    dt = datetime.datetime.strptime(date, DATE_FORMAT)
+    logger.info(f"получение даты: {dt}")
+    return dt - relativedelta(months=3), dt
+
+
 def filtered_by_date(df: pd.DataFrame, date: Optional[str] = None) -> pd.DataFrame:
     """
     Функция принимает датафрейм с транзакциями, категории, дату.
     Функция филтрует транзакции за последние три месяца (от переданной даты
+    Переданный датафрейм не изменяется: разобранные даты кэшируются для него (см. date_window),
+    поэтому один датафрейм можно использовать в нескольких отчетах одновременно.
 
     :param df: датафрейм с транзакциями
     :param date: опциональную дату в формате 'dd.mm.YYYY'
@@ -65,20 +319,16 @@ def filtered_by_date(df: pd.DataFrame, date: Optional[str] = None) -> pd.DataFra
     """
     try:
         logger.info("фильтрация транзакции за последние три месяца")
-        df["Дата платежа"] = pd.to_datetime(df["Дата платежа"], format="%d.%m.%Y")
-        date_format = "%d.%m.%Y"
-        if not date:
-            date = datetime.datetime.now().strftime(date_format)
-        dt = datetime.datetime.strptime(date, date_format)
-        logger.info(f"получение даты: {dt}")
-        past_datetime = dt - relativedelta(months=3)
-        filtered_by_date = df[(df["Дата платежа"] >= past_datetime) & (df["Дата платежа"] <= dt)]
+        past_datetime, dt = report_period(date)
+        filtered_by_date = date_window(df, "Дата платежа", past_datetime, dt, DATE_FORMAT)
         return filtered_by_date
     except (KeyError, TypeError, AssertionError) as ex:
         logger.error(f"Ошибка получение транзакции за последние три месяца : {ex}")
         return pd.DataFrame()
 
 
+@memoize_report()
+@instrument()
 def spending_by_category(df: pd.DataFrame, category: str, date: Optional[str] = None) -> pd.DataFrame:
     """
     Функция принимает датафрейм с транзакциями, категории, дату.
@@ -100,6 +350,78 @@ def spending_by_category(df: pd.DataFrame, category: str, date: Optional[str] =
         return pd.DataFrame()
 
 
+def _weekday_totals(df: pd.DataFrame, date: Optional[str] = None) -> pd.DataFrame:
+    """
+    Один проход groupby по дню недели: сумма и количество трат за последние три месяца.
+
+    :param df: датафрейм с транзакциями, движок агрегатов (AggregateEngine) или кубы по месяцам (MonthlyRollup)
+    :param date: опциональную дату в формате 'dd.mm.YYYY'
+    :return: DataFrame со столбцами sum и count, строки - дни недели 0 (понедельник) ... 6 (воскресенье)
+    """
+    if isinstance(df, (AggregateEngine, MonthlyRollup)):
+        return df.weekday_totals(*report_period(date))
+    filter_df = filtered_by_date(df, date)
+    amounts = filter_df["Сумма платежа"]
+    totals = amounts.groupby(filter_df["Дата платежа"].dt.dayofweek).agg(["sum", "count"])
+    return totals.reindex(range(len(WEEKDAYS)), fill_value=0)
+
+
+def _weekday_means(totals: pd.DataFrame) -> list[dict]:
+    """Средние траты по дням недели в формате [{"Monday": 1.0}, ...]; день без трат - NaN."""
+    means = totals["sum"] / totals["count"].where(totals["count"] > 0)
+    return [{weekday: round(mean, 2)} for weekday, mean in zip(WEEKDAYS, means)]
+
+
+def weekday_summary(df: pd.DataFrame, date: Optional[str] = None) -> dict:
+    """
+    Функция за один проход считает средние траты и количество трат по дням недели,
+    а также средние траты и количество трат в рабочие и выходные дни за последние три месяца (от переданной даты).
+
+    :param df:датафрейм с транзакциями
+    :param date:опциональную дату в формате 'dd.mm.YYYY'
+    :return: словарь со средними и количеством трат или пустой словарь при ошибке
+    """
+    try:
+        return _weekday_summary(_weekday_totals(df, date))
+    except (KeyError, TypeError, AssertionError, AttributeError) as ex:
+        logger.error(f"Ошибка получение трат по дням недели за последние три месяца : {ex}")
+        return {}
+
+
+def weekday_summary_from_chunks(chunks: Iterable[pd.DataFrame], date: Optional[str] = None) -> dict:
+    """
+    Функция считает то же, что weekday_summary, по частям транзакций (например, из потокового чтения
+    src.ingest.iter_chunks с разобранными датами); в памяти одновременно только одна часть.
+
+    :param chunks: части DataFrame с транзакциями
+    :param date:опциональную дату в формате 'dd.mm.YYYY'
+    :return: словарь со средними и количеством трат или пустой словарь при ошибке
+    """
+    try:
+        totals = WeekdayTotals(*report_period(date))
+        for chunk in chunks:
+            totals.update(chunk)
+        return _weekday_summary(totals.totals())
+    except (KeyError, TypeError, ValueError, AssertionError, AttributeError) as ex:
+        logger.error(f"Ошибка получение трат по дням недели за последние три месяца : {ex}")
+        return {}
+
+
+def _weekday_summary(totals: pd.DataFrame) -> dict:
+    """Средние и количество трат по дням недели, в рабочие и выходные дни (по результату _weekday_totals)."""
+    workdays, weekend = totals.iloc[:5].sum(), totals.iloc[5:].sum()
+    return {
+        "weekday_means": _weekday_means(totals),
+        "weekday_counts": [{weekday: int(count)} for weekday, count in zip(WEEKDAYS, totals["count"])],
+        "workday_mean": round(float(workdays["sum"] / workdays["count"]), 2) if workdays["count"] else math.nan,
+        "weekend_mean": round(float(weekend["sum"] / weekend["count"]), 2) if weekend["count"] else math.nan,
+        "workday_count": int(workdays["count"]),
+        "weekend_count": int(weekend["count"]),
+    }
+
+
+@memoize_report()
+@instrument()
 def spending_by_weekday(df: pd.DataFrame, date: Optional[str] = None) -> str:
     """
     Функция принимает датафрейм с транзакциями,  дату.
@@ -111,20 +433,16 @@ def spending_by_weekday(df: pd.DataFrame, date: Optional[str] = None) -> str:
     :return: Функция возвращает средние траты в каждый из дней недели за последние три месяца (от переданной даты)
     """
     try:
-        filter_df = filtered_by_date(df, date)
-        weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        data = []
-        for weekday in weekdays:
-            filter_by_weekday = filter_df[filter_df["Дата платежа"].dt.day_name() == weekday]
-            avg_amount = filter_by_weekday["Сумма платежа"].mean()
-            data.append({weekday: round(float(avg_amount), 2)})
-        logger.info(f"получение средние траты в каждый из дней недели за последние три месяца: {data}")
-        return json.dumps(data, ensure_ascii=False, indent=4)
-    except (KeyError, JSONDecodeError, TypeError, AssertionError, NameError) as ex:
+        data = _weekday_means(_weekday_totals(df, date))
+        logger.info("получение средние траты в каждый из дней недели за последние три месяца: %s", lazy_repr(data))
+        return dumps(data)
+    except (KeyError, JSONDecodeError, TypeError, AssertionError, NameError, AttributeError) as ex:
         logger.error(f"Ошибка получение средние траты в каждый из дней недели за последние три месяца : {ex}")
         return ""
 
 
+@memoize_report()
+@instrument()
 def spending_by_workday(df: pd.DataFrame, date: Optional[str] = None) -> str:
     """
     Функция принимает датафрейм с транзакциями,  дату.
@@ -135,11 +453,14 @@ def spending_by_workday(df: pd.DataFrame, date: Optional[str] = None) -> str:
     :param date:опциональную дату в формате 'dd.mm.YYYY'
     :return: Функция выводит средние траты в рабочий и в выходной день за последние три месяца (от переданной даты).
     """
-    weekday_spending = spending_by_weekday(df, date)
-    if weekday_spending:
-        weekday_data = json.loads(weekday_spending)
+    try:
+        weekday_data = _weekday_means(_weekday_totals(df, date))
         result = {"рабочий день": weekday_data[:5], "выходной день": weekday_data[5:]}
-        logger.info(f"средние траты в рабочий и в выходной день за последние три месяца(от переданной даты): {result}")
-        return json.dumps(result, ensure_ascii=False, indent=4)
-    logger.error("Ошибка получение  средние траты в рабочий и в выходной день за последние три месяца")
-    return ""
+        logger.info(
+            "средние траты в рабочий и в выходной день за последние три месяца(от переданной даты): %s",
+            lazy_repr(result),
+        )
+        return dumps(result)
+    except (KeyError, TypeError, AssertionError, NameError, AttributeError) as ex:
+        logger.error(f"Ошибка получение  средние траты в рабочий и в выходной день за последние три месяца: {ex}")
+        return ""
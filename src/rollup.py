@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Optional
+
+from src.aggregates import CASHBACK_EXCLUDED_CATEGORIES
+from src.aggregates import WEEKDAYS_COUNT
+from src.cache import load_or_build
+from src.lazy import lazy_import
+from src.store import DATE_FORMATS
+from src.store import date_window
+from src.store import owned_fingerprint
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_VERSION = 1
+ROLLUP_NAMES = {"Дата операции": "operation", "Дата платежа": "payment"}
+ROLLUP_DIMENSIONS = ["year", "month", "Номер карты", "Категория", "weekday"]
+ROLLUP_MEASURES = {
+    "rows": ("Сумма платежа", "size"),
+    "payment_count": ("Сумма платежа", "count"),
+    "payment_sum": ("Сумма платежа", "sum"),
+    "bonus_sum": ("Бонусы (включая кэшбэк)", "sum"),
+    "rounded_sum": ("Сумма операции с округлением", "sum"),
+}
+
+
+def build_rollup(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    """
+    Функция считает куб по месяцам даты column: для каждого (год, месяц, карта, категория, день недели)
+    число строк, число и сумму платежей, сумму бонусов и сумму операций с округлением.
+    Строки куба идут в порядке первого появления в транзакциях; пустые карты и категории сохраняются,
+    строки без даты не учитываются.
+
+    :param df: DataFrame с транзакциями (даты - строки или datetime64)
+    :param column: столбец с датами: "Дата операции" или "Дата платежа"
+    :return: DataFrame со столбцами ROLLUP_DIMENSIONS и ROLLUP_MEASURES
+    """
+    dates = df[column]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format=DATE_FORMATS[column])
+    keys = [
+        dates.dt.year.rename("year"),
+        dates.dt.month.rename("month"),
+        df["Номер карты"],
+        df["Категория"],
+        dates.dt.dayofweek.rename("weekday"),
+    ]
+    cube = df.groupby(keys, sort=False, dropna=False, observed=True).agg(**ROLLUP_MEASURES).reset_index()
+    cube = cube[cube["year"].notna()]
+    for dimension in ["year", "month", "weekday"]:
+        cube[dimension] = cube[dimension].astype("int64")
+    return cube.reset_index(drop=True)
+
+
+def _month_number(year: Any, month: Any) -> Any:
+    """Сквозной номер месяца (год * 12 + месяц - 1)."""
+    return year * 12 + month - 1
+
+
+def _month_start(number: int) -> pd.Timestamp:
+    """Начало месяца по сквозному номеру (см. _month_number)."""
+    return pd.Timestamp(number // 12, number % 12 + 1, 1)
+
+
+def split_period(start: Any, end: Any) -> tuple[list[int], Optional[tuple], Optional[tuple]]:
+    """
+    Функция делит период на полные месяцы (берутся из куба) и неполные края (считаются по строкам).
+
+    :param start: начало периода
+    :param end: конец периода (включительно)
+    :return: номера полных месяцев (см. _month_number), диапазон неполного месяца в начале периода
+        и диапазон неполного месяца в конце периода (начало, конец) или None
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    first = _month_number(start.year, start.month)
+    if start > _month_start(first):
+        first += 1
+    last = _month_number(end.year, end.month)
+    if end < _month_start(last + 1) - pd.Timedelta(1, "ns"):
+        last -= 1
+    if first > last:
+        return [], None, (start, end) if start <= end else None
+    head = (start, _month_start(first) - pd.Timedelta(1, "ns")) if start < _month_start(first) else None
+    tail = (_month_start(last + 1), end) if end >= _month_start(last + 1) else None
+    return list(range(first, last + 1)), head, tail
+
+
+class MonthlyRollup:
+    """
+    Кубы по месяцам для транзакций (см. build_rollup): по дате операции (траты по картам, кешбэк)
+    и по дате платежа (отчеты по дням недели). Запросы по целым месяцам считаются по кубу,
+    неполные месяцы в начале и конце периода - по строкам транзакций (frame, от новых к старым).
+    Объект можно передавать вместо DataFrame в get_each_cards_datas, cashback_by_month,
+    raised_cashback_for_categories и отчеты по дням недели.
+    """
+
+    def __init__(self, frame: pd.DataFrame, cubes: Optional[dict[str, pd.DataFrame]] = None) -> None:
+        self.frame = frame
+        self.cubes = cubes if cubes is not None else {column: build_rollup(frame, column) for column in ROLLUP_NAMES}
+        self._cashback: Optional[dict[tuple[int, int], dict[str, float]]] = None
+        self._weekdays: Optional[tuple[int, np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def load(
+        cls, frame: pd.DataFrame, source_file: str, name: str, cache_dir: Optional[str] = None
+    ) -> "MonthlyRollup":
+        """
+        Читает кубы из кэша (<name>.rollup<ROLLUP_VERSION>.operation и .payment) или строит
+        и сохраняет их, если исходный файл изменился (см. load_or_build).
+
+        :param frame: DataFrame с транзакциями, построенный из source_file
+        :param source_file: путь к исходному файлу
+        :param name: имя кэша (например, 'operations')
+        :param cache_dir: опциональная папка кэша
+        :return: кубы
+        """
+        cubes = {
+            column: load_or_build(
+                source_file,
+                f"{name}.rollup{ROLLUP_VERSION}.{suffix}",
+                lambda column=column: build_rollup(frame, column),  # type: ignore[misc]
+                cache_dir,
+            )
+            for column, suffix in ROLLUP_NAMES.items()
+        }
+        return cls(frame, cubes)
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """
+        Отпечаток для ключей кэша отчетов (совпадает для кубов одних и тех же транзакций).
+        None, если транзакции не принадлежат хранилищу (см. own_frame): тогда отчеты не кэшируются.
+        """
+        owner = owned_fingerprint(self.frame)
+        return None if owner is None else f"rollup:{owner}"
+
+    def _parts(self, column: str, start: Any, end: Any) -> list[tuple[str, pd.DataFrame]]:
+        """
+        Части периода от новых к старым: ("rows", транзакции неполного месяца в конце),
+        ("cube", строки куба за полные месяцы), ("rows", транзакции неполного месяца в начале).
+        Без периода - весь куб.
+        """
+        cube = self.cubes[column]
+        if start is None and end is None:
+            return [("cube", cube)]
+        months, head, tail = split_period(start, end)
+        parts = []
+        if tail is not None:
+            parts.append(("rows", date_window(self.frame, column, *tail)))
+        if months:
+            parts.append(("cube", cube[_month_number(cube["year"], cube["month"]).isin(months)]))
+        if head is not None:
+            parts.append(("rows", date_window(self.frame, column, *head)))
+        logger.info(f"куб {ROLLUP_NAMES[column]}: полных месяцев {len(months)}, неполных {len(parts) - bool(months)}")
+        return parts
+
+    def card_totals(self, start: Any = None, end: Any = None) -> list[dict]:
+        """
+        Суммы расходов и бонусов по картам за период по дате операции (по умолчанию за все время).
+        Карты идут в порядке первого появления в транзакциях (от новых к старым), как в get_each_cards_datas.
+
+        :param start: начало периода
+        :param end: конец периода (включительно)
+        :return: список словарей в формате get_each_cards_datas
+        """
+        totals: dict[Any, list[float]] = {}
+        for kind, part in self._parts("Дата операции", start, end):
+            columns = ["payment_sum", "bonus_sum"] if kind == "cube" else ["Сумма платежа", "Бонусы (включая кэшбэк)"]
+            sums = part.groupby("Номер карты", observed=True, sort=False)[columns].sum()
+            for card_number, total_spent, cashback in zip(sums.index, sums[columns[0]], sums[columns[1]]):
+                entry = totals.setdefault(card_number, [0.0, 0.0])
+                entry[0] += float(total_spent)
+                entry[1] += float(cashback)
+        return [
+            {"last_digits": card_number, "total_spent": total_spent, "cashback": cashback}
+            for card_number, (total_spent, cashback) in totals.items()
+        ]
+
+    def cashback_by_month(self) -> dict[tuple[int, int], dict[str, float]]:
+        """
+        Кешбэк (1%) по категориям для всех месяцев по кубу дат операций (формат cashback_by_month).
+        Категории CASHBACK_EXCLUDED_CATEGORIES не учитываются.
+
+        :return: словарь (год, месяц) - {категория: кешбэк}, категории в порядке появления в месяце
+        """
+        if self._cashback is None:
+            cube = self.cubes["Дата операции"]
+            cube = cube[cube["Категория"].notna() & ~cube["Категория"].isin(CASHBACK_EXCLUDED_CATEGORIES)]
+            sums = cube.groupby(["year", "month", "Категория"], sort=False, observed=True)["rounded_sum"].sum()
+            cashback: dict[tuple[int, int], dict[str, float]] = {}
+            for (year, month, category), amount in sums.items():
+                cashback.setdefault((int(year), int(month)), {})[category] = round(float(amount) / 100, 2)
+            self._cashback = cashback
+        return self._cashback
+
+    def _weekday_matrix(self) -> tuple[int, np.ndarray, np.ndarray]:
+        """Суммы и количество платежей по (месяц, день недели) из куба дат платежа: первый месяц и матрицы."""
+        if self._weekdays is None:
+            cube = self.cubes["Дата платежа"]
+            months = _month_number(cube["year"], cube["month"]).to_numpy(dtype="int64")
+            first = int(months.min()) if len(months) else 0
+            shape = (int(months.max()) - first + 1 if len(months) else 0, WEEKDAYS_COUNT)
+            sums, counts = np.zeros(shape), np.zeros(shape, dtype="int64")
+            positions = (months - first, cube["weekday"].to_numpy(dtype="int64"))
+            np.add.at(sums, positions, cube["payment_sum"].to_numpy(dtype="float64"))
+            np.add.at(counts, positions, cube["payment_count"].to_numpy(dtype="int64"))
+            self._weekdays = (first, sums, counts)
+        return self._weekdays
+
+    def weekday_totals(self, start: Any, end: Any) -> pd.DataFrame:
+        """
+        Сумма и количество трат по дням недели для дат платежа от start до end включительно.
+        Полные месяцы берутся из матрицы (месяц, день недели), неполные - по строкам транзакций.
+        Даты платежа - дни без времени, поэтому период расширяется до целых дней.
+
+        :param start: начало периода
+        :param end: конец периода
+        :return: DataFrame в формате WeekdayTotals.totals
+        """
+        start = pd.Timestamp(start).ceil("D")
+        end = pd.Timestamp(end).floor("D") + pd.Timedelta(1, "D") - pd.Timedelta(1, "ns")
+        months, head, tail = split_period(start, end)
+        first, month_sums, month_counts = self._weekday_matrix()
+        rows = slice(max(months[0] - first, 0), max(months[-1] - first + 1, 0)) if months else slice(0, 0)
+        sums, counts = month_sums[rows].sum(axis=0), month_counts[rows].sum(axis=0)
+        for period in (tail, head):
+            if period is None:
+                continue
+            part = date_window(self.frame, "Дата платежа", *period)
+            amounts = part["Сумма платежа"].to_numpy(dtype="float64")
+            weekdays = part["Дата платежа"].dt.dayofweek.to_numpy()
+            valid = ~np.isnan(amounts)
+            sums += np.bincount(weekdays[valid], weights=amounts[valid], minlength=WEEKDAYS_COUNT)
+            counts += np.bincount(weekdays[valid], minlength=WEEKDAYS_COUNT)
+        return pd.DataFrame({"sum": sums, "count": counts}, index=range(WEEKDAYS_COUNT))
@@ -0,0 +1,209 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+from typing import Optional
+from typing import TypeVar
+
+from src.store import owned_fingerprint
+
+REGEX_CHARS = frozenset(".^$*+?{}[]\\|()")
+FIELD_SEPARATOR = "\x00"
+CACHE_SIZE = 8
+
+T = TypeVar("T")
+
+
+def value_text(transaction: dict) -> str:
+    """
+    Функция собирает текст для поиска только из значений транзакции (без названий полей).
+
+    :param transaction: транзакция
+    :return: значения транзакции, разделенные символом FIELD_SEPARATOR
+    """
+    return FIELD_SEPARATOR.join(str(value) for value in transaction.values())
+
+
+def is_literal(query: str) -> bool:
+    """
+    Функция проверяет, что в запросе нет специальных символов регулярных выражений.
+
+    :param query: строка-запрос
+    :return: True, если запрос можно искать как обычную подстроку
+    """
+    return not any(char in REGEX_CHARS for char in query)
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Функция возвращает множество триграмм (подстрок из трех символов) текста.
+
+    :param text: текст
+    :return: множество триграмм
+    """
+    return {text[position : position + 3] for position in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """
+    Триграммный индекс по значениям транзакций.
+    Обычные запросы (подстроки) ищутся по индексу, регулярные выражения - по заранее
+    подготовленным текстам значений без учета регистра.
+    Без триграмм (indexed=False) подстроки ищутся перебором текстов: так дешевле для одного запроса.
+    """
+
+    def __init__(self, transactions: list[dict], indexed: bool = True) -> None:
+        self.transactions = transactions
+        self.texts = [value_text(transaction) for transaction in transactions]
+        self.lowered = [text.lower() for text in self.texts]
+        postings: dict[str, list[int]] = {}
+        if indexed:
+            for position, text in enumerate(self.lowered):
+                for trigram in trigrams(text):
+                    postings.setdefault(trigram, []).append(position)
+        self.indexed = indexed
+        self.postings = postings
+
+    def _candidates(self, query: str) -> Optional[set[int]]:
+        """
+        Позиции транзакций, содержащих все триграммы запроса
+        (None - запрос короче трех символов или индекс без триграмм).
+        """
+        query_trigrams = trigrams(query)
+        if not query_trigrams or not self.indexed:
+            return None
+        lists = sorted((self.postings.get(trigram, []) for trigram in query_trigrams), key=len)
+        candidates = set(lists[0])
+        for positions in lists[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(positions)
+        return candidates
+
+    def search_positions(self, query: str) -> list[int]:
+        """
+        Возвращает позиции транзакций, подходящих под запрос, в исходном порядке.
+
+        :param query: строка-запрос или регулярное выражение
+        :return: список позиций
+        """
+        if is_literal(query):
+            lowered_query = query.lower()
+            candidates = self._candidates(lowered_query)
+            positions = range(len(self.lowered)) if candidates is None else sorted(candidates)
+            return [position for position in positions if lowered_query in self.lowered[position]]
+        pattern = re.compile(query, flags=re.IGNORECASE)
+        return [position for position, text in enumerate(self.texts) if pattern.search(text)]
+
+    def search(self, query: str) -> list[dict]:
+        """
+        Возвращает транзакции, подходящие под запрос, в исходном порядке.
+
+        :param query: строка-запрос или регулярное выражение
+        :return: список транзакций
+        """
+        return [self.transactions[position] for position in self.search_positions(query)]
+
+
+DESCRIPTION_KEYS = ("Описание", "описании")
+FEATURE_PATTERNS = {
+    "phone": (r"\+\d{1} \d{3} \d{2,3}(?:-\d{2}){2}", "values"),
+    "person_transfer": (r"[А-ЯЁ]{1}[а-яё]* [А-ЯЁ]{1}\.", "description"),
+}
+FEATURES_PATTERN = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, (pattern, _) in FEATURE_PATTERNS.items()), flags=re.IGNORECASE
+)
+
+
+def description(transaction: dict) -> str:
+    """
+    Функция возвращает описание транзакции (поле "Описание" или "описании").
+
+    :param transaction: транзакция
+    :return: описание или пустая строка
+    """
+    for key in DESCRIPTION_KEYS:
+        if key in transaction:
+            return str(transaction[key])
+    return ""
+
+
+def classify(transaction: dict) -> frozenset[str]:
+    """
+    Функция за один проход объединенного регулярного выражения находит все признаки транзакции
+    из FEATURE_PATTERNS. Признаки с областью "description" ищутся только в описании,
+    с областью "values" - во всех значениях транзакции.
+
+    :param transaction: транзакция
+    :return: множество названий найденных признаков
+    """
+    transaction_description = description(transaction)
+    other_values = FIELD_SEPARATOR.join(
+        str(value) for key, value in transaction.items() if key not in DESCRIPTION_KEYS
+    )
+    text = transaction_description + FIELD_SEPARATOR + other_values
+    tags: set[str] = set()
+    for match in FEATURES_PATTERN.finditer(text):
+        name = match.lastgroup or ""
+        if FEATURE_PATTERNS[name][1] == "values" or match.start() < len(transaction_description):
+            tags.add(name)
+    return frozenset(tags)
+
+
+_cache: OrderedDict[tuple[str, str], Any] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def cached_for_key(kind: str, key: Optional[str], builder: Callable[[], T]) -> T:
+    """
+    Функция возвращает данные, построенные функцией builder, из кэша по ключу (kind, key).
+    В кэше не больше CACHE_SIZE результатов, давно не использованные вытесняются.
+    Ключ - отпечаток данных хранилища (см. src.store.owned_fingerprint): такие данные не изменяются.
+    Без ключа (key=None) данные строятся при каждом вызове, потому что транзакции могли измениться на месте.
+
+    :param kind: вид данных
+    :param key: отпечаток транзакций или None
+    :param builder: функция построения данных
+    :return: построенные данные
+    """
+    if key is None:
+        return builder()
+    with _cache_lock:
+        if (kind, key) in _cache:
+            _cache.move_to_end((kind, key))
+            cached: T = _cache[(kind, key)]
+            return cached
+    built = builder()
+    with _cache_lock:
+        _cache[(kind, key)] = built
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return built
+
+
+def get_search_index(transactions: list[dict]) -> SearchIndex:
+    """
+    Функция возвращает индекс для списка транзакций. Для транзакций хранилища (TransactionStore.records)
+    триграммный индекс строится один раз (см. cached_for_key), для остальных - индекс без триграмм на один запрос.
+
+    :param transactions: транзакции в формате списка словарей
+    :return: индекс
+    """
+    key = owned_fingerprint(transactions)
+    if key is None:
+        return SearchIndex(transactions, indexed=False)
+    return cached_for_key("index", key, lambda: SearchIndex(transactions))
+
+
+def get_transaction_tags(transactions: list[dict]) -> list[frozenset[str]]:
+    """
+    Функция возвращает признаки каждой транзакции (см. classify). Для транзакций хранилища
+    (TransactionStore.records) признаки переиспользуются (см. cached_for_key), для остальных - считаются заново.
+
+    :param transactions: транзакции в формате списка словарей
+    :return: список множеств признаков
+    """
+    return cached_for_key(
+        "tags", owned_fingerprint(transactions), lambda: [classify(transaction) for transaction in transactions]
+    )
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+import threading
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Optional
+
+from src.config import env
+from src.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+JSON_INDENT = 4
+JSON_MODES = ("pretty", "compact")
+JSON_BACKENDS = ("json", "orjson")
+
+json_mode: Optional[str] = None
+json_backend: Optional[str] = None
+
+_orjson: Any = None
+_orjson_checked = False
+_orjson_lock = threading.Lock()
+
+
+def json_settings() -> dict[str, str]:
+    """
+    Функция возвращает настройки JSON-ответов: режим (pretty - с отступами для чтения человеком,
+    compact - без пробелов) и кодировщик (json - стандартная библиотека, orjson - если установлен).
+    Значения берутся из переменных модуля json_mode, json_backend или из окружения JSON_MODE, JSON_BACKEND.
+
+    :return: словарь с mode и backend
+    """
+    mode = json_mode or env("JSON_MODE", "pretty") or "pretty"
+    backend = json_backend or env("JSON_BACKEND", "json") or "json"
+    if mode not in JSON_MODES:
+        raise ValueError(f"неизвестный режим JSON: {mode}")
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"неизвестный кодировщик JSON: {backend}")
+    return {"mode": mode, "backend": backend}
+
+
+def json_default(value: Any) -> Any:
+    """
+    Функция переводит значения, которые стандартный json не кодирует, в типы Python:
+    скаляры и массивы NumPy, Timestamp и даты (ISO 8601), пропуски pandas (NaT, NA) - None.
+
+    :param value: значение
+    :return: значение, которое можно закодировать в JSON
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _get_orjson() -> Any:
+    """Модуль orjson или None, если он не установлен (предупреждение пишется в лог один раз)."""
+    global _orjson, _orjson_checked
+    with _orjson_lock:
+        if not _orjson_checked:
+            _orjson_checked = True
+            try:
+                import orjson
+
+                _orjson = orjson
+            except ImportError:
+                logger.warning("orjson не установлен, используется стандартный json")
+        return _orjson
+
+
+def dumps(data: Any, mode: Optional[str] = None, backend: Optional[str] = None) -> str:
+    """
+    Функция кодирует данные в JSON-строку (кириллица не экранируется).
+    pretty - отступы по JSON_INDENT, как раньше возвращали все функции; compact - без пробелов
+    и через C-кодировщик стандартной библиотеки, что в несколько раз быстрее на больших результатах поиска.
+    С кодировщиком orjson pretty дает отступ в 2 пробела, а NaN кодируется как null.
+
+    :param data: данные
+    :param mode: режим pretty или compact, по умолчанию из json_settings
+    :param backend: кодировщик json или orjson, по умолчанию из json_settings
+    :return: JSON-строка
+    """
+    settings = json_settings()
+    mode = mode or settings["mode"]
+    backend = backend or settings["backend"]
+    orjson = _get_orjson() if backend == "orjson" else None
+    if orjson is not None:
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if mode == "pretty":
+            options |= orjson.OPT_INDENT_2
+        encoded: str = orjson.dumps(data, default=json_default, option=options).decode("utf-8")
+        return encoded
+    if mode == "pretty":
+        return json.dumps(data, ensure_ascii=False, indent=JSON_INDENT, default=json_default)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=json_default)
+
+
+def frame_to_json(df: pd.DataFrame, mode: Optional[str] = None) -> str:
+    """
+    Функция кодирует DataFrame в JSON-список записей (pandas.DataFrame.to_json) в выбранном режиме.
+
+    :param df: DataFrame
+    :param mode: режим pretty или compact, по умолчанию из json_settings
+    :return: JSON-строка
+    """
+    mode = mode or json_settings()["mode"]
+    encoded: str = df.to_json(orient="records", force_ascii=False, indent=JSON_INDENT if mode == "pretty" else None)
+    return encoded
@@ -0,0 +1,411 @@
+"""
+Локальный HTTP-сервер панели (asyncio, только стандартная библиотека): держит в памяти транзакции
+(TransactionStore) и кэш рыночных данных (MarketDataCache) и отвечает JSON на запросы:
+
+    GET /                     главная страница (?date=YYYY-MM-DD HH:MM:SS, по умолчанию текущее время)
+    GET /reports/category     траты по категории (?category=...&date=dd.mm.YYYY)
+    GET /reports/weekday      средние траты по дням недели (?date=dd.mm.YYYY)
+    GET /reports/workday      средние траты в рабочий и выходной день (?date=dd.mm.YYYY)
+    GET /services/search      простой поиск (?query=...)
+    GET /services/phones      транзакции с номерами телефонов
+    GET /services/persons     переводы физлицам
+    GET /services/investment  «Инвесткопилка» (?month=YYYY-MM&limit=50)
+    GET /services/cashback    выгодные категории кешбэка (?year=2021&month=12)
+    GET /metrics              время этапов (см. src.metrics) в JSON или ?format=prometheus - в формате Prometheus
+
+Запросы обрабатываются конкурентно: расчеты выполняются в пуле потоков, цикл событий не блокируется.
+При изменении файла операций данные перезагружаются в фоне, а запросы до замены хранилища
+обслуживаются по прежним данным.
+
+Запуск: python -m src.server [--host 127.0.0.1] [--port 8000] [--reload-interval 2] [--json-mode compact] [--metrics]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import logging
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any
+from typing import Callable
+from typing import Optional
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+import src.metrics
+import src.serializers
+from src.config import env
+from src.config import setup
+from src.market_cache import MarketDataCache
+from src.market_cache import get_cached_market_data
+from src.market_cache import get_market_cache
+from src.metrics import PROMETHEUS_CONTENT_TYPE
+from src.metrics import metrics_prometheus
+from src.metrics import metrics_snapshot
+from src.metrics import timed
+from src.reports import DATE_FORMAT
+from src.reports import spending_by_category
+from src.reports import spending_by_weekday
+from src.reports import spending_by_workday
+from src.serializers import JSON_MODES
+from src.serializers import dumps
+from src.serializers import frame_to_json
+from src.services import investment_bank
+from src.services import raised_cashback_for_categories
+from src.services import search_by_name
+from src.services import search_by_phonenumber
+from src.services import simple_search
+from src.store import TransactionStore
+from src.views import get_page_main_datas
+
+logger = logging.getLogger(__name__)
+
+RELOAD_INTERVAL = 2.0
+WORKERS = 8
+MAX_REQUEST_LINE = 8192
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+MAIN_PAGE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+Params = dict[str, str]
+Handler = Callable[[TransactionStore, MarketDataCache, Params], str]
+
+
+class BadRequest(ValueError):
+    """Ошибка в параметрах запроса (ответ 400)."""
+
+
+class PlainText(str):
+    """Тело ответа не в JSON, а в формате Prometheus (PROMETHEUS_CONTENT_TYPE)."""
+
+
+def _param(params: Params, name: str, default: Optional[str] = None) -> str:
+    """Значение параметра запроса или default; без значения по умолчанию параметр обязателен."""
+    value = params.get(name, default)
+    if value is None:
+        raise BadRequest(f"не передан параметр {name}")
+    return value
+
+
+def _int_param(params: Params, name: str, default: Optional[str] = None) -> int:
+    """Целочисленный параметр запроса."""
+    value = _param(params, name, default)
+    try:
+        return int(value)
+    except ValueError:
+        raise BadRequest(f"параметр {name} должен быть целым числом: {value}")
+
+
+def _date_param(params: Params, name: str, date_format: str) -> Optional[str]:
+    """Необязательный параметр запроса с датой в формате date_format (None, если не передан или пустой)."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        datetime.datetime.strptime(value, date_format)
+    except ValueError:
+        raise BadRequest(f"параметр {name} должен быть датой в формате {date_format}: {value}")
+    return value
+
+
+def main_page(store: TransactionStore, market_cache: MarketDataCache, params: Params) -> str:
+    """Главная страница (см. get_page_main_datas)."""
+    date = _date_param(params, "date", MAIN_PAGE_DATE_FORMAT) or datetime.datetime.now().strftime(
+        MAIN_PAGE_DATE_FORMAT
+    )
+    return get_page_main_datas(date, store, market_cache)
+
+
+def category_report(store: TransactionStore, market_cache: MarketDataCache, params: Params) -> str:
+    """Траты по категории за три месяца (см. spending_by_category) в виде списка записей."""
+    df = spending_by_category(store.frame, _param(params, "category"), _date_param(params, "date", DATE_FORMAT))
+    return frame_to_json(df)
+
+
+def weekday_report(store: TransactionStore, market_cache: MarketDataCache, params: Params) -> str:
+    """Средние траты по дням недели (см. spending_by_weekday)."""
+    body: str = spending_by_weekday(store.rollup, _date_param(params, "date", DATE_FORMAT))
+    return body
+
+
+def workday_report(store: TransactionStore, market_cache: MarketDataCache, params: Params) -> str:
+    """Средние траты в рабочий и выходной день (см. spending_by_workday)."""
+    body: str = spending_by_workday(store.rollup, _date_param(params, "date", DATE_FORMAT))
+    return body
+
+
+def search(store: TransactionStore, market_cache: MarketDataCache, params: Params) -> str:
+    """Простой поиск по транзакциям (см. simple_search)."""
+    return simple_search(_param(params, "query"), store.records) or "[]"
+
+
+def phones(store: TransactionStore, market_cache: MarketDataCache, params: Params) -> str:
+    """Транзакции с номерами телефонов (см. search_by_phonenumber)."""
+    return search_by_phonenumber(store.records)
+
+
+def persons(store: TransactionStore, market_cache: MarketDataCache, params: Params) -> str:
+    """Переводы физлицам (см. search_by_name)."""
+    return search_by_name(store.records) or "[]"
+
+
+def investment(store: TransactionStore, market_cache: MarketDataCache, params: Params) -> str:
+    """Сумма для «Инвесткопилки» за месяц (см. investment_bank)."""
+    month = _param(params, "month")
+    limit = _int_param(params, "limit", "50")
+    return dumps({"month": month, "limit": limit, "amount": investment_bank(month, store.frame, limit)})
+
+
+def cashback(store: TransactionStore, market_cache: MarketDataCache, params: Params) -> str:
+    """Кешбэк по категориям за месяц (см. raised_cashback_for_categories)."""
+    return raised_cashback_for_categories(store.rollup, _int_param(params, "year"), _int_param(params, "month"))
+
+
+def metrics(store: TransactionStore, market_cache: MarketDataCache, params: Params) -> str:
+    """Время этапов (см. metrics_snapshot) или ?format=prometheus (см. metrics_prometheus)."""
+    output_format = params.get("format", "json")
+    if output_format == "prometheus":
+        return PlainText(metrics_prometheus())
+    if output_format != "json":
+        raise BadRequest(f"неизвестный формат метрик: {output_format}")
+    return dumps(metrics_snapshot())
+
+
+ROUTES: dict[str, Handler] = {
+    "/": main_page,
+    "/reports/category": category_report,
+    "/reports/weekday": weekday_report,
+    "/reports/workday": workday_report,
+    "/services/search": search,
+    "/services/phones": phones,
+    "/services/persons": persons,
+    "/services/investment": investment,
+    "/services/cashback": cashback,
+    "/metrics": metrics,
+}
+
+
+class DashboardServer:
+    """
+    Сервер панели: загружает транзакции и рыночные данные при запуске (start) и держит их в памяти.
+    Расчеты выполняются в собственном пуле из workers потоков. С compact в памяти хранится только
+    компактный frame (см. compact_frame, TransactionStore), без исходного DataFrame.
+    Фоновая задача каждые reload_interval секунд проверяет файл операций (TransactionStore.is_stale);
+    новое хранилище загружается в потоке и подменяет текущее целиком, поэтому запросы никогда
+    не видят частично загруженные данные.
+    """
+
+    def __init__(
+        self,
+        filename: str = "operations",
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        reload_interval: float = RELOAD_INTERVAL,
+        cache_dir: Optional[str] = None,
+        market_cache: Optional[MarketDataCache] = None,
+        workers: int = WORKERS,
+        compact: bool = False,
+    ) -> None:
+        self.filename = filename
+        self.host = host
+        self.port = port
+        self.reload_interval = reload_interval
+        self.cache_dir = cache_dir
+        self.market_cache = market_cache or get_market_cache()
+        self.store: Optional[TransactionStore] = None
+        self.reloads = 0
+        self.workers = workers
+        self.compact = compact
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._watcher: Optional[asyncio.Task] = None
+
+    def _load_store(self) -> TransactionStore:
+        """
+        Загружает хранилище и заранее строит все производные данные (frame, records, rollup);
+        с compact records не хранятся в хранилище и заранее не строятся.
+        """
+        store = TransactionStore(self.filename, self.cache_dir, self.compact).load()
+        if not self.compact:
+            store.records
+        store.rollup
+        return store
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Выполняет функцию в пуле потоков сервера, не блокируя цикл событий."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def start(self) -> "DashboardServer":
+        """
+        Загружает данные, получает рыночные данные и начинает принимать соединения.
+
+        :return: сервер
+        """
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dashboard")
+        self.store = await self._run(self._load_store)
+        await self._run(get_cached_market_data, self.market_cache)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.reload_interval > 0:
+            self._watcher = asyncio.create_task(self._watch())
+        logger.info(f"сервер запущен на http://{self.host}:{self.port}")
+        return self
+
+    async def reload(self) -> bool:
+        """
+        Перезагружает данные, если файл операций изменился. При ошибке чтения (например, файл еще
+        записывается) остаются прежние данные, а перезагрузка повторяется при следующей проверке.
+
+        :return: True, если хранилище заменено
+        """
+        if self.store is None or not self.store.is_stale():
+            return False
+        try:
+            store = await self._run(self._load_store)
+            if store.frame.empty:
+                raise ValueError(f"в файле {store.source_file} нет транзакций")
+        except Exception as ex:
+            logger.error(f"Ошибка перезагрузки транзакций: {ex}")
+            return False
+        self.store = store
+        self.reloads += 1
+        logger.info(f"транзакции перезагружены: {store.version}")
+        return True
+
+    async def _watch(self) -> None:
+        """Периодически проверяет файл операций и перезагружает данные."""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await self.reload()
+
+    async def close(self) -> None:
+        """Останавливает прием соединений и фоновую проверку файла."""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        logger.info("сервер остановлен")
+
+    async def serve_forever(self) -> None:
+        """Обслуживает запросы до отмены задачи."""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()  # type: ignore[union-attr]
+        finally:
+            await self.close()
+
+    async def dispatch(self, method: str, target: str) -> tuple[HTTPStatus, str]:
+        """
+        Выполняет запрос: обработчик маршрута запускается в пуле потоков с текущим хранилищем.
+        При включенных метриках время ответа записывается как этап server.<обработчик>.
+
+        :param method: метод HTTP
+        :param target: путь запроса с параметрами
+        :return: статус и тело ответа (JSON)
+        """
+        url = urlsplit(target)
+        handler = ROUTES.get(url.path.rstrip("/") or "/")
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, dumps({"error": f"нет маршрута {url.path}"})
+        if method != "GET":
+            return HTTPStatus.METHOD_NOT_ALLOWED, dumps({"error": "разрешен только GET"})
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            with timed(f"server.{handler.__name__}"):
+                body = await self._run(handler, self.store, self.market_cache, params)
+            return HTTPStatus.OK, body
+        except BadRequest as ex:
+            return HTTPStatus.BAD_REQUEST, dumps({"error": str(ex)})
+        except Exception as ex:
+            logger.error(f"Ошибка обработки запроса {target}: {ex}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, dumps({"error": "внутренняя ошибка"})
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Читает один запрос HTTP/1.1 из соединения, отвечает и закрывает соединение.
+        На строку запроса или заголовок длиннее лимита StreamReader (readline - ValueError) отвечает 400.
+        """
+        try:
+            try:
+                request_line = await reader.readline()
+                while (await reader.readline()).strip():
+                    pass
+            except ValueError as ex:
+                logger.error(f"Ошибка чтения запроса: {ex}")
+                request_line = b""
+            parts = request_line.decode("latin-1").split()
+            if len(request_line) > MAX_REQUEST_LINE or len(parts) != 3:
+                status, body = HTTPStatus.BAD_REQUEST, dumps({"error": "некорректный запрос"})
+            else:
+                status, body = await self.dispatch(parts[0], parts[1])
+            data = body.encode("utf-8")
+            head = (
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {PROMETHEUS_CONTENT_TYPE if isinstance(body, PlainText) else JSON_CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(head.encode("latin-1") + data)
+            await writer.drain()
+            logger.info(f"{request_line.decode('latin-1').strip()} {status.value}")
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as ex:
+            logger.error(f"Ошибка соединения: {ex}")
+        finally:
+            writer.close()
+
+
+async def run(server: DashboardServer) -> None:
+    """
+    Функция запускает сервер и останавливает его по SIGINT/SIGTERM.
+
+    :param server: сервер панели
+    """
+    await server.start()
+    task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signal_number, task.cancel)  # type: ignore[union-attr]
+        except (NotImplementedError, RuntimeError):
+            pass
+    try:
+        await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=env("SERVER_HOST", "127.0.0.1"), help="адрес сервера")
+    parser.add_argument("--port", type=int, default=int(env("SERVER_PORT", "8000") or 8000), help="порт сервера")
+    parser.add_argument("--filename", default="operations", help="имя файла операций в папке data без расширения")
+    parser.add_argument(
+        "--reload-interval", type=float, default=RELOAD_INTERVAL, help="период проверки файла операций, 0 - выкл"
+    )
+    parser.add_argument("--json-mode", choices=JSON_MODES, help="формат ответов, по умолчанию JSON_MODE или pretty")
+    parser.add_argument("--metrics", action="store_true", help="записывать время этапов (ответ /metrics)")
+    parser.add_argument("--compact", action="store_true", help="хранить только компактный frame (compact_frame)")
+    args = parser.parse_args()
+    setup("server")
+    if args.json_mode:
+        src.serializers.json_mode = args.json_mode
+    if args.metrics:
+        src.metrics.metrics_enabled = True
+    asyncio.run(run(DashboardServer(args.filename, args.host, args.port, args.reload_interval, compact=args.compact)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,133 @@
-import json
+from __future__ import annotations
+
 import logging
-import os
-import re
-from pathlib import Path
+from json import JSONDecodeError
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import Dict
+from typing import Iterable
 from typing import List
+from typing import Sequence
+from typing import Union
+
+from src.aggregates import AggregateEngine
+from src.aggregates import MonthlyCashback
+from src.lazy import lazy_import
+from src.logging_utils import lazy_repr
+from src.metrics import instrument
+from src.rollup import MonthlyRollup
+from src.search_index import cached_for_key
+from src.search_index import get_search_index
+from src.search_index import get_transaction_tags
+from src.serializers import dumps
+from src.store import DATE_FORMATS
+from src.store import date_window
+from src.store import owned_fingerprint
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
 
-import pandas as pd
-from black import JSONDecodeError
 
-directory_name = Path(__file__).resolve().parent.parent
-log_path = os.path.join(directory_name, "logs", "services.log")
+def _build_cashback_by_month(transactions: Union[list[dict], pd.DataFrame]) -> dict[tuple[int, int], dict[str, float]]:
+    """Один проход groupby по (год, месяц, категория) для cashback_by_month."""
+    df = transactions if isinstance(transactions, pd.DataFrame) else pd.DataFrame(transactions)
+    if len(df) == 0:
+        return {}
+    return MonthlyCashback().update(df).result()
 
-logging.basicConfig(
-    filename=log_path,
-    format="%(asctime)s - %(filename)s - %(levelname)s:  %(message)s",
-    filemode="w",
-    level=logging.DEBUG,
-    encoding="utf-8",
-)
 
-logger = logging.getLogger()
+def cashback_by_month(
+    transactions: Union[list[dict], pd.DataFrame, AggregateEngine],
+) -> dict[tuple[int, int], dict[str, float]]:
+    """
+    Анализ кешбэка (1%) по категориям сразу для всех месяцев за один проход groupby.
+    Категории "Наличные" и "Пополнения" не учитываются. Для транзакций хранилища
+    (TransactionStore.frame, raw или records) результат переиспользуется (см. cached_for_key).
+
+    :param transactions: Данные с транзакциями (список словарей или DataFrame, например TransactionStore.frame)
+        или движок агрегатов (AggregateEngine), который хранит готовые суммы, или кубы по месяцам (MonthlyRollup)
+    :return: словарь (год, месяц) - {категория: кешбэк}, категории в порядке появления в месяце
+    """
+    if isinstance(transactions, (AggregateEngine, MonthlyRollup)):
+        return transactions.cashback_by_month()
+    return cached_for_key("cashback", owned_fingerprint(transactions), lambda: _build_cashback_by_month(transactions))
 
 
-def raised_cashback_for_categories(transactions: list[dict], year: int, month: int) -> str:
+def cashback_by_month_from_chunks(chunks: Iterable[pd.DataFrame]) -> dict[tuple[int, int], dict[str, float]]:
+    """
+    Анализ кешбэка по категориям для всех месяцев (как cashback_by_month) по частям транзакций,
+    например из потокового чтения src.ingest.iter_chunks; в памяти одновременно только одна часть.
+
+    :param chunks: части DataFrame с транзакциями
+    :return: словарь (год, месяц) - {категория: кешбэк}
+    """
+    cashback = MonthlyCashback()
+    for chunk in chunks:
+        cashback.update(chunk)
+    return cashback.result()
+
+
+def cashback_table(transactions: Union[list[dict], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Таблица кешбэка: строки - (год, месяц), столбцы - категории. Пустые ячейки - NaN.
+    Без транзакций - пустая таблица с тем же индексом.
+
+    :param transactions: Данные с транзакциями (список словарей или DataFrame)
+    :return: DataFrame с кешбэком по месяцам и категориям
+    """
+    cashback = cashback_by_month(transactions)
+    if not cashback:
+        return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=["year", "month"]))
+    table = pd.DataFrame.from_dict(cashback, orient="index")
+    table.index = pd.MultiIndex.from_tuples(table.index, names=["year", "month"])
+    return table
+
+
+@instrument()
+def raised_cashback_for_categories(
+    transactions: Union[list[dict], pd.DataFrame, AggregateEngine], year: int, month: int
+) -> str:
     """
     Анализирует сколько на каждой категории можно заработать кэшбэка, данном месяце году,
      если процент кешбэк 1%. И вернет  JSON с анализом, сколько на каждой категории можно заработать кэшбэка:
      {"Категория 1": 1000, "Категория 2": 2000, "Категория 3": 500}
+     Данные берутся из общего анализа по всем месяцам (cashback_by_month).
 
-    :param transactions: Данные с транзакциями;
+    :param transactions: Данные с транзакциями (список словарей или DataFrame, например TransactionStore.frame);
     :param year:год, за который проводится анализ;
     :param month: месяц, за который проводится анализ.
     :return: JSON с анализом, сколько на каждой категории можно заработать кешбэка.
     """
     try:
-        logger.info("фильтрация данных")
-        df = pd.DataFrame(transactions)
-        df["Дата операции"] = pd.to_datetime(df["Дата операции"], format="%d.%m.%Y %H:%M:%S")
-        filtered_df = df[(df["Дата операции"].dt.year == year) & (df["Дата операции"].dt.month == month)]
-        categories = filtered_df["Категория"].dropna().unique()
-        logger.info(f"получение категории: {categories}")
-        sum_amount_by_category = filtered_df.groupby("Категория")["Сумма операции с округлением"].sum()
-        datas = {}
-        for category in categories:
-            if category in ["Наличные", "Пополнения"]:
-                continue
-            datas[category] = round(float(sum_amount_by_category[category]) / 100, 2)
-        return json.dumps(datas, ensure_ascii=False, indent=4)
+        logger.info("получение кешбэка за месяц")
+        datas = cashback_by_month(transactions).get((year, month), {})
+        logger.info("получение категории: %s", lazy_repr(list(datas)))
+        return dumps(datas)
     except (ValueError, KeyError, TypeError, JSONDecodeError) as ex:
         logger.error(f"Ошибка получение JSON с анализом  кешбэка: {ex}")
         return ""
 
 
-def investment_bank(month: str, transactions: List[Dict[str, Any]], limit: int) -> float:
+def _operation_months(dates: pd.Series) -> pd.Series:
+    """
+    Месяцы 'YYYY-MM' дат операций: для datetime64 и строк в формате выгрузки банка
+    (DATE_FORMATS["Дата операции"], например '31.12.2021 16:44:00') - по разобранной дате,
+    для остальных строк - первые 7 символов ('YYYY-MM-DD'), как в investment_bank. Без даты - NaN.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.dt.strftime("%Y-%m")
+    parsed = pd.to_datetime(dates, format=DATE_FORMATS["Дата операции"], errors="coerce")
+    return parsed.dt.strftime("%Y-%m").where(parsed.notna(), dates.astype(str).str[:7].where(dates.notna()))
+
+
+@instrument()
+def investment_bank(month: str, transactions: Union[List[Dict[str, Any]], pd.DataFrame], limit: int) -> float:
     """
     Можно задать комфортный порог округления: 10, 50 или 100 ₽.
     Траты будут округляться, и разница между фактической суммой трат по карте и
@@ -64,6 +137,8 @@ def investment_bank(month: str, transactions: List[Dict[str, Any]], limit: int)
     :param transactions: список словарей, содержащий информацию о транзакциях, в которых содержатся следующие поля:
     Дата операции— дата, когда произошла транзакция (строка в формате 'YYYY-MM-DD').
     Сумма операции— сумма транзакции в оригинальной валюте (число).
+    Также можно передать DataFrame: с разобранными датами (TransactionStore.frame) транзакции месяца
+    выбираются бинарным поиском по датам (см. date_window), со строками - по месяцу даты, как в investment_bank_matrix.
     :param limit: предел, до которого нужно округлять суммы операций (целое число).
     :return: сумму, которую удалось бы отложить в «Инвесткопилку»
     """
@@ -73,6 +148,16 @@ def investment_bank(month: str, transactions: List[Dict[str, Any]], limit: int)
         divider = 10
         if limit > 10:
             divider = 100
+        if isinstance(transactions, pd.DataFrame):
+            dates = transactions["Дата операции"]
+            if pd.api.types.is_datetime64_any_dtype(dates):
+                month_start = pd.Timestamp(month + "-01")
+                month_end = month_start + pd.offsets.MonthBegin(1) - pd.Timedelta(1, "ns")
+                amounts = date_window(transactions, "Дата операции", month_start, month_end)["Сумма операции"]
+            else:
+                amounts = transactions["Сумма операции"][(_operation_months(dates) == month).to_numpy()]
+            savings = limit - np.mod(amounts.to_numpy(dtype=float), divider)
+            return round(float(savings[(savings > 0) & (savings < limit)].sum()), 2)
         investments = [
             (limit - (tr["Сумма операции"] % divider))
             for tr in transactions
@@ -80,15 +165,61 @@ def investment_bank(month: str, transactions: List[Dict[str, Any]], limit: int)
         ]
         return round(float(sum(investments)), 2)
 
-    except (KeyError, AssertionError, TypeError) as ex:
+    except (KeyError, AssertionError, TypeError, ValueError) as ex:
         logger.error(f"Ошибка получение  сумму, которую нужно отложить в «Инвесткопилку»: {ex}")
         return 0.00
 
 
+def investment_bank_matrix(
+    transactions: Union[List[Dict[str, Any]], pd.DataFrame], limits: Sequence[int] = (10, 50, 100)
+) -> pd.DataFrame:
+    """
+    Векторный расчет «Инвесткопилки» сразу для всех месяцев и всех порогов округления.
+    Правила те же, что у investment_bank: делитель 10 для порога 10 и 100 для больших порогов,
+    в копилку попадает limit - (сумма % делитель), если это значение строго между 0 и limit.
+    Месяц - 'YYYY-MM' для разобранных дат и для строк в формате выгрузки банка
+    (DATE_FORMATS["Дата операции"], например '31.12.2021 16:44:00'), для остальных строк - первые 7 символов
+    ('YYYY-MM-DD'), как в investment_bank.
+
+    :param transactions: список словарей или DataFrame (например, TransactionStore.frame)
+    с полями Дата операции и Сумма операции.
+    :param limits: пороги округления.
+    :return: DataFrame: строки - месяцы, столбцы - пороги, значения - отложенные суммы
+    """
+    try:
+        logger.info("Округление трат по всем месяцам и порогам")
+        df = transactions if isinstance(transactions, pd.DataFrame) else pd.DataFrame(transactions)
+        months = _operation_months(df["Дата операции"])
+        codes, unique_months = pd.factorize(months, sort=True)
+        amounts = df["Сумма операции"].to_numpy(dtype=float)
+        limits_array = np.asarray(limits, dtype=float)
+        dividers = np.where(limits_array > 10, 100.0, 10.0)
+        savings = limits_array[np.newaxis, :] - np.mod(amounts[:, np.newaxis], dividers[np.newaxis, :])
+        mask = (savings > 0) & (savings < limits_array[np.newaxis, :]) & (codes >= 0)[:, np.newaxis]
+        matrix = np.column_stack(
+            [
+                np.bincount(
+                    codes[mask[:, column]], weights=savings[mask[:, column], column], minlength=len(unique_months)
+                )
+                for column in range(len(limits_array))
+            ]
+        )
+        return pd.DataFrame(
+            matrix.round(2), index=pd.Index(unique_months, name="month"), columns=pd.Index(list(limits), name="limit")
+        )
+    except (KeyError, AssertionError, TypeError, ValueError) as ex:
+        logger.error(f"Ошибка получение сумм для «Инвесткопилки»: {ex}")
+        return pd.DataFrame()
+
+
+@instrument()
 def simple_search(query: str, transactions: list[dict]) -> str:
     """
     Функция принимает строку — запрос  для поиска и транзакции в формате списка словарей.
     Функция  корректный JSON - ответ с транзакциями.
+    Поиск идет только по значениям транзакций: подстрока для транзакций хранилища (TransactionStore.records)
+    ищется по триграммному индексу, для остальных - перебором, регулярное выражение - по значениям
+    (см. SearchIndex, get_search_index).
 
     :param query: Строку-запрос для поиска
     :param transactions: транзакции в формате списка словарей
@@ -96,17 +227,17 @@ def simple_search(query: str, transactions: list[dict]) -> str:
     """
     try:
         logger.info("Поиск транзакции")
-        pattern = rf"{query}"
-        results = [trans for trans in transactions if re.search(pattern, str(trans), flags=re.IGNORECASE)]
+        results = get_search_index(transactions).search(query)
         if not results:
             raise Exception
-        logger.info(f"Получение транзакции:  {results}")
-        return json.dumps(results, ensure_ascii=False, indent=4)
+        logger.info("Получение транзакции:  %s", lazy_repr(results))
+        return dumps(results)
     except Exception as ex:
         logger.error(f"Ошибка получение транзакции : {ex}")
         return ""
 
 
+@instrument()
 def search_by_phonenumber(transactions: list[dict]) -> str:
     """
     Функция возвращает JSON со всеми транзакциями,
@@ -117,13 +248,13 @@ def search_by_phonenumber(transactions: list[dict]) -> str:
     """
 
     logger.info("Поиск транзакции по номеу телефона")
-    pattern = r"\+\d{1} \d{3} \d{2,3}(-\d{2}){2}"
-
-    results = [trans for trans in transactions if re.search(pattern, str(trans), flags=re.IGNORECASE)]
-    logger.info(f"Получение транзакции:  {results}")
-    return json.dumps(results, ensure_ascii=False, indent=4)
+    tags = get_transaction_tags(transactions)
+    results = [trans for trans, trans_tags in zip(transactions, tags) if "phone" in trans_tags]
+    logger.info("Получение транзакции:  %s", lazy_repr(results))
+    return dumps(results)
 
 
+@instrument()
 def search_by_name(transactions: list[dict]) -> str:
     """
     Функция принимает транзакции в формате списка словарей и возвращает JSON со всеми транзакциями,
@@ -135,16 +266,15 @@ def search_by_name(transactions: list[dict]) -> str:
     :return: JSON со всеми транзакциями, которые относятся к переводам физ лицам
     """
     try:
-        logger.info("Поиск транзакции по номеу телефона")
-        pattern = r"[А-ЯЁ]{1}[а-яё]* [А-ЯЁ]{1}\."
-
+        logger.info("Поиск транзакции переводов физлицам")
+        tags = get_transaction_tags(transactions)
         results = [
             trans
-            for trans in transactions
-            if (trans["Категория"] == "Переводы") and (re.search(pattern, trans["описании"], flags=re.IGNORECASE))
+            for trans, trans_tags in zip(transactions, tags)
+            if (trans["Категория"] == "Переводы") and ("person_transfer" in trans_tags)
         ]
-        logger.info(f"Получение транзакции:  {results}")
-        return json.dumps(results, ensure_ascii=False, indent=4)
+        logger.info("Получение транзакции:  %s", lazy_repr(results))
+        return dumps(results)
     except (JSONDecodeError, ValueError, TypeError, AssertionError, KeyError) as ex:
         logger.error(f"Ошибка получение транзакции : {ex}")
         return ""
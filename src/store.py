@@ -0,0 +1,509 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import threading
+import weakref
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Optional
+from typing import Union
+
+from src.cache import load_or_build
+from src.cache import source_key
+from src.lazy import lazy_import
+from src.metrics import instrument
+from src.utils import read_excel_cached
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+directory_name = Path(__file__).resolve().parent.parent
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMATS = {"Дата операции": "%d.%m.%Y %H:%M:%S", "Дата платежа": "%d.%m.%Y"}
+CATEGORY_COLUMNS = ["Категория", "Номер карты"]
+SORT_COLUMN = "Дата операции"
+USED_COLUMNS = [
+    "Дата операции",
+    "Дата платежа",
+    "Номер карты",
+    "Сумма операции",
+    "Сумма платежа",
+    "Категория",
+    "Описание",
+    "Бонусы (включая кэшбэк)",
+    "Сумма операции с округлением",
+]
+CATEGORY_MAX_RATIO = 0.5
+
+
+@instrument()
+def to_typed_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Функция приводит столбцы DataFrame с транзакциями к типам:
+    даты - datetime64, категории и номера карт - category (номер карты хранится как компактный код).
+    Исходный DataFrame не изменяется.
+
+    :param df: DataFrame с транзакциями, как его возвращает read_excel
+    :return: DataFrame с типизированными столбцами
+    """
+    typed = df.copy()
+    for column, date_format in DATE_FORMATS.items():
+        if column in typed and not pd.api.types.is_datetime64_any_dtype(typed[column]):
+            typed[column] = pd.to_datetime(typed[column], format=date_format)
+    for column in CATEGORY_COLUMNS:
+        if column in typed:
+            typed[column] = typed[column].astype("category")
+    return typed
+
+
+def compact_frame(
+    df: pd.DataFrame, drop_unused: bool = True, category_max_ratio: float = CATEGORY_MAX_RATIO
+) -> pd.DataFrame:
+    """
+    Функция уменьшает память DataFrame с транзакциями без потери значений:
+    строковые столбцы с малым числом разных значений (не больше category_max_ratio от числа строк) -
+    category, целые числа - наименьший целый тип, дробные - float32, если значения в нем точно представимы
+    (суммы с копейками остаются float64). Столбцы, которые не читают utils, services, reports и views
+    (все, кроме USED_COLUMNS), с drop_unused удаляются. Исходный DataFrame не изменяется.
+
+    :param df: DataFrame с транзакциями (например, результат to_typed_frame)
+    :param drop_unused: удалить неиспользуемые столбцы
+    :param category_max_ratio: наибольшая доля разных значений для перевода строкового столбца в category
+    :return: компактный DataFrame
+    """
+    columns = [column for column in df.columns if not drop_unused or column in USED_COLUMNS]
+    compact = df[columns].copy()
+    for column in columns:
+        values = compact[column]
+        if values.dtype == object:
+            present = values.dropna()
+            if all(isinstance(value, str) for value in present) and present.nunique() <= category_max_ratio * len(
+                values
+            ):
+                compact[column] = values.astype("category")
+        elif pd.api.types.is_integer_dtype(values.dtype) and not isinstance(values.dtype, pd.CategoricalDtype):
+            compact[column] = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values.dtype) and values.dtype != "float32":
+            array = values.to_numpy()
+            if np.array_equal(array.astype("float32").astype(array.dtype), array, equal_nan=True):
+                compact[column] = values.astype("float32")
+    return compact
+
+
+def memory_report(df: pd.DataFrame, compact: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Функция показывает память по столбцам до и после compact_frame (memory_usage(deep=True)).
+
+    :param df: исходный DataFrame
+    :param compact: компактный DataFrame, по умолчанию compact_frame(df)
+    :return: DataFrame со столбцами dtype_before, bytes_before, dtype_after, bytes_after
+        (для удаленного столбца - пусто и 0), последняя строка - итог
+    """
+    compact = compact_frame(df) if compact is None else compact
+    before = df.memory_usage(index=False, deep=True)
+    after = compact.memory_usage(index=False, deep=True).reindex(before.index, fill_value=0)
+    report = pd.DataFrame(
+        {
+            "dtype_before": df.dtypes.astype(str),
+            "bytes_before": before,
+            "dtype_after": compact.dtypes.astype(str).reindex(before.index, fill_value=""),
+            "bytes_after": after,
+        }
+    )
+    report.loc["total"] = ["", int(before.sum()), "", int(after.sum())]
+    return report
+
+
+class DateIndex:
+    """
+    Отсортированный индекс по столбцу дат: выборка диапазона дат бинарным поиском (searchsorted).
+    Если столбец уже упорядочен (по возрастанию или убыванию), диапазон - это срез строк без копирования.
+    """
+
+    def __init__(self, dates: pd.Series) -> None:
+        values = dates.to_numpy(dtype="datetime64[ns]").view("i8")
+        self.size = len(values)
+        self.order: Optional[np.ndarray] = None
+        self.descending = False
+        if _is_sorted(values):
+            self.keys = values
+        elif _is_sorted(values[::-1]):
+            self.keys = values[::-1]
+            self.descending = True
+        else:
+            self.order = np.argsort(values, kind="stable")
+            self.keys = values[self.order]
+
+    def positions(self, start: Any, end: Any) -> Union[slice, np.ndarray]:
+        """
+        Возвращает позиции строк с датами от start до end включительно (в исходном порядке строк).
+
+        :param start: начало диапазона
+        :param end: конец диапазона
+        :return: срез (для упорядоченного столбца) или массив позиций
+        """
+        low = int(np.searchsorted(self.keys, pd.Timestamp(start).value, side="left"))
+        high = int(np.searchsorted(self.keys, pd.Timestamp(end).value, side="right"))
+        high = max(low, high)
+        if self.order is not None:
+            return np.sort(self.order[low:high])
+        if self.descending:
+            return slice(self.size - high, self.size - low)
+        return slice(low, high)
+
+
+def _is_sorted(values: np.ndarray) -> bool:
+    """Проверяет, что массив упорядочен по неубыванию."""
+    return bool(np.all(values[1:] >= values[:-1]))
+
+
+_frame_data: dict[tuple[int, str], tuple[Any, int, Any]] = {}
+_frame_data_lock = threading.Lock()
+_object_numbers = itertools.count()
+
+
+def frame_cached(df: pd.DataFrame, kind: str, builder: Callable[[], Any]) -> Any:
+    """
+    Функция возвращает данные, построенные для объекта DataFrame (индекс дат, владелец и т.п.).
+    Данные строятся один раз для объекта DataFrame той же длины и удаляются вместе с ним.
+
+    :param df: DataFrame
+    :param kind: вид данных
+    :param builder: функция построения данных
+    :return: построенные данные
+    """
+    key = (id(df), kind)
+    with _frame_data_lock:
+        cached = _frame_data.get(key)
+        if cached is not None and cached[0]() is df and cached[1] == len(df):
+            return cached[2]
+    built = builder()
+    set_frame_cached(df, kind, built)
+    return built
+
+
+def lookup_frame_cached(df: pd.DataFrame, kind: str) -> Any:
+    """
+    Функция возвращает сохраненные для объекта DataFrame данные (см. frame_cached) без построения.
+
+    :param df: DataFrame
+    :param kind: вид данных
+    :return: данные или None
+    """
+    with _frame_data_lock:
+        cached = _frame_data.get((id(df), kind))
+        if cached is not None and cached[0]() is df and cached[1] == len(df):
+            return cached[2]
+    return None
+
+
+def set_frame_cached(df: pd.DataFrame, kind: str, value: Any) -> None:
+    """
+    Функция сохраняет данные для объекта DataFrame (см. frame_cached).
+
+    :param df: DataFrame
+    :param kind: вид данных
+    :param value: данные
+    """
+    key = (id(df), kind)
+    with _frame_data_lock:
+        _frame_data[key] = (weakref.ref(df), len(df), value)
+    weakref.finalize(df, _frame_data.pop, key, None)
+
+
+def own_frame(df: pd.DataFrame, owner: str) -> None:
+    """
+    Функция отмечает DataFrame как принадлежащий хранилищу (TransactionStore): такой DataFrame
+    не изменяется после создания, поэтому производные данные (индекс дат) для него можно кэшировать.
+    Для остальных DataFrame кэш не используется: их могут изменить на месте (sort_values(inplace=True),
+    присваивание через loc), а это не видно по объекту и длине.
+
+    :param df: DataFrame хранилища
+    :param owner: отпечаток данных хранилища, например 'file:operations:<mtime>:<size>:frame'
+    """
+    set_frame_cached(df, "owner", owner)
+
+
+class OwnedRecords(list):
+    """Транзакции хранилища в формате списка словарей с отпечатком данных хранилища (см. TransactionStore.records)."""
+
+    def __init__(self, records: list[dict], owner: str) -> None:
+        super().__init__(records)
+        self.owner = owner
+
+
+def owned_fingerprint(df: Any) -> Optional[str]:
+    """
+    Функция возвращает отпечаток данных, принадлежащих хранилищу: DataFrame (см. own_frame)
+    или списка словарей (OwnedRecords).
+
+    :param df: DataFrame или список словарей
+    :return: отпечаток или None, если данные не принадлежат хранилищу
+    """
+    if isinstance(df, OwnedRecords):
+        return df.owner
+    owner: Optional[str] = lookup_frame_cached(df, "owner")
+    return owner
+
+
+def _parse_dates(df: pd.DataFrame, column: str, date_format: Optional[str] = None) -> pd.Series:
+    """Столбец дат DataFrame; строки разбираются по date_format (по умолчанию - формат столбца из DATE_FORMATS)."""
+    dates = df[column]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format=date_format or DATE_FORMATS.get(column))
+    return dates
+
+
+def date_index(df: pd.DataFrame, column: str, date_format: Optional[str] = None) -> DateIndex:
+    """
+    Функция возвращает индекс дат для столбца DataFrame. Если в столбце строки, они разбираются
+    по date_format (по умолчанию - формат столбца из DATE_FORMATS); сам DataFrame не изменяется.
+    Для DataFrame хранилища (см. own_frame) индекс строится один раз и удаляется вместе с DataFrame,
+    для остальных - строится при каждом вызове.
+
+    :param df: DataFrame с транзакциями
+    :param column: название столбца с датами
+    :param date_format: формат дат для столбца со строками
+    :return: индекс дат
+    """
+
+    def build() -> DateIndex:
+        return DateIndex(_parse_dates(df, column, date_format))
+
+    if owned_fingerprint(df) is None:
+        return build()
+    index: DateIndex = frame_cached(df, "date_index:" + column, build)
+    return index
+
+
+def date_window(
+    df: pd.DataFrame, column: str, start: Any, end: Any, date_format: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Функция возвращает строки DataFrame с датами столбца от start до end включительно; порядок строк сохраняется.
+    Исходный DataFrame не изменяется; если в столбце строки, в результате столбец заменяется датами,
+    разобранными из строк самой выборки.
+    Для DataFrame хранилища (см. own_frame) выборка идет бинарным поиском по кэшированному индексу дат
+    (см. date_index), и для упорядоченного столбца результат - срез без копирования. Остальные DataFrame
+    фильтруются по маске дат при каждом вызове, поэтому их изменения на месте всегда учитываются.
+
+    :param df: DataFrame с транзакциями
+    :param column: название столбца с датами
+    :param start: начало диапазона
+    :param end: конец диапазона
+    :param date_format: формат дат для столбца со строками
+    :return: DataFrame с транзакциями за период
+    """
+    if owned_fingerprint(df) is None:
+        dates = _parse_dates(df, column, date_format)
+        mask = ((dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))).to_numpy()
+        window = df[mask]
+        if not pd.api.types.is_datetime64_any_dtype(df[column]):
+            window = window.assign(**{column: dates.to_numpy()[mask]})
+        return window
+    index = date_index(df, column, date_format)
+    positions = index.positions(start, end)
+    window = df.iloc[positions]
+    if not pd.api.types.is_datetime64_any_dtype(df[column]):
+        window = window.assign(**{column: _parse_dates(window, column, date_format)})
+    return window
+
+
+class TransactionStore:
+    """
+    Хранилище транзакций: загружает файл операций один раз и отдает
+    типизированный DataFrame (frame), исходный DataFrame (raw) и список словарей (records).
+    frame упорядочен по дате операции (от новых к старым, как в выгрузке банка),
+    поэтому выборка по дате операции (window) - это срез без копирования.
+    С compact в памяти хранится только компактный frame: raw и records не сохраняются, а строятся
+    из кэша при каждом обращении (см. raw, records).
+    Данные хранилища не изменяются после загрузки, поэтому индексы дат для них кэшируются (см. own_frame).
+    """
+
+    def __init__(self, filename: str = "operations", cache_dir: Optional[str] = None, compact: bool = False) -> None:
+        self.filename = filename
+        self.cache_dir = cache_dir
+        self.compact = compact
+        self.source_file = os.path.join(directory_name, "data", filename + ".xlsx")
+        self._lock = threading.RLock()
+        self._raw: Optional[pd.DataFrame] = None
+        self._frame: Optional[pd.DataFrame] = None
+        self._records: Optional[list[dict]] = None
+        self._rollup: Any = None
+        self._owner = ""
+        self.version: Optional[dict] = None
+
+    def load(self) -> "TransactionStore":
+        """
+        Загружает данные (через кэш) и сбрасывает все производные данные.
+
+        :return: хранилище
+        """
+        with self._lock:
+            logger.info(f"загрузка транзакций из {self.source_file}")
+            self.version = source_key(self.source_file)
+            self._owner = f"file:{self.filename}:{self.version['mtime_ns']}:{self.version['size']}"
+            self._raw = None if self.compact else self._read_raw()
+            frame_name = self.filename + (".frame.compact" if self.compact else ".frame")
+            self._frame = load_or_build(self.source_file, frame_name, self._build_frame, self.cache_dir)
+            own_frame(self._frame, self._owner + ":frame")
+            self._records = None
+            self._rollup = None
+            return self
+
+    @classmethod
+    def from_frame(cls, raw: pd.DataFrame, filename: str = "memory", compact: bool = False) -> "TransactionStore":
+        """
+        Создает хранилище для уже загруженных транзакций (без файла и кэша), например для синтетических данных.
+
+        :param raw: DataFrame с транзакциями в исходном виде (как его возвращает read_excel)
+        :param filename: имя хранилища
+        :param compact: хранить frame в компактном виде (см. compact_frame)
+        :return: хранилище
+        """
+        store = cls(filename, compact=compact)
+        store._raw = raw
+        store._frame = store._build_frame()
+        store._owner = f"memory:{filename}:{next(_object_numbers)}"
+        own_frame(store._frame, store._owner + ":frame")
+        return store
+
+    def is_stale(self) -> bool:
+        """
+        Проверяет, что файл операций изменился после загрузки (время изменения или размер).
+        Хранилище без файла (from_frame) и еще не загруженное хранилище не устаревают.
+
+        :return: True, если данные нужно перезагрузить
+        """
+        if self.version is None:
+            return False
+        try:
+            return source_key(self.source_file) != self.version
+        except FileNotFoundError:
+            return False
+
+    def _read_raw(self) -> pd.DataFrame:
+        """Исходный DataFrame из файла операций (через кэш), отмеченный как данные хранилища."""
+        raw = read_excel_cached(self.filename, self.cache_dir)
+        own_frame(raw, self._owner + ":raw")
+        return raw
+
+    def _build_frame(self) -> pd.DataFrame:
+        """Типизированный (и с compact - компактный) DataFrame, упорядоченный по дате операции от новых к старым."""
+        raw = self._read_raw() if self._raw is None else self._raw
+        frame = to_typed_frame(raw).sort_values(SORT_COLUMN, ascending=False, kind="stable")
+        return compact_frame(frame) if self.compact else frame
+
+    def window(self, start: Any, end: Any, column: str = SORT_COLUMN) -> pd.DataFrame:
+        """
+        Возвращает транзакции с датами столбца column от start до end включительно (см. date_window).
+
+        :param start: начало диапазона
+        :param end: конец диапазона
+        :param column: столбец с датами: "Дата операции" или "Дата платежа"
+        :return: DataFrame с транзакциями за период
+        """
+        return date_window(self.frame, column, start, end)
+
+    @property
+    def raw(self) -> pd.DataFrame:
+        """
+        DataFrame с транзакциями в исходном виде (даты - строки).
+        С compact для файла операций не хранится: при каждом обращении читается из кэша (см. read_excel_cached).
+        """
+        with self._lock:
+            if self._frame is None:
+                self.load()
+            if self._raw is None:
+                return self._read_raw()
+            return self._raw
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """DataFrame с типизированными столбцами (см. to_typed_frame)."""
+        with self._lock:
+            if self._frame is None:
+                self.load()
+            return self._frame
+
+    @property
+    def records(self) -> list[dict]:
+        """
+        Транзакции в формате списка словарей (исходные значения, как в Excel). Список принадлежит хранилищу
+        (OwnedRecords), поэтому индекс поиска и признаки транзакций для него кэшируются (см. src.search_index).
+        С compact, как и raw, не хранится и строится при каждом обращении (с тем же отпечатком).
+        """
+        with self._lock:
+            if self._records is not None:
+                return self._records
+            records = OwnedRecords(self.raw.to_dict(orient="records"), self._owner + ":records")
+            if self._raw is not None:
+                self._records = records
+            return records
+
+    def memory_usage(self) -> dict[str, int]:
+        """
+        Память DataFrame, которые хранилище держит в памяти (memory_usage(deep=True)); raw, который
+        не хранится (compact), - 0. Список records не учитывается.
+
+        :return: словарь {"raw": байты, "frame": байты, "total": байты}
+        """
+        with self._lock:
+            usage = {
+                name: 0 if df is None else int(df.memory_usage(index=True, deep=True).sum())
+                for name, df in [("raw", self._raw), ("frame", self._frame)]
+            }
+        usage["total"] = usage["raw"] + usage["frame"]
+        return usage
+
+    @property
+    def rollup(self) -> Any:
+        """
+        Кубы по месяцам (src.rollup.MonthlyRollup) по frame: для файла операций читаются из кэша
+        или строятся и сохраняются один раз для каждой версии файла.
+        """
+        from src.rollup import MonthlyRollup
+
+        with self._lock:
+            if self._rollup is None:
+                if self.version is None and self._frame is not None:
+                    self._rollup = MonthlyRollup(self._frame)
+                else:
+                    frame = self.frame
+                    self._rollup = MonthlyRollup.load(frame, self.source_file, self.filename, self.cache_dir)
+            return self._rollup
+
+
+_stores: dict[str, TransactionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(filename: str = "operations") -> TransactionStore:
+    """
+    Функция возвращает общее для процесса хранилище транзакций для файла.
+    Если файл изменился после загрузки (TransactionStore.is_stale), загружается новое хранилище
+    и заменяет прежнее целиком, как в DashboardServer.reload; при ошибке чтения остается прежнее.
+
+    :param filename: Имя файла Excel
+    :return: хранилище транзакций
+    """
+    with _stores_lock:
+        store = _stores.get(filename)
+        if store is None:
+            store = _stores[filename] = TransactionStore(filename)
+        elif store.is_stale():
+            try:
+                store = _stores[filename] = TransactionStore(filename).load()
+            except Exception as ex:
+                logger.error(f"Ошибка перезагрузки транзакций из {store.source_file}: {ex}")
+        return store
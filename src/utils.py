@@ -1,30 +1,76 @@
+from __future__ import annotations
+
 import datetime
 import logging
 import os.path
+import threading
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import Dict
+from typing import Iterable
+from typing import Optional
+
+from src.aggregates import TOP_COLUMNS
+from src.aggregates import AggregateEngine
+from src.aggregates import CardTotals
+from src.cache import load_or_build
+from src.config import env
+from src.lazy import lazy_import
+from src.logging_utils import lazy_repr
+from src.metrics import instrument
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import requests
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+    requests = lazy_import("requests")
 
-import pandas as pd
-import requests
-from dotenv import load_dotenv
-from requests import JSONDecodeError
+DEFAULT_RATES_URL = "https://api.apilayer.com/exchangerates_data/convert"
+DEFAULT_STOCKS_URL = "https://api.api-ninjas.com/v1/stockprice"
+DEFAULT_REQUEST_TIMEOUT = "5"
 
-load_dotenv()
-api_key = os.getenv("API_KEY")
-x_api_key = os.getenv("X-Api-Key")
+# Настройки API читаются из переменных окружения (и файла .env) при первом запросе;
+# значение, присвоенное атрибуту модуля, имеет приоритет.
+api_key: Optional[str] = None
+x_api_key: Optional[str] = None
+rates_url: Optional[str] = None
+stocks_url: Optional[str] = None
+request_timeout: Optional[float] = None
+currencies = ["EUR", "USD"]
+tickers = ["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"]
+max_workers = len(currencies) + len(tickers)
 directory_name = Path(__file__).resolve().parent.parent
-log_path = os.path.join(directory_name, "logs", "utils.log")
 
-logging.basicConfig(
-    filename=log_path,
-    format="%(asctime)s - %(filename)s - %(levelname)s:  %(message)s",
-    filemode="w",
-    level=logging.DEBUG,
-    encoding="utf-8",
-)
+logger = logging.getLogger(__name__)
+
+_session: Optional[requests.Session] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_session_lock = threading.Lock()
+
+
+def api_settings() -> dict[str, Any]:
+    """
+    Функция возвращает настройки внешних API: ключи, адреса и таймаут запроса.
 
-logger = logging.getLogger()
+    :return: словарь с настройками
+    """
+    return {
+        "api_key": api_key if api_key is not None else env("API_KEY"),
+        "x_api_key": x_api_key if x_api_key is not None else env("X-Api-Key"),
+        "rates_url": rates_url or env("RATES_URL", DEFAULT_RATES_URL),
+        "stocks_url": stocks_url or env("STOCKS_URL", DEFAULT_STOCKS_URL),
+        "request_timeout": (
+            request_timeout
+            if request_timeout is not None
+            else float(env("REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT) or DEFAULT_REQUEST_TIMEOUT)
+        ),
+    }
 
 
 def get_greeting() -> str:
@@ -63,6 +109,22 @@ def get_month_period(date_time: str) -> list[str]:
     return [first_day_of_month.strftime(to_formated_date), dt.strftime(to_formated_date)]
 
 
+def format_date(value: Any) -> Any:
+    """
+    Функция переводит разобранную дату (например, из TransactionStore) в строку формата 'dd.mm.YYYY'.
+    Остальные значения возвращает без изменений.
+
+    :param value: дата или любое значение
+    :return: строка с датой или исходное значение
+    """
+    if isinstance(value, datetime.datetime):
+        if pd.isna(value):
+            return None
+        return value.strftime("%d.%m.%Y")
+    return value
+
+
+@instrument()
 def read_excel(filename: str) -> pd.DataFrame:
     """
     Функция читает финансовых операций из Excel и возврашает DataFrame с транзакциями.
@@ -80,6 +142,25 @@ def read_excel(filename: str) -> pd.DataFrame:
         return pd.DataFrame()
 
 
+@instrument()
+def read_excel_cached(filename: str, cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Функция читает финансовые операции из Excel через столбцовый кэш (data/.cache/<filename>.npz).
+    Excel разбирается только при первом чтении или после изменения файла (mtime и размер).
+
+    :param filename:Имя файла Excel
+    :param cache_dir: опциональная папка кэша
+    :return:DataFrame с транзакциями.
+    """
+    try:
+        excel_file = os.path.join(directory_name, "data", filename + ".xlsx")
+        return load_or_build(excel_file, filename, lambda: read_excel(filename), cache_dir)
+    except FileNotFoundError as ex:
+        logger.error(f"Произошла ошибка: {ex}")
+        return pd.DataFrame()
+
+
+@instrument()
 def get_each_cards_datas(df: pd.DataFrame) -> list[dict]:
     """
     Функция принимает DataFrame с транзакциями и возврашает список словарей:
@@ -87,105 +168,282 @@ def get_each_cards_datas(df: pd.DataFrame) -> list[dict]:
     общая сумма расходов;
     кешбэк (1 рубль на каждые 100 рублей).
 
-    :param df:DataFrame с транзакциями
+    :param df:DataFrame с транзакциями, движок агрегатов (AggregateEngine) или кубы по месяцам (MonthlyRollup)
+    :return:список словарей
+    """
+    from src.rollup import MonthlyRollup
+
+    try:
+        if isinstance(df, (AggregateEngine, MonthlyRollup)):
+            return df.card_totals()
+        totals = CardTotals().update(df)
+        logger.info(f"получение данных по {len(totals.totals)} картам")
+        return totals.result()
+    except Exception as ex:
+        logger.error(f"Произошла ошибка в получение информации карты : {ex}")
+        return [{}]
+
+
+def get_each_cards_datas_from_chunks(chunks: Iterable[pd.DataFrame]) -> list[dict]:
+    """
+    Функция считает данные по картам (как get_each_cards_datas) по частям транзакций,
+    например из потокового чтения src.ingest.iter_chunks; в памяти одновременно только одна часть.
+
+    :param chunks: части DataFrame с транзакциями
     :return:список словарей
     """
     try:
-        card_datas = []
-        card_numbers = df["Номер карты"].dropna().unique()
-        logger.info(f"получение Номера карты: {card_numbers}")
-        grouped_by_card = df.groupby("Номер карты")
-        for card_number in card_numbers:
-            amount = grouped_by_card["Сумма платежа"].sum()
-            cashback = grouped_by_card["Бонусы (включая кэшбэк)"].sum()
-            card_datas.append(
-                {
-                    "last_digits": card_number,
-                    "total_spent": float(amount[card_number]),
-                    "cashback": float(cashback[card_number]),
-                }
-            )
-        return card_datas
+        totals = CardTotals()
+        for chunk in chunks:
+            totals.update(chunk)
+        logger.info(f"получение данных по {len(totals.totals)} картам")
+        return totals.result()
     except Exception as ex:
         logger.error(f"Произошла ошибка в получение информации карты : {ex}")
         return [{}]
 
 
-def get_rate_currency() -> list[dict]:
+def get_session() -> requests.Session:
+    """
+    Функция возвращает общую для процесса сессию requests с пулом keep-alive соединений.
+
+    :return: сессия requests
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=max_workers)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def fetch_currency_rate(currency: str, http: Any = requests) -> Optional[dict]:
+    """
+    Функция обращает к внешнему API курсов валют для получения курса одной валюты в рублях.
+
+    :param currency: код валюты
+    :param http: модуль requests или сессия requests
+    :return: словарь с валютой и курсом или None, если API ответил ошибкой
+    """
+    settings = api_settings()
+    headers = {"apikey": settings["api_key"]}
+    payload: Dict[str, Any] = {"amount": 1, "from": currency, "to": "RUB"}
+    response = http.get(settings["rates_url"], headers=headers, params=payload, timeout=settings["request_timeout"])
+    if response.status_code == 200:
+        return {"currency": currency, "rate": round(response.json()["result"], 2)}
+    return None
+
+
+@instrument()
+def get_rate_currency(http: Any = requests) -> list[dict]:
     """
     Функция обращает к внешнему API (https://apilayer.com/marketplace/exchangerates_data-api)
     для получения текущего курса валют "EUR" и "USD" в рублях
 
+    :param http: модуль requests или сессия requests
     :return: список словарей с валютами и курсами валют
     """
-    currencies = ["EUR", "USD"]
     rate = []
     try:
         logger.info("Oбращаем к внешнему API ля получения текущего курса валют EUR и USD в рублях")
         for currency in currencies:
-            url = "https://api.apilayer.com/exchangerates_data/convert"
-            headers = {"apikey": api_key}
-            payload: Dict[str, Any] = {"amount": 1, "from": currency, "to": "RUB"}
-            response = requests.get(url, headers=headers, params=payload)
-            if response.status_code == 200:
-                rate.append({"currency": currency, "rate": round(response.json()["result"], 2)})
+            currency_rate = fetch_currency_rate(currency, http)
+            if currency_rate:
+                rate.append(currency_rate)
         return rate
-    except (JSONDecodeError, TypeError, KeyError, ValueError, AssertionError) as ex:
+    except (
+        requests.JSONDecodeError,
+        TypeError,
+        KeyError,
+        ValueError,
+        AssertionError,
+        requests.RequestException,
+    ) as ex:
         logger.error(f"Ошибка получение курс валют: {ex}")
         return [{}]
 
 
-def top_transactions_by_paymant(df: pd.DataFrame, limit: int = 5) -> list[dict[Any, Any]]:
+def top_positions(values: np.ndarray, limit: int) -> np.ndarray:
+    """
+    Функция находит позиции limit наибольших значений за O(n) (np.partition вместо полной сортировки).
+    Результат совпадает с Series.nlargest(limit, keep="first"): по убыванию значения, при равенстве - по позиции;
+    если значений без NaN меньше limit, в конце по порядку добавляются позиции NaN. Если limit не меньше
+    числа значений, nlargest сортирует весь массив (sort_values, порядок равных значений не по позиции),
+    и здесь результат берется так же.
+
+    :param values: массив значений
+    :param limit: число наибольших значений
+    :return: массив позиций
+    """
+    missing = np.isnan(values)
+    positions = np.flatnonzero(~missing)
+    if limit <= 0:
+        return positions[:0]
+    if limit >= values.size:
+        order: np.ndarray = pd.Series(values).sort_values(ascending=False).index.to_numpy()
+        return order
+    if limit > positions.size:
+        top = positions[np.lexsort((positions, -values[positions]))]
+        return np.concatenate([top, np.flatnonzero(missing)[: limit - positions.size]])
+    if limit < positions.size:
+        candidates = values[positions]
+        threshold = np.partition(candidates, candidates.size - limit)[candidates.size - limit]
+        above = positions[candidates > threshold]
+        equal = positions[candidates == threshold][: limit - above.size]
+        positions = np.sort(np.concatenate([above, equal]))
+    return positions[np.lexsort((positions, -values[positions]))]
+
+
+@instrument()
+def top_transactions_by_paymant(df: pd.DataFrame, limit: int = 5, method: str = "nlargest") -> list[dict[Any, Any]]:
     """
     Функция принимает DataFrame транзакций по сумме платежа, топ число трансакции.Она возвращает tоп-лимит транзакции.
 
-    :param df: Транзакции по сумме платежа
+    :param df: Транзакции по сумме платежа или движок агрегатов (AggregateEngine, limit не больше его топа)
     :param limit: Лимит топ числа
+    :param method: способ выбора: "nlargest" или "argpartition" (за O(n), для больших DataFrame и limit)
     :return: Топ-5 транзакций по сумме платежа
     """
     try:
         logger.info("Получаем топ-5 транзакции по сумме платежа")
-        indexes_of_top_trans = df["Сумма операции с округлением"].nlargest(limit).keys()
-        logger.info(f"Получаем индекса топ-5 транзакции : {indexes_of_top_trans}")
-        top_transactions = []
-        for index in indexes_of_top_trans:
-            top_transactions.append(
-                {
-                    "date": df["Дата платежа"][index],
-                    "amount": float(df["Сумма операции"][index]),
-                    "category": df["Категория"][index],
-                    "description": df["Описание"][index],
-                }
-            )
-        return top_transactions
+        if isinstance(df, AggregateEngine):
+            return _format_top(df.top_transactions(limit))
+        amounts = df["Сумма операции с округлением"]
+        if method == "argpartition":
+            positions = top_positions(amounts.to_numpy(dtype=float), limit)
+        elif method == "nlargest":
+            positions = amounts.reset_index(drop=True).nlargest(limit).index.to_numpy()
+        else:
+            raise ValueError(f"неизвестный способ выбора: {method}")
+        logger.info("Получаем позиции топ-%s транзакции : %s", limit, lazy_repr(positions))
+        top = df.iloc[positions]
+        return _format_top(zip(*(top[column].tolist() for column in TOP_COLUMNS)))
     except Exception as ex:
         logger.error(f"Ошибка получение топ-5 транзакции: {ex}")
         return [{}]
 
 
-def stock_price() -> list[dict]:
+def _format_top(rows: Iterable[tuple]) -> list[dict[Any, Any]]:
+    """Топ транзакций в формате ответа: строки - значения столбцов TOP_COLUMNS."""
+    return [
+        {
+            "date": format_date(date),
+            "amount": amount,
+            "category": category,
+            "description": description,
+        }
+        for date, amount, category, description in rows
+    ]
+
+
+def fetch_stock_price(ticker: str, http: Any = requests) -> dict:
+    """
+    Функция обращает к внешнему API для получения стоимости одной акции.
+
+    :param ticker: тикер акции
+    :param http: модуль requests или сессия requests
+    :return: словарь с тикером и ценой
+    """
+    settings = api_settings()
+    headers = {"X-Api-Key": settings["x_api_key"]}
+    payload: Dict[str, str] = {"ticker": ticker}
+    response = http.get(settings["stocks_url"], headers=headers, params=payload, timeout=settings["request_timeout"])
+    return {"stock": ticker, "price": response.json()["price"]}
+
+
+@instrument()
+def stock_price(http: Any = requests) -> list[dict]:
     """
      Функция обращает к внешнему API (https://api-ninjas.com/api/stockprice) для получения
      стоимость акций из S&P500 ("AAPL", "AMZN", "GOOGL", "MSFT", "TSLA").
 
+    :param http: модуль requests или сессия requests
     :return: Список словарей тикерами и их ценами
     """
     try:
         logger.info("Oбращаем к внешнему API для получения стоимость акций из S&P500")
-        stock_prices = []
-        tickers = ["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"]
-        url = "https://api.api-ninjas.com/v1/stockprice"
-        headers = {"X-Api-Key": x_api_key}
-        for ticker in tickers:
-            payload: Dict[str, str] = {"ticker": ticker}
-            response = requests.get(url, headers=headers, params=payload)
-            stock_prices.append({"stock": ticker, "price": response.json()["price"]})
-        return stock_prices
+        return [fetch_stock_price(ticker, http) for ticker in tickers]
     except Exception as ex:
         logger.error(f"Ошибка получение стоимость акций из S&P500: {ex}")
         return [{}]
 
 
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Функция возвращает общий для процесса ограниченный пул потоков для запросов к внешним API.
+
+    :return: пул потоков
+    """
+    global _executor
+    with _session_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-data")
+        return _executor
+
+
+def _collect_rates(futures: list[Future]) -> list[dict]:
+    """Собирает результаты запросов курсов валют с обработкой ошибок как в get_rate_currency."""
+    try:
+        return [rate for rate in (future.result() for future in futures) if rate]
+    except (
+        requests.JSONDecodeError,
+        TypeError,
+        KeyError,
+        ValueError,
+        AssertionError,
+        requests.RequestException,
+    ) as ex:
+        logger.error(f"Ошибка получение курс валют: {ex}")
+        return [{}]
+
+
+def _collect_stock_prices(futures: list[Future]) -> list[dict]:
+    """Собирает результаты запросов стоимости акций с обработкой ошибок как в stock_price."""
+    try:
+        return [future.result() for future in futures]
+    except Exception as ex:
+        logger.error(f"Ошибка получение стоимость акций из S&P500: {ex}")
+        return [{}]
+
+
+def get_rate_currency_concurrent() -> list[dict]:
+    """
+    Функция параллельно получает курсы валют (см. get_market_data).
+
+    :return: список словарей с валютами и курсами валют
+    """
+    session = get_session()
+    return _collect_rates([_get_executor().submit(fetch_currency_rate, currency, session) for currency in currencies])
+
+
+def stock_price_concurrent() -> list[dict]:
+    """
+    Функция параллельно получает стоимость акций (см. get_market_data).
+
+    :return: Список словарей тикерами и их ценами
+    """
+    session = get_session()
+    return _collect_stock_prices([_get_executor().submit(fetch_stock_price, ticker, session) for ticker in tickers])
+
+
+def get_market_data() -> tuple[list[dict], list[dict]]:
+    """
+    Функция параллельно (в ограниченном пуле потоков, через общую сессию с keep-alive)
+    получает курсы валют и стоимость акций. Время ответа равно времени самого медленного запроса.
+    Ошибки обрабатываются так же, как в get_rate_currency и stock_price.
+
+    :return: курсы валют и стоимость акций
+    """
+    logger.info("Параллельно обращаем к внешним API курсов валют и стоимости акций")
+    session = get_session()
+    executor = _get_executor()
+    rate_futures = [executor.submit(fetch_currency_rate, currency, session) for currency in currencies]
+    stock_futures = [executor.submit(fetch_stock_price, ticker, session) for ticker in tickers]
+    return _collect_rates(rate_futures), _collect_stock_prices(stock_futures)
+
+
 if __name__ == "__main__":
     # print(get_greeting())
     print(get_month_period("2021-12-30 08:16:00"))
@@ -1,37 +1,47 @@
-import json
-
-import pandas as pd
-
+import datetime
+from typing import Optional
+
+from src.config import setup
+from src.market_cache import MarketDataCache
+from src.market_cache import get_cached_market_data
+from src.metrics import instrument
+from src.metrics import timed
+from src.serializers import dumps
+from src.store import TransactionStore
+from src.store import get_store
 from src.utils import get_each_cards_datas
 from src.utils import get_greeting
 from src.utils import get_month_period
-from src.utils import get_rate_currency
-from src.utils import read_excel
-from src.utils import stock_price
 from src.utils import top_transactions_by_paymant
 
 
-def get_page_main_datas(date: str) -> str:
+@instrument()
+def get_page_main_datas(
+    date: str, store: Optional[TransactionStore] = None, market_cache: Optional[MarketDataCache] = None
+) -> str:
     """
     Функция реализуйте набор функций и главную функцию, принимающую на вход строку с датой и временем в формате
     YYYY-MM-DD HH:MM:SS и возвращающую JSON-ответ со следующими данными: 1. Приветствие;
     2. По каждой карте: последние 4 цифры карты; общая сумма расходов; кешбэк (1 рубль на каждые 100 рублей).
     3.Топ-5 транзакций по сумме платежа; 4. Курс валют; 5. Стоимость акций из S&P500.
     :param date: строку с датой и временем в формате YYYY-MM-DD HH:MM:SS
+    :param store: хранилище транзакций, по умолчанию общее для файла operations (см. get_store)
+    :param market_cache: кэш рыночных данных, по умолчанию общий (см. get_market_cache)
+    При включенных метриках (см. src.metrics) время этапов записывается как views.window,
+    views.market_data и views.serialize; топ транзакций и карты замеряются в utils.
     :return:
      JSON-ответ
     """
-    tr = read_excel("operations")
     month_period = get_month_period(date)
+    start = datetime.datetime.strptime(month_period[0], "%d.%m.%Y %H:%M:%S")
+    end = datetime.datetime.strptime(month_period[1], "%d.%m.%Y %H:%M:%S")
 
-    filtered_df = tr[
-        (pd.to_datetime(tr["Дата операции"], dayfirst=True) >= pd.to_datetime(month_period[0], dayfirst=True))
-        & (pd.to_datetime(tr["Дата операции"], dayfirst=True) <= pd.to_datetime(month_period[1], dayfirst=True))
-    ]
+    with timed("views.window"):
+        filtered_df = (store or get_store("operations")).window(start, end)
 
     greeting = get_greeting()
-    currency_rates = get_rate_currency()
-    stock_prices = stock_price()
+    with timed("views.market_data"):
+        currency_rates, stock_prices = get_cached_market_data(market_cache)
     top_transactions = top_transactions_by_paymant(filtered_df)
     cards = get_each_cards_datas(filtered_df)
 
@@ -42,8 +52,10 @@ def get_page_main_datas(date: str) -> str:
         "currency_rates": currency_rates,
         "stock_prices": stock_prices,
     }
-    return json.dumps(data, ensure_ascii=False, indent=4)
+    with timed("views.serialize"):
+        return dumps(data)
 
 
 if __name__ == "__main__":
+    setup("views")
     print(get_page_main_datas("2021-12-10 08:16:00"))
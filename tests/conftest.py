@@ -1,5 +1,12 @@
 import datetime
 import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Iterator
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
 
 import pandas as pd
 import pytest
@@ -149,3 +156,44 @@ def weekday_spending_expected() -> str:
         {"Sunday": nan},
     ]
     return json.dumps(data, ensure_ascii=False, indent=4)
+
+
+class QuoteStubHandler(BaseHTTPRequestHandler):
+    """Заглушка API курсов валют и стоимости акций: отвечает с задержкой server.delay секунд."""
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        time.sleep(self.server.delay)  # type: ignore[attr-defined]
+        if url.path == "/convert":
+            body = {"result": 70.236}
+        else:
+            body = {"price": 100.5, "ticker": params["ticker"][0]}
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def quote_stub_server() -> Iterator[ThreadingHTTPServer]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), QuoteStubHandler)
+    server.delay = 0.0  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def quote_stub_urls(quote_stub_server: ThreadingHTTPServer, monkeypatch: pytest.MonkeyPatch) -> ThreadingHTTPServer:
+    base_url = f"http://127.0.0.1:{quote_stub_server.server_address[1]}"
+    monkeypatch.setattr("src.utils.rates_url", base_url + "/convert")
+    monkeypatch.setattr("src.utils.stocks_url", base_url + "/stockprice")
+    return quote_stub_server
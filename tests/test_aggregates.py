@@ -0,0 +1,131 @@
+import threading
+from typing import Any
+from typing import Callable
+
+import pandas as pd
+import pytest
+
+from src.aggregates import AggregateEngine
+from src.aggregates import CardTotals
+from src.aggregates import DailyTotals
+from src.aggregates import MonthlyCashback
+from src.aggregates import TopTransactions
+from src.aggregates import WeekdayTotals
+from src.aggregates import consume
+
+
+def make_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(
+                ["05.01.2021 10:00:00", "06.01.2021 10:00:00", "10.02.2021 10:00:00", "11.02.2021 10:00:00"],
+                format="%d.%m.%Y %H:%M:%S",
+            ),
+            "Дата платежа": pd.to_datetime(["05.01.2021", "09.01.2021", None, "11.02.2021"], format="%d.%m.%Y"),
+            "Номер карты": ["*7197", "*5091", "*7197", None],
+            "Сумма платежа": [-100.0, -50.0, -25.0, -10.0],
+            "Бонусы (включая кэшбэк)": [1, 0, 2, 5],
+            "Сумма операции": [-100.0, -50.0, -25.0, -10.0],
+            "Категория": ["Супермаркеты", "Наличные", "Супермаркеты", "Фастфуд"],
+            "Описание": ["Магнит", "Снятие", "Колхоз", "KFC"],
+            "Сумма операции с округлением": [100.0, 50.0, 25.0, 10.0],
+        }
+    )
+
+
+def test_aggregators_over_chunks_match_whole_frame() -> None:
+    df = make_frame()
+    chunks = [df.iloc[:1], df.iloc[1:3], df.iloc[3:]]
+    whole = consume([df], CardTotals(), MonthlyCashback(), WeekdayTotals("2021-01-01", "2021-02-28"))
+    parts = consume(chunks, CardTotals(), MonthlyCashback(), WeekdayTotals("2021-01-01", "2021-02-28"))
+
+    assert parts[0].result() == whole[0].result()
+    assert parts[1].result() == whole[1].result()
+    pd.testing.assert_frame_equal(parts[2].totals(), whole[2].totals())
+
+
+def test_card_totals() -> None:
+    assert CardTotals().update(make_frame()).result() == [
+        {"last_digits": "*7197", "total_spent": -125.0, "cashback": 3.0},
+        {"last_digits": "*5091", "total_spent": -50.0, "cashback": 0.0},
+    ]
+
+
+def test_monthly_cashback_excludes_categories() -> None:
+    assert MonthlyCashback().update(make_frame()).result() == {
+        (2021, 1): {"Супермаркеты": 1.0},
+        (2021, 2): {"Супермаркеты": 0.25, "Фастфуд": 0.1},
+    }
+
+
+def test_weekday_totals_period() -> None:
+    totals = WeekdayTotals("2021-01-01", "2021-01-31").update(make_frame()).totals()
+    assert totals["count"].tolist() == [0, 1, 0, 0, 0, 1, 0]
+    assert totals["sum"].tolist() == [0.0, -100.0, 0.0, 0.0, 0.0, -50.0, 0.0]
+
+
+def test_daily_totals_match_weekday_totals() -> None:
+    df = make_frame()
+    daily = DailyTotals().update(df.iloc[:2]).update(df.iloc[2:])
+    for start, end in [("2021-01-01", "2021-01-31"), ("2021-01-06", "2021-02-28"), ("2022-01-01", "2022-02-01")]:
+        pd.testing.assert_frame_equal(daily.weekday_totals(start, end), WeekdayTotals(start, end).update(df).totals())
+
+
+def test_top_transactions_keeps_first_of_equal_amounts() -> None:
+    df = pd.DataFrame(
+        {
+            "Дата платежа": ["01.01.2021", "02.01.2021", "03.01.2021", "04.01.2021", "05.01.2021"],
+            "Сумма операции": [-1.0, -5.0, -5.0, -3.0, None],
+            "Категория": ["a", "b", "c", "d", "e"],
+            "Описание": ["", "", "", "", ""],
+            "Сумма операции с округлением": [1.0, 5.0, 5.0, 3.0, None],
+        }
+    )
+    top = TopTransactions(limit=2)
+    for position in range(len(df)):
+        top.update(df.iloc[[position]])
+
+    assert [row[2] for row in top.result()] == ["b", "c"]
+    assert [row[2] for row in top.result(1)] == ["b"]
+    assert len(top.heap) == 2
+    with pytest.raises(ValueError):
+        top.result(3)
+
+
+def test_aggregate_engine_append() -> None:
+    df = make_frame()
+    engine = AggregateEngine(top_limit=3)
+    records = df.assign(**{"Дата операции": df["Дата операции"].dt.strftime("%d.%m.%Y %H:%M:%S")}).to_dict("records")
+    engine.append(records[:2])
+    fingerprint = engine.fingerprint
+    engine.append(pd.DataFrame(records[2:]))
+    engine.append([])
+
+    assert len(engine) == 4
+    assert engine.fingerprint != fingerprint
+    assert engine.card_totals() == CardTotals().update(df).result()
+    assert engine.cashback_by_month() == MonthlyCashback().update(df).result()
+    assert [row[3] for row in engine.top_transactions()] == ["Магнит", "Снятие", "Колхоз"]
+    assert isinstance(records[0]["Дата операции"], str)
+
+
+@pytest.mark.parametrize(
+    "read",
+    [
+        lambda engine: engine.card_totals(),
+        lambda engine: engine.cashback_by_month(),
+        lambda engine: engine.weekday_totals("2021-01-01", "2021-02-28"),
+        lambda engine: engine.top_transactions(),
+        lambda engine: engine.fingerprint,
+    ],
+)
+def test_aggregate_engine_reads_wait_for_append(read: Callable[[AggregateEngine], Any]) -> None:
+    engine = AggregateEngine().append(make_frame())
+    results = []
+    with engine._lock:
+        reader = threading.Thread(target=lambda: results.append(read(engine)))
+        reader.start()
+        reader.join(0.1)
+        assert reader.is_alive()
+    reader.join(5)
+    assert len(results) == 1
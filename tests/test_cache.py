@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas._testing import assert_frame_equal
+
+from src import cache
+from src.cache import cache_path
+from src.cache import file_mode
+from src.cache import invalidate_cache
+from src.cache import load_frame
+from src.cache import load_or_build
+from src.cache import save_frame
+from src.utils import read_excel
+from src.utils import read_excel_cached
+
+
+def test_save_and_load_frame_keeps_dtypes(tmp_path: Path) -> None:
+    df = pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(["31.12.2021 16:44:00", None], dayfirst=True),
+            "Категория": pd.Categorical(["Супермаркеты", "Переводы"]),
+            "Сумма платежа": [-160.89, 100.0],
+            "Бонусы (включая кэшбэк)": np.array([3, 0], dtype="int64"),
+            "Описание": ["Колхоз", np.nan],
+        }
+    )
+    path = str(tmp_path / "frame.npz")
+    save_frame(df, path, {"mtime_ns": 1, "size": 2})
+
+    assert_frame_equal(load_frame(path, {"mtime_ns": 1, "size": 2}), df)
+    assert load_frame(path, {"mtime_ns": 2, "size": 2}) is None
+
+
+def test_load_frame_not_existed_file(tmp_path: Path) -> None:
+    assert load_frame(str(tmp_path / "not_existed.npz")) is None
+
+
+def test_load_frame_truncated_file(tmp_path: Path) -> None:
+    path = str(tmp_path / "frame.npz")
+    save_frame(pd.DataFrame({"a": range(100)}), path, {})
+    with open(path, "rb") as file:
+        data = file.read()
+    with open(path, "wb") as file:
+        file.write(data[: len(data) // 2])
+
+    assert load_frame(path) is None
+
+
+def test_save_frame_concurrent_writes(tmp_path: Path) -> None:
+    path = str(tmp_path / "frame.npz")
+    frames = [pd.DataFrame({"a": range(size)}) for size in range(1, 50)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda df: save_frame(df, path, {}), frames))
+
+    assert len(load_frame(path)) in range(1, 50)
+    assert os.listdir(tmp_path) == ["frame.npz"]
+    assert os.stat(path).st_mode & 0o777 == file_mode()
+
+
+@pytest.mark.parametrize("proc_status", [cache.PROC_STATUS, "/nonexistent/status"])
+def test_file_mode_matches_open(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, proc_status: str) -> None:
+    monkeypatch.setattr(cache, "PROC_STATUS", proc_status)
+    monkeypatch.setattr(cache, "_file_mode", None)
+    umask = os.umask(0o027)
+    try:
+        (tmp_path / "plain.txt").write_text("")
+        mode = file_mode(str(tmp_path))
+    finally:
+        os.umask(umask)
+
+    assert mode == os.stat(tmp_path / "plain.txt").st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["plain.txt"]
+
+
+def test_load_or_build_rebuilds_after_source_change(tmp_path: Path) -> None:
+    source = tmp_path / "source.txt"
+    source.write_text("1")
+    calls = []
+
+    def builder() -> pd.DataFrame:
+        calls.append(1)
+        return pd.DataFrame({"a": [len(calls)]})
+
+    assert load_or_build(str(source), "source", builder, str(tmp_path))["a"][0] == 1
+    assert load_or_build(str(source), "source", builder, str(tmp_path))["a"][0] == 1
+    source.write_text("22")
+    assert load_or_build(str(source), "source", builder, str(tmp_path))["a"][0] == 2
+    assert len(calls) == 2
+
+
+def test_invalidate_cache(tmp_path: Path) -> None:
+    save_frame(pd.DataFrame({"a": [1]}), cache_path("frame", str(tmp_path)), {})
+
+    assert invalidate_cache("frame", str(tmp_path)) is True
+    assert invalidate_cache("frame", str(tmp_path)) is False
+
+
+def test_read_excel_cached(tmp_path: Path) -> None:
+    expected = read_excel("operations")
+
+    assert_frame_equal(read_excel_cached("operations", str(tmp_path)), expected)
+    assert_frame_equal(read_excel_cached("operations", str(tmp_path)), expected)
+
+
+def test_read_excel_cached_truncated_cache(tmp_path: Path) -> None:
+    expected = read_excel_cached("operations", str(tmp_path))
+    path = cache_path("operations", str(tmp_path))
+    with open(path, "r+b") as file:
+        file.truncate(os.path.getsize(path) // 2)
+
+    assert_frame_equal(read_excel_cached("operations", str(tmp_path)), expected)
+
+
+def test_read_excel_cached_not_existed_file(tmp_path: Path) -> None:
+    assert read_excel_cached("not_existed_file", str(tmp_path)).empty
@@ -0,0 +1,43 @@
+import logging
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src import config
+
+
+def test_load_env_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    env_file = tmp_path / ".env"
+    env_file.write_text("CONFIG_TEST_VALUE=from-file\n", encoding="utf-8")
+    monkeypatch.setattr(config, "_env_loaded", False)
+    monkeypatch.delenv("CONFIG_TEST_VALUE", raising=False)
+
+    assert config.load_env(str(env_file)) is True
+    assert config.env("CONFIG_TEST_VALUE") == "from-file"
+    env_file.write_text("CONFIG_TEST_VALUE=changed\n", encoding="utf-8")
+    assert config.load_env(str(env_file)) is False
+    assert config.env("CONFIG_TEST_VALUE") == "from-file"
+    monkeypatch.delenv("CONFIG_TEST_VALUE")
+
+
+def test_env_default(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "_env_loaded", True)
+    monkeypatch.delenv("CONFIG_TEST_MISSING", raising=False)
+    assert config.env("CONFIG_TEST_MISSING", "default") == "default"
+
+
+def test_setup_logging_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "_logging_configured", False)
+    monkeypatch.setattr(config, "_env_loaded", True)
+    monkeypatch.setattr(config, "logs_dir", str(tmp_path / "logs"))
+    monkeypatch.setenv("LOG_LEVELS", "src.config_test=ERROR")
+    with patch("src.config.start_queue_logging") as start, patch("src.config.apply_levels") as apply:
+        assert config.setup_logging("test", levels={"src.other_test": "INFO"}) is True
+        assert config.setup_logging("other") is False
+    start.assert_called_once()
+    handlers, level = start.call_args.args
+    assert handlers[0].baseFilename == str(tmp_path / "logs" / "test.log")
+    assert level == logging.DEBUG
+    apply.assert_called_once_with({"src.config_test": logging.ERROR, "src.other_test": logging.INFO})
+    handlers[0].close()
@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas._testing import assert_frame_equal
+
+import src.ingest
+from src.ingest import frame_from_rows
+from src.ingest import iter_chunks
+from src.ingest import iter_json_records
+from src.utils import read_excel
+
+RECORDS = [
+    {"Дата операции": "31.12.2021 16:44:00", "Дата платежа": "31.12.2021", "Сумма платежа": -160.89, "Кэшбэк": None},
+    {"Дата операции": "30.12.2021 10:00:00", "Дата платежа": None, "Сумма платежа": -64.0, "Кэшбэк": None},
+    {"Дата операции": "29.12.2021 22:32:24", "Дата платежа": "29.12.2021", "Сумма платежа": 20000.0, "Кэшбэк": None},
+]
+
+
+def test_frame_from_rows() -> None:
+    df = frame_from_rows([("a", None, 1), (None, None, 2)], ["x", "y", "z"])
+    assert df["x"].tolist()[0] == "a" and np.isnan(df["x"].tolist()[1])
+    assert df["y"].dtype == "float64"
+    assert df["z"].tolist() == [1, 2]
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_json_records(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, indent: int) -> None:
+    monkeypatch.setattr(src.ingest, "JSON_READ_SIZE", 16)
+    path = tmp_path / "operations.json"
+    path.write_text(json.dumps(RECORDS, ensure_ascii=False, indent=indent), encoding="utf-8")
+    assert list(iter_json_records(str(path))) == RECORDS
+
+
+def test_iter_json_records_lines_and_errors(tmp_path: Path) -> None:
+    lines = tmp_path / "operations.jsonl"
+    lines.write_text("\n".join(json.dumps(record, ensure_ascii=False) for record in RECORDS), encoding="utf-8")
+    assert list(iter_json_records(str(lines))) == RECORDS
+
+    broken = tmp_path / "broken.json"
+    broken.write_text('[{"a": 1}, {"a": ', encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_records(str(broken)))
+
+
+@pytest.mark.parametrize("extension", [".csv", ".json", ".jsonl"])
+def test_iter_chunks_formats(tmp_path: Path, extension: str) -> None:
+    path = tmp_path / ("operations" + extension)
+    df = pd.DataFrame(RECORDS)
+    if extension == ".csv":
+        df.to_csv(path, index=False, sep=";")
+    else:
+        df.to_json(path, orient="records", force_ascii=False, lines=extension == ".jsonl")
+
+    chunks = list(iter_chunks(str(path), chunksize=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    result = pd.concat(chunks, ignore_index=True)
+    assert result["Дата операции"].tolist() == list(pd.to_datetime(df["Дата операции"], format="%d.%m.%Y %H:%M:%S"))
+    assert result["Дата платежа"].isna().tolist() == [False, True, False]
+    assert result["Сумма платежа"].tolist() == [-160.89, -64.0, 20000.0]
+
+
+def test_iter_chunks_xlsx_matches_read_excel() -> None:
+    chunks = list(iter_chunks("data/operations.xlsx", chunksize=5000, typed=False))
+    assert [len(chunk) for chunk in chunks] == [5000, 1705]
+    assert_frame_equal(pd.concat(chunks, ignore_index=True), read_excel("operations"))
+
+
+def test_iter_chunks_unsupported_format() -> None:
+    with pytest.raises(ValueError):
+        list(iter_chunks("operations.txt"))
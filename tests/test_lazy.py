@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from src.lazy import LazyModule
+from src.lazy import lazy_import
+
+directory_name = Path(__file__).resolve().parent.parent
+
+
+def test_lazy_module_imports_on_first_attribute() -> None:
+    module = LazyModule("colorsys")
+    assert "not loaded" in repr(module)
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert "loaded" in repr(module) and "not loaded" not in repr(module)
+
+
+def test_lazy_module_own_attribute_has_priority() -> None:
+    module = LazyModule("json")
+    module.dumps = lambda value: "patched"
+    assert module.dumps(1) == "patched"
+    del module.dumps
+    assert module.dumps(1) == "1"
+
+
+def test_lazy_import_returns_imported_module() -> None:
+    assert lazy_import("json") is json
+    assert isinstance(lazy_import("module_that_is_not_imported_yet"), LazyModule)
+
+
+def test_import_does_not_load_heavy_modules() -> None:
+    code = (
+        "import sys, src.views, src.services, src.reports, src.market_cache; "
+        "print(sorted(name for name in ('pandas', 'numpy', 'requests', 'dotenv', 'black') if name in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=directory_name,
+        env={**os.environ, "PYTHONPATH": str(directory_name)},
+        check=True,
+    )
+    assert completed.stdout.strip() == "[]"
@@ -0,0 +1,74 @@
+import logging
+from pathlib import Path
+
+import pytest
+
+from src.logging_utils import lazy_repr
+from src.logging_utils import level_number
+from src.logging_utils import parse_levels
+from src.logging_utils import short_repr
+from src.logging_utils import start_queue_logging
+from src.logging_utils import stop_queue_logging
+
+
+def test_short_repr() -> None:
+    assert short_repr([1, 2]) == "[1, 2]"
+    assert short_repr("x" * 20, 10) == "xxxxxxxxxx... (str)"
+    assert len(short_repr(list(range(10_000)), 50)) <= 60
+
+
+def test_lazy_repr_formats_only_when_logged(caplog: pytest.LogCaptureFixture) -> None:
+    class Payload:
+        formatted = 0
+
+        def __repr__(self) -> str:
+            Payload.formatted += 1
+            return "payload"
+
+    logger = logging.getLogger("test_lazy_repr")
+    logger.setLevel(logging.WARNING)
+    logger.info("результат: %s", lazy_repr(Payload()))
+    assert Payload.formatted == 0
+
+    with caplog.at_level(logging.INFO, logger="test_lazy_repr"):
+        logger.info("результат: %s", lazy_repr(Payload()))
+    assert Payload.formatted >= 1
+    assert caplog.messages == ["результат: payload"]
+
+
+@pytest.mark.parametrize(
+    "spec, expected",
+    [
+        ("src.services=INFO, src.utils=warning", {"src.services": logging.INFO, "src.utils": logging.WARNING}),
+        ("", {}),
+        (None, {}),
+    ],
+)
+def test_parse_levels(spec: str, expected: dict) -> None:
+    assert parse_levels(spec) == expected
+
+
+@pytest.mark.parametrize("spec", ["src.services", "src.services=LOUD", "=INFO"])
+def test_parse_levels_invalid(spec: str) -> None:
+    with pytest.raises(ValueError):
+        parse_levels(spec)
+
+
+def test_level_number() -> None:
+    assert level_number(10) == logging.DEBUG
+    assert level_number("error") == logging.ERROR
+
+
+def test_queue_logging_writes_in_background(tmp_path: Path) -> None:
+    root = logging.getLogger()
+    level = root.level
+    handler = logging.FileHandler(tmp_path / "queue.log", encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(name)s %(message)s"))
+    try:
+        start_queue_logging([handler], logging.INFO)
+        logging.getLogger("src.test_queue").info("сообщение %s", 1)
+        logging.getLogger("src.test_queue").debug("не записывается")
+    finally:
+        stop_queue_logging()
+        root.setLevel(level)
+    assert (tmp_path / "queue.log").read_text(encoding="utf-8") == "src.test_queue сообщение 1\n"
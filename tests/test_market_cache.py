@@ -0,0 +1,105 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from src.market_cache import MarketDataCache
+from src.market_cache import get_cached_market_data
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_market_data_cache_fresh_value() -> None:
+    calls = []
+    cache = MarketDataCache(ttls={"rates": 10}, clock=FakeClock())
+
+    def fetcher() -> list[dict]:
+        calls.append(1)
+        return [{"currency": "USD", "rate": 70.0}]
+
+    assert cache.get("rates", fetcher) == [{"currency": "USD", "rate": 70.0}]
+    assert cache.get("rates", fetcher) == [{"currency": "USD", "rate": 70.0}]
+    assert len(calls) == 1
+
+
+def test_market_data_cache_stale_while_revalidate() -> None:
+    clock = FakeClock()
+    cache = MarketDataCache(ttls={"rates": 10}, clock=clock)
+    values = iter([[{"rate": 1}], [{"rate": 2}]])
+
+    assert cache.get("rates", lambda: next(values)) == [{"rate": 1}]
+    clock.now += 11
+    assert cache.get("rates", lambda: next(values)) == [{"rate": 1}]
+    cache.wait()
+    assert cache.get("rates", lambda: next(values)) == [{"rate": 2}]
+
+
+def test_market_data_cache_keeps_last_good_value() -> None:
+    cache = MarketDataCache(ttls={"rates": 10}, clock=FakeClock())
+    cache.refresh("rates", lambda: [{"rate": 1}])
+
+    assert cache.refresh("rates", lambda: [{}]) == [{"rate": 1}]
+    assert cache.refresh("stocks", lambda: [{}]) == [{}]
+
+
+def test_market_data_cache_persistence(tmp_path: Path) -> None:
+    path = str(tmp_path / "market.json")
+    MarketDataCache(persist_path=path).refresh("rates", lambda: [{"rate": 1}])
+
+    cache = MarketDataCache(persist_path=path)
+    assert cache.get("rates", lambda: [{"rate": 2}]) == [{"rate": 1}]
+    cache.invalidate("rates")
+    assert MarketDataCache(persist_path=path).get("rates", lambda: [{"rate": 2}]) == [{"rate": 2}]
+
+
+def test_market_data_cache_drops_malformed_entries(tmp_path: Path) -> None:
+    path = tmp_path / "market.json"
+    entries = {
+        "rates": {"value": [{"rate": 1}], "fetched_at": 1000.0},
+        "no_time": {"value": [{"rate": 1}]},
+        "text_time": {"value": [{"rate": 1}], "fetched_at": "1000"},
+        "no_value": {"fetched_at": 1000.0},
+        "not_dict": [1, 2],
+    }
+    path.write_text(json.dumps(entries), encoding="utf-8")
+    cache = MarketDataCache(persist_path=str(path), clock=FakeClock())
+
+    fetchers = {source: (lambda: [{"rate": 2}]) for source in entries}
+    assert cache.get_many(fetchers) == {
+        "rates": [{"rate": 1}],
+        "no_time": [{"rate": 2}],
+        "text_time": [{"rate": 2}],
+        "no_value": [{"rate": 2}],
+        "not_dict": [{"rate": 2}],
+    }
+
+
+def test_market_data_cache_ignores_non_dict_file(tmp_path: Path) -> None:
+    path = tmp_path / "market.json"
+    path.write_text("[1, 2]", encoding="utf-8")
+    cache = MarketDataCache(persist_path=str(path))
+    assert cache.get("rates", lambda: [{"rate": 2}]) == [{"rate": 2}]
+
+
+def test_market_data_cache_concurrent_saves(tmp_path: Path) -> None:
+    path = str(tmp_path / "market.json")
+    cache = MarketDataCache(persist_path=path)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda number: cache.refresh(f"source{number}", lambda: [{"rate": number}]), range(40)))
+
+    with open(path, encoding="utf-8") as file:
+        assert len(json.load(file)) == 40
+    assert os.listdir(tmp_path) == ["market.json"]
+
+
+def test_get_cached_market_data(quote_stub_urls: ThreadingHTTPServer) -> None:
+    rates, prices = get_cached_market_data(MarketDataCache())
+    assert rates == [{"currency": "EUR", "rate": 70.24}, {"currency": "USD", "rate": 70.24}]
+    assert len(prices) == 5
@@ -0,0 +1,86 @@
+from typing import Iterator
+from unittest.mock import patch
+
+import pytest
+
+from src import metrics
+from src.metrics import instrument
+from src.metrics import metrics_prometheus
+from src.metrics import metrics_snapshot
+from src.metrics import record
+from src.metrics import timed
+from src.store import TransactionStore
+from src.utils import read_excel
+from src.views import get_page_main_datas
+
+
+@pytest.fixture
+def enabled_metrics(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setattr(metrics, "metrics_enabled", True)
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+def test_timed_records_histogram(enabled_metrics: None) -> None:
+    record("stage", 0.003)
+    record("stage", 20.0)
+    with pytest.raises(ValueError):
+        with timed("stage"):
+            raise ValueError("ошибка")
+    stats = metrics_snapshot()["stages"]["stage"]
+
+    assert stats["count"] == 3
+    assert stats["errors"] == 1
+    assert stats["max_seconds"] == 20.0
+    assert stats["buckets"]["0.001"] == 1
+    assert stats["buckets"]["0.005"] == 2
+    assert stats["buckets"]["10.0"] == 2
+    assert stats["buckets"]["+Inf"] == 3
+
+
+def test_instrument(enabled_metrics: None) -> None:
+    @instrument()
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    assert add(1, 2) == 3
+    assert add.__name__ == "add"
+    assert metrics_snapshot()["stages"]["test_metrics.test_instrument.<locals>.add"]["count"] == 1
+
+
+def test_metrics_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(metrics, "metrics_enabled", False)
+    metrics.reset_metrics()
+    with timed("stage"):
+        read_excel("operations_missing")
+
+    assert metrics_snapshot() == {"enabled": False, "stages": {}}
+
+
+def test_metrics_prometheus(enabled_metrics: None) -> None:
+    record('stage "a"', 0.02)
+    text = metrics_prometheus()
+
+    assert 'dashboard_stage_duration_seconds_bucket{stage="stage \\"a\\"",le="0.01"} 0' in text
+    assert 'dashboard_stage_duration_seconds_bucket{stage="stage \\"a\\"",le="+Inf"} 1' in text
+    assert 'dashboard_stage_duration_seconds_count{stage="stage \\"a\\""} 1' in text
+    assert 'dashboard_stage_errors_total{stage="stage \\"a\\""} 0' in text
+
+
+def test_main_page_stages(enabled_metrics: None, tmp_path: str) -> None:
+    store = TransactionStore("operations", str(tmp_path))
+    with patch("src.views.get_cached_market_data", return_value=([], [])):
+        get_page_main_datas("2021-12-10 08:16:00", store)
+    stages = metrics_snapshot()["stages"]
+
+    for stage in [
+        "views.get_page_main_datas",
+        "views.window",
+        "views.market_data",
+        "views.serialize",
+        "utils.top_transactions_by_paymant",
+        "utils.get_each_cards_datas",
+        "store.to_typed_frame",
+    ]:
+        assert stages[stage]["count"] == 1
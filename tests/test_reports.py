@@ -1,18 +1,35 @@
 import datetime
 import json
+import math
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import NoReturn
+from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 import pytest
 from pandas._testing import assert_frame_equal
 
+from src import reports
+from src.aggregates import AggregateEngine
+from src.cache import file_mode
+from src.reports import ReportWriter
 from src.reports import filtered_by_date
+from src.reports import flush_reports
 from src.reports import log_json_data
+from src.reports import memoize_report
+from src.reports import result_digest
 from src.reports import spending_by_category
 from src.reports import spending_by_weekday
 from src.reports import spending_by_workday
+from src.reports import weekday_summary
+from src.reports import weekday_summary_from_chunks
+from src.reports import write_json_atomic
+from src.store import own_frame
+from src.utils import read_excel
 
 
 def test_filtered_by_date(reports_tests_data: pd.DataFrame) -> None:
@@ -94,3 +111,287 @@ def test_log_to_file_decorator_invalid() -> None:
 
     with pytest.raises(AssertionError):
         assert my_function() == ""
+
+
+def test_weekday_summary(reports_tests_data: pd.DataFrame) -> None:
+    summary = weekday_summary(reports_tests_data, "23.04.2021")
+    assert summary["weekday_counts"][5] == {"Saturday": 2}
+    assert summary["weekend_mean"] == 222.98
+    assert summary["weekend_count"] == 2
+    assert summary["workday_count"] == 0
+    assert math.isnan(summary["workday_mean"])
+
+
+def test_weekday_summary_invalid() -> None:
+    assert weekday_summary(pd.DataFrame(), "23.04.2021") == {}
+
+
+def test_filtered_by_date_does_not_mutate_input() -> None:
+    df = pd.DataFrame(
+        {"Дата платежа": ["17.04.2021", "10.04.2021", "11.05.2021"], "Сумма платежа": [345.96, 100, 134.14]}
+    )
+    first = filtered_by_date(df, "23.04.2021")
+    second = filtered_by_date(df, "23.04.2021")
+
+    assert df["Дата платежа"].tolist() == ["17.04.2021", "10.04.2021", "11.05.2021"]
+    assert first["Дата платежа"].tolist() == [pd.Timestamp("2021-04-17"), pd.Timestamp("2021-04-10")]
+    assert_frame_equal(first, second)
+
+
+def test_filtered_by_date_parses_dates_of_selected_rows() -> None:
+    df = pd.DataFrame(
+        {
+            "Дата платежа": ["15.12.2021", "01.01.2021", "20.12.2021", "01.12.2021"],
+            "Сумма платежа": [2.0, 1.0, 3.0, 4.0],
+        }
+    )
+    own_frame(df, "memory:test")
+    result = filtered_by_date(df, "31.12.2021")
+
+    assert result["Сумма платежа"].tolist() == [2.0, 3.0, 4.0]
+    assert result["Дата платежа"].dt.strftime("%d.%m.%Y").tolist() == ["15.12.2021", "20.12.2021", "01.12.2021"]
+
+
+def test_filtered_by_date_returns_view_for_sorted_store_dates() -> None:
+    df = pd.DataFrame(
+        {
+            "Дата платежа": pd.to_datetime(["10.04.2021", "17.04.2021", "11.05.2021"], dayfirst=True),
+            "Сумма платежа": [100.0, 345.96, 134.14],
+        }
+    )
+    own_frame(df, "memory:test")
+    result = filtered_by_date(df, "23.04.2021")
+
+    assert result["Сумма платежа"].tolist() == [100.0, 345.96]
+    assert np.shares_memory(result["Сумма платежа"].to_numpy(), df["Сумма платежа"].to_numpy())
+
+
+def test_write_json_atomic_keeps_umask_mode(tmp_path: Path) -> None:
+    path = str(tmp_path / "report.json")
+    write_json_atomic(path, {"a": 1})
+
+    assert os.stat(path).st_mode & 0o777 == file_mode()
+    assert os.listdir(tmp_path) == ["report.json"]
+
+
+def test_log_json_data_async_write(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("src.reports.directory_name", tmp_path)
+
+    @log_json_data("async_log", async_write=True)
+    def my_function(x: int) -> list[int]:
+        return [x] * 3
+
+    for x in range(50):
+        my_function(x)
+    flush_reports()
+
+    with open(tmp_path / "async_log.json", encoding="utf-8") as f:
+        assert json.load(f) == [49, 49, 49]
+    assert [path.name for path in tmp_path.iterdir()] == ["async_log.json"]
+
+
+def test_report_writer_coalesces_writes(tmp_path: Path) -> None:
+    writer = ReportWriter()
+    path = str(tmp_path / "report.json")
+    started, release = threading.Event(), threading.Event()
+    writes = []
+
+    def slow_write(file_path: str, result: int) -> None:
+        started.set()
+        release.wait(5)
+        writes.append(result)
+
+    with patch("src.reports.write_json_atomic", side_effect=slow_write):
+        writer.submit(path, 0)
+        started.wait(5)
+        for x in range(1, 11):
+            writer.submit(path, x)
+        release.set()
+        writer.flush()
+    assert writes == [0, 10]
+
+
+def test_memoize_report_hits_and_misses() -> None:
+    calls = []
+
+    @memoize_report(maxsize=2)
+    def report(df: pd.DataFrame, category: str, date: str = "01.01.2021") -> pd.DataFrame:
+        calls.append((category, date))
+        return df[df["Категория"] == category]
+
+    df = pd.DataFrame({"Категория": ["Еда", "Такси"], "Сумма платежа": [1.0, 2.0]})
+    own_frame(df, "memory:test")
+    first = report(df, "Еда")
+    second = report(df, category="Еда", date="01.01.2021")
+    report(df, "Такси")
+    report(df, "Еда", "02.01.2021")
+
+    assert_frame_equal(first, second)
+    assert first is not second
+    assert calls == [("Еда", "01.01.2021"), ("Такси", "01.01.2021"), ("Еда", "02.01.2021")]
+    assert report.cache_info()["hits"] == 1
+    assert report.cache_info()["size"] == 2
+    report.cache_clear()
+    assert report.cache_info()["size"] == 0
+
+
+def test_memoize_report_changed_data_is_miss() -> None:
+    @memoize_report()
+    def total(df: pd.DataFrame) -> float:
+        return float(df["Сумма платежа"].sum())
+
+    first = pd.DataFrame({"Сумма платежа": [1.0, 2.0]})
+    second = pd.DataFrame({"Сумма платежа": [1.0, 5.0]})
+    own_frame(first, "memory:first")
+    own_frame(second, "memory:second")
+    assert total(first) == 3.0
+    assert total(second) == 6.0
+    assert total.cache_info()["misses"] == 2
+
+
+def test_memoize_report_skips_frames_without_owner() -> None:
+    @memoize_report()
+    def total(df: pd.DataFrame) -> float:
+        return float(df["Сумма платежа"].sum())
+
+    df = pd.DataFrame({"Сумма платежа": [1.0, 2.0]})
+    assert total(df) == 3.0
+    df.loc[0, "Сумма платежа"] = -1000
+    assert total(df) == -998.0
+    info = total.cache_info()
+    assert (info["hits"], info["misses"], info["size"]) == (0, 0, 0)
+
+
+def test_memoize_report_uses_registered_fingerprint() -> None:
+    @memoize_report()
+    def total(df: pd.DataFrame) -> float:
+        return float(df["Сумма платежа"].sum())
+
+    first = pd.DataFrame({"Сумма платежа": [1.0]})
+    second = pd.DataFrame({"Сумма платежа": [2.0]})
+    own_frame(first, "file:test:1")
+    own_frame(second, "file:test:1")
+    assert total(first) == 1.0
+    assert total(second) == 1.0
+
+
+def test_memoize_report_max_bytes() -> None:
+    @memoize_report(max_bytes=150)
+    def text(df: pd.DataFrame, size: int) -> str:
+        return "x" * size
+
+    df = pd.DataFrame({"a": [1]})
+    own_frame(df, "memory:test")
+    text(df, 100)
+    text(df, 100)
+    text(df, 10)
+    text(df, 80)
+    assert text.cache_info()["size"] == 2
+    assert text.cache_info()["bytes"] == 90
+
+
+def test_spending_by_weekday_memoized(reports_tests_data: pd.DataFrame) -> None:
+    spending_by_weekday.cache_clear()
+    own_frame(reports_tests_data, "memory:reports")
+    first = spending_by_weekday(reports_tests_data, "23.04.2021")
+    assert spending_by_weekday(reports_tests_data, date="23.04.2021") == first
+    assert spending_by_weekday.cache_info()["hits"] == 1
+
+
+def test_spending_by_weekday_sees_in_place_changes(reports_tests_data: pd.DataFrame) -> None:
+    first = spending_by_weekday(reports_tests_data, "23.04.2021")
+    reports_tests_data.loc[0, "Сумма платежа"] = -1000
+    assert spending_by_weekday(reports_tests_data, "23.04.2021") != first
+
+
+def test_log_json_data_skips_unchanged_result(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("src.reports.directory_name", tmp_path)
+    writes = []
+
+    @log_json_data("same_log")
+    @memoize_report()
+    def report(df: pd.DataFrame) -> str:
+        return json.dumps(df["a"].tolist())
+
+    def write(path: str, result: str) -> None:
+        writes.append(result)
+        Path(path).write_text(json.dumps(result))
+
+    df = pd.DataFrame({"a": [1, 2]})
+    own_frame(df, "memory:first")
+    other = pd.DataFrame({"a": [3]})
+    own_frame(other, "memory:second")
+    with patch("src.reports.write_json_atomic", side_effect=write):
+        report(df)
+        report(df)
+        report(other)
+    assert writes == ["[1, 2]", "[3]"]
+
+
+def test_log_json_data_keeps_bounded_results(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("src.reports.directory_name", tmp_path)
+    monkeypatch.setattr("src.reports._written_digests", OrderedDict())
+    monkeypatch.setattr("src.reports.LAST_RESULTS_SIZE", 2)
+
+    def report(value: str) -> str:
+        return value
+
+    with patch("src.reports.write_json_atomic"):
+        for name in ["first", "second", "third"]:
+            log_json_data(name)(report)(name)
+    assert list(reports._written_digests) == [str(tmp_path / "second.json"), str(tmp_path / "third.json")]
+    assert all(len(digest) == 32 for digest in reports._written_digests.values())
+
+
+def test_log_json_data_retries_after_failed_async_write(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("src.reports.directory_name", tmp_path)
+    path = tmp_path / "retry.json"
+    path.write_text(json.dumps("old"))
+    attempts = []
+
+    def write(target: str, result: str) -> None:
+        attempts.append(result)
+        if len(attempts) == 1:
+            raise OSError("диск заполнен")
+        Path(target).write_text(json.dumps(result))
+
+    report = log_json_data("retry", async_write=True)(lambda value: value)
+    with patch("src.reports.write_json_atomic", side_effect=write):
+        report("new")
+        flush_reports()
+        report("new")
+        flush_reports()
+        report("new")
+        flush_reports()
+    assert attempts == ["new", "new"]
+    assert json.loads(path.read_text()) == "new"
+
+
+def test_result_digest() -> None:
+    assert result_digest({"a": [1]}) == result_digest({"a": [1]})
+    assert result_digest(1) != result_digest(1.0)
+    assert result_digest(pd.DataFrame({"a": [1]})) is None
+
+
+def test_weekday_summary_from_chunks(reports_tests_data: pd.DataFrame) -> None:
+    df = reports_tests_data.assign(
+        **{"Дата платежа": pd.to_datetime(reports_tests_data["Дата платежа"], dayfirst=True)}
+    )
+    chunks = [df.iloc[:2], df.iloc[2:]]
+    expected = weekday_summary(reports_tests_data, "23.04.2021")
+    result = weekday_summary_from_chunks(chunks, "23.04.2021")
+    assert result["weekday_counts"] == expected["weekday_counts"]
+    assert result["weekend_mean"] == expected["weekend_mean"]
+    assert weekday_summary_from_chunks([pd.DataFrame()], "23.04.2021") == {}
+
+
+def test_weekday_reports_from_engine() -> None:
+    trans = read_excel("operations")
+    engine = AggregateEngine()
+    engine.append(trans.iloc[3000:])
+    first = spending_by_weekday(engine, "31.12.2021")
+    engine.append(trans.iloc[:3000])
+
+    assert first != spending_by_weekday(engine, "31.12.2021")
+    assert spending_by_weekday(engine, "31.12.2021") == spending_by_weekday(trans, "31.12.2021")
+    assert spending_by_workday(engine, "31.12.2021") == spending_by_workday(trans, "31.12.2021")
@@ -0,0 +1,89 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_weekday
+from src.reports import spending_by_workday
+from src.rollup import MonthlyRollup
+from src.rollup import build_rollup
+from src.rollup import split_period
+from src.services import cashback_by_month
+from src.services import raised_cashback_for_categories
+from src.store import TransactionStore
+from src.utils import get_each_cards_datas
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory: pytest.TempPathFactory) -> TransactionStore:
+    return TransactionStore("operations", str(tmp_path_factory.mktemp("cache"))).load()
+
+
+@pytest.mark.parametrize(
+    "start, end, months, head, tail",
+    [
+        ("2021-09-01", "2021-11-30 23:59:59.999999999", [24260, 24261, 24262], None, None),
+        ("2021-01-23", "2021-04-23", [24253, 24254], "2021-01-23", "2021-04-01"),
+        ("2021-12-01", "2021-12-10 08:16:00", [], None, "2021-12-01"),
+        ("2021-02-01", "2021-01-01", [], None, None),
+    ],
+)
+def test_split_period(start: str, end: str, months: list, head: str, tail: str) -> None:
+    result = split_period(start, end)
+    assert result[0] == months
+    assert (result[1][0] if result[1] else None) == (pd.Timestamp(head) if head else None)
+    assert (result[2][0] if result[2] else None) == (pd.Timestamp(tail) if tail else None)
+
+
+def test_build_rollup(store: TransactionStore) -> None:
+    cube = build_rollup(store.raw, "Дата операции")
+    assert cube["rows"].sum() == len(store.raw)
+    assert cube["payment_sum"].sum() == pytest.approx(store.raw["Сумма платежа"].sum())
+    assert cube[["year", "month", "weekday"]].dtypes.tolist() == ["int64"] * 3
+
+
+def test_rollup_matches_transactions(store: TransactionStore) -> None:
+    rollup = store.rollup
+    assert cashback_by_month(rollup) == cashback_by_month(store.raw)
+    assert raised_cashback_for_categories(rollup, 2021, 12) == raised_cashback_for_categories(store.raw, 2021, 12)
+    for date in ["23.04.2021", "31.12.2021", "30.11.2021", "01.01.2000"]:
+        assert spending_by_weekday.__wrapped__(rollup, date) == spending_by_weekday.__wrapped__(store.raw, date)
+        assert spending_by_workday.__wrapped__(rollup, date) == spending_by_workday.__wrapped__(store.raw, date)
+
+
+def test_rollup_card_totals(store: TransactionStore) -> None:
+    start, end = pd.Timestamp("2021-10-15"), pd.Timestamp("2021-12-31 23:59:59")
+    for result, expected in [
+        (get_each_cards_datas(store.rollup), get_each_cards_datas(store.frame)),
+        (store.rollup.card_totals(start, end), get_each_cards_datas(store.window(start, end))),
+    ]:
+        assert [card["last_digits"] for card in result] == [card["last_digits"] for card in expected]
+        assert [card["total_spent"] for card in result] == pytest.approx([card["total_spent"] for card in expected])
+        assert [card["cashback"] for card in result] == [card["cashback"] for card in expected]
+
+
+def test_rollup_is_persisted(store: TransactionStore) -> None:
+    store.rollup
+    assert os.path.exists(Path(store.cache_dir) / "operations.rollup1.operation.npz")
+    loaded = TransactionStore("operations", store.cache_dir).load().rollup
+    pd.testing.assert_frame_equal(loaded.cubes["Дата платежа"], store.rollup.cubes["Дата платежа"])
+    assert loaded.fingerprint == store.rollup.fingerprint
+
+
+def test_rollup_from_frame() -> None:
+    raw = pd.DataFrame(
+        {
+            "Дата операции": ["31.12.2021 16:44:00", "30.11.2021 10:00:00"],
+            "Дата платежа": ["31.12.2021", "30.11.2021"],
+            "Номер карты": ["*7197", None],
+            "Сумма платежа": [-160.89, -64.0],
+            "Категория": ["Супермаркеты", "Супермаркеты"],
+            "Бонусы (включая кэшбэк)": [3, 1],
+            "Сумма операции с округлением": [160.89, 64.0],
+        }
+    )
+    rollup = TransactionStore.from_frame(raw).rollup
+    assert isinstance(rollup, MonthlyRollup)
+    assert rollup.cashback_by_month() == {(2021, 12): {"Супермаркеты": 1.61}, (2021, 11): {"Супермаркеты": 0.64}}
+    assert rollup.card_totals() == [{"last_digits": "*7197", "total_spent": -160.89, "cashback": 3.0}]
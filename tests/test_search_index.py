@@ -0,0 +1,71 @@
+import pytest
+
+from src.search_index import SearchIndex
+from src.search_index import classify
+from src.search_index import get_search_index
+from src.search_index import get_transaction_tags
+from src.search_index import is_literal
+from src.store import OwnedRecords
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [("Валерий", [0, 2]), ("валерий", [0, 2]), ("555-55", [1, 2]), ("6", [0]), ("Дата", []), ("Мобайл", [1, 2])],
+)
+def test_search_index_literal(data_for_search: list[dict], query: str, expected: list[int]) -> None:
+    assert SearchIndex(data_for_search).search_positions(query) == expected
+
+
+@pytest.mark.parametrize("query, expected", [(r"\+7 \d{3}", [1, 2]), ("^2021-05", [1, 2]), ("А\\.$", [0, 1])])
+def test_search_index_regex(data_for_search: list[dict], query: str, expected: list[int]) -> None:
+    assert SearchIndex(data_for_search).search_positions(query) == expected
+
+
+def test_is_literal() -> None:
+    assert is_literal("Тинькофф Мобайл")
+    assert not is_literal("+7")
+
+
+def test_get_search_index_is_reused_for_owned_records(data_for_search: list[dict]) -> None:
+    first = OwnedRecords(data_for_search, "memory:first:records")
+    second = OwnedRecords(data_for_search, "memory:second:records")
+    index = get_search_index(first)
+    other = get_search_index(second)
+    assert get_search_index(first) is index
+    assert get_search_index(second) is other
+    assert get_search_index(OwnedRecords(data_for_search, "memory:third:records")) is not index
+
+
+def test_get_search_index_sees_in_place_changes(data_for_search: list[dict]) -> None:
+    transactions = [dict(transaction) for transaction in data_for_search]
+    assert get_search_index(transactions).search("Колхоз") == []
+    transactions[0]["Описание"] = "Колхоз"
+    assert get_search_index(transactions).search("Колхоз") == [transactions[0]]
+    assert not get_search_index(transactions).indexed
+
+
+def test_classify() -> None:
+    transaction = {"Категория": "Переводы", "Описание": "Валерий А.", "Комментарий": "+7 995 555-55-55"}
+    assert classify(transaction) == frozenset({"phone", "person_transfer"})
+    assert classify({"Категория": "Переводы", "Комментарий": "Валерий А."}) == frozenset()
+    assert classify({}) == frozenset()
+
+
+def test_get_transaction_tags(data_for_search: list[dict]) -> None:
+    assert get_transaction_tags(data_for_search) == [
+        frozenset({"person_transfer"}),
+        frozenset({"phone"}),
+        frozenset({"phone", "person_transfer"}),
+    ]
+
+
+def test_get_transaction_tags_sees_in_place_changes(data_for_search: list[dict]) -> None:
+    transactions = [dict(transaction) for transaction in data_for_search]
+    assert get_transaction_tags(transactions)[0] == frozenset({"person_transfer"})
+    transactions[0]["Комментарий"] = "+7 921 11-22-33"
+    assert get_transaction_tags(transactions)[0] == frozenset({"phone", "person_transfer"})
+
+
+def test_get_transaction_tags_is_reused_for_owned_records(data_for_search: list[dict]) -> None:
+    records = OwnedRecords(data_for_search, "memory:tags:records")
+    assert get_transaction_tags(records) is get_transaction_tags(records)
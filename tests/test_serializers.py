@@ -0,0 +1,63 @@
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.serializers import dumps
+from src.serializers import frame_to_json
+from src.serializers import json_default
+from src.serializers import json_settings
+
+
+def test_dumps_modes() -> None:
+    data = [{"Категория": "Супермаркеты", "Сумма": -1.5}]
+    assert dumps(data) == json.dumps(data, ensure_ascii=False, indent=4)
+    assert dumps(data, mode="compact") == '[{"Категория":"Супермаркеты","Сумма":-1.5}]'
+
+
+def test_dumps_numpy_and_pandas_values() -> None:
+    data = {
+        "count": np.int64(3),
+        "mean": np.float32(0.5),
+        "flag": np.bool_(True),
+        "values": np.array([1, 2]),
+        "date": pd.Timestamp("2021-12-31 16:44:00"),
+        "day": datetime.date(2021, 12, 31),
+        "missing": pd.NaT,
+    }
+    assert json.loads(dumps(data, mode="compact")) == {
+        "count": 3,
+        "mean": 0.5,
+        "flag": True,
+        "values": [1, 2],
+        "date": "2021-12-31T16:44:00",
+        "day": "2021-12-31",
+        "missing": None,
+    }
+    with pytest.raises(TypeError):
+        json_default(object())
+
+
+def test_json_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("JSON_MODE", "compact")
+    assert json_settings()["mode"] == "compact"
+    assert dumps({"a": 1}) == '{"a":1}'
+    monkeypatch.setattr("src.serializers.json_mode", "pretty")
+    assert dumps({"a": 1}) == '{\n    "a": 1\n}'
+    monkeypatch.setattr("src.serializers.json_mode", "fast")
+    with pytest.raises(ValueError):
+        json_settings()
+
+
+def test_dumps_orjson_fallback(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("src.serializers._orjson_checked", True)
+    monkeypatch.setattr("src.serializers._orjson", None)
+    assert dumps({"a": np.int64(1)}, mode="compact", backend="orjson") == '{"a":1}'
+
+
+def test_frame_to_json() -> None:
+    df = pd.DataFrame({"Категория": ["Фастфуд"], "Сумма платежа": [-10.0]})
+    assert frame_to_json(df, mode="compact") == '[{"Категория":"Фастфуд","Сумма платежа":-10.0}]'
+    assert json.loads(frame_to_json(df, mode="pretty")) == json.loads(frame_to_json(df, mode="compact"))
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from typing import Callable
+
+import pandas as pd
+import pytest
+
+from src.market_cache import MarketDataCache
+from src.metrics import reset_metrics
+from src.server import DashboardServer
+from src.utils import directory_name
+
+
+@pytest.fixture
+def operations_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    source = os.path.join(directory_name, "data", "operations.xlsx")
+    os.makedirs(tmp_path / "data")
+    pd.read_excel(source, nrows=300).to_excel(tmp_path / "data" / "operations.xlsx", index=False)
+    monkeypatch.setattr("src.utils.directory_name", str(tmp_path))
+    monkeypatch.setattr("src.store.directory_name", str(tmp_path))
+    return tmp_path
+
+
+def fetch(port: int, path: str) -> tuple[int, Any]:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=30) as response:
+            return response.status, json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as ex:
+        return ex.code, json.loads(ex.read().decode("utf-8"))
+
+
+def run_server(operations_dir: Path, scenario: Callable[[DashboardServer], Any]) -> Any:
+    async def main() -> Any:
+        server = DashboardServer(
+            port=0, reload_interval=0.05, cache_dir=str(operations_dir / "cache"), market_cache=MarketDataCache()
+        )
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_server_endpoints(operations_dir: Path, quote_stub_urls: ThreadingHTTPServer) -> None:
+    paths = [
+        "/?date=2021-12-10%2008:16:00",
+        "/reports/category?category=%D0%A1%D1%83%D0%BF%D0%B5%D1%80%D0%BC%D0%B0%D1%80%D0%BA%D0%B5%D1%82%D1%8B"
+        "&date=31.12.2021",
+        "/reports/weekday?date=31.12.2021",
+        "/reports/workday?date=31.12.2021",
+        "/services/search?query=%D0%9C%D0%B0%D0%B3%D0%BD%D0%B8%D1%82",
+        "/services/phones",
+        "/services/persons",
+        "/services/investment?month=2021-12&limit=50",
+        "/services/cashback?year=2021&month=12",
+    ]
+
+    async def scenario(server: DashboardServer) -> list:
+        return await asyncio.gather(*(asyncio.to_thread(fetch, server.port, path) for path in paths))
+
+    responses = run_server(operations_dir, scenario)
+
+    assert [status for status, _ in responses] == [200] * len(paths)
+    main_page = responses[0][1]
+    assert main_page["currency_rates"] == [{"currency": "EUR", "rate": 70.24}, {"currency": "USD", "rate": 70.24}]
+    assert len(main_page["stock_prices"]) == 5
+    assert all(row["Категория"] == "Супермаркеты" for row in responses[1][1])
+    assert len(responses[2][1]) == 7
+    assert set(responses[3][1]) == {"рабочий день", "выходной день"}
+    assert responses[7][1]["month"] == "2021-12"
+
+
+def test_server_metrics(
+    operations_dir: Path, quote_stub_urls: ThreadingHTTPServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("src.metrics.metrics_enabled", True)
+    reset_metrics()
+
+    def fetch_text(port: int, path: str) -> tuple[str, str]:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=30) as response:
+            return response.headers["Content-Type"], response.read().decode("utf-8")
+
+    async def scenario(server: DashboardServer) -> tuple:
+        await asyncio.to_thread(fetch, server.port, "/services/phones")
+        text = await asyncio.to_thread(fetch_text, server.port, "/metrics?format=prometheus")
+        return await asyncio.to_thread(fetch, server.port, "/metrics"), text
+
+    (status, snapshot), (content_type, text) = run_server(operations_dir, scenario)
+
+    assert status == 200
+    assert snapshot["stages"]["server.phones"]["count"] == 1
+    assert snapshot["stages"]["services.search_by_phonenumber"]["count"] == 1
+    assert content_type.startswith("text/plain")
+    assert 'dashboard_stage_duration_seconds_count{stage="server.phones"} 1' in text
+
+
+def test_server_errors(operations_dir: Path, quote_stub_urls: ThreadingHTTPServer) -> None:
+    async def scenario(server: DashboardServer) -> list:
+        paths = [
+            "/unknown",
+            "/services/search",
+            "/services/cashback?year=abc&month=12",
+            "/?date=bad",
+            "/reports/weekday?date=2021-12-31",
+            "/reports/workday?date=31.13.2021",
+            "/reports/category?category=%D0%A4%D0%B0%D1%81%D1%82%D1%84%D1%83%D0%B4&date=31/12/2021",
+        ]
+        return [await asyncio.to_thread(fetch, server.port, path) for path in paths]
+
+    statuses = [status for status, _ in run_server(operations_dir, scenario)]
+
+    assert statuses == [404, 400, 400, 400, 400, 400, 400]
+
+
+def test_server_rejects_long_request_line(operations_dir: Path, quote_stub_urls: ThreadingHTTPServer) -> None:
+    async def scenario(server: DashboardServer) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"GET /" + b"a" * 70000 + b" HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    response = run_server(operations_dir, scenario)
+
+    assert response.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+    assert json.loads(response.split(b"\r\n\r\n", 1)[1]) == {"error": "некорректный запрос"}
+
+
+def test_server_reloads_changed_file(operations_dir: Path, quote_stub_urls: ThreadingHTTPServer) -> None:
+    excel_file = operations_dir / "data" / "operations.xlsx"
+
+    async def scenario(server: DashboardServer) -> tuple:
+        old_store = server.store
+        pd.read_excel(excel_file).head(100).to_excel(excel_file, index=False)
+        for _ in range(200):
+            if server.reloads:
+                break
+            await asyncio.sleep(0.05)
+        status, _ = await asyncio.to_thread(fetch, server.port, "/services/phones")
+        return old_store, server.store, status
+
+    old_store, new_store, status = run_server(operations_dir, scenario)
+
+    assert len(old_store.raw) == 300
+    assert len(new_store.raw) == 100
+    assert status == 200
@@ -1,12 +1,21 @@
 import json
 
+import pandas as pd
 import pytest
 
+from src.aggregates import AggregateEngine
+from src.services import cashback_by_month
+from src.services import cashback_by_month_from_chunks
+from src.services import cashback_table
 from src.services import investment_bank
+from src.services import investment_bank_matrix
 from src.services import raised_cashback_for_categories
 from src.services import search_by_name
 from src.services import search_by_phonenumber
 from src.services import simple_search
+from src.store import TransactionStore
+from src.store import to_typed_frame
+from src.utils import read_excel
 
 
 def test_simple_search(data_for_search: list[dict]) -> None:
@@ -82,3 +91,140 @@ def test_raised_cashback_for_categories(data_for_cashback: list[dict]) -> None:
 
 def test_raised_cashback_for_categories_invalid() -> None:
     assert raised_cashback_for_categories([{}], 2021, 12) == ""
+
+
+def test_raised_cashback_for_categories_with_typed_dataframe(data_for_cashback: list[dict]) -> None:
+    df = to_typed_frame(pd.DataFrame(data_for_cashback))
+    data = {"Пере": 3.46, "Переводы": 2.34}
+    expected = json.dumps(data, ensure_ascii=False, indent=4)
+    assert raised_cashback_for_categories(df, 2021, 12) == expected
+
+
+def test_search_by_name_with_description_column() -> None:
+    transactions = [
+        {"Категория": "Переводы", "Описание": "Сергей З."},
+        {"Категория": "Супермаркеты", "Описание": "Артем П."},
+        {"Категория": "Переводы", "Описание": "Перевод Кредитная карта. ТП 10.2 RUR"},
+    ]
+    expected = json.dumps(transactions[:1], ensure_ascii=False, indent=4)
+    assert search_by_name(transactions) == expected
+
+
+@pytest.mark.parametrize("month", ["2021-05", "2021-6-", "2021-06"])
+@pytest.mark.parametrize("limit", [10, 50, 100])
+def test_investment_bank_list_and_frame_parity(data_for_search: list[dict], month: str, limit: int) -> None:
+    assert investment_bank(month, pd.DataFrame(data_for_search), limit) == investment_bank(
+        month, data_for_search, limit
+    )
+
+
+def test_investment_bank_matrix(data_for_search: list[dict]) -> None:
+    matrix = investment_bank_matrix(data_for_search)
+    assert matrix.index.tolist() == ["2021-05", "2021-6-"]
+    for month in matrix.index:
+        for limit in matrix.columns:
+            assert matrix.loc[month, limit] == investment_bank(month, data_for_search, limit)
+
+
+def test_investment_bank_matrix_with_typed_dates() -> None:
+    df = pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(["2021-05-02", "2021-05-13", "2021-06-01"]),
+            "Сумма операции": [100, 134.14, -7.5],
+        }
+    )
+    matrix = investment_bank_matrix(df, [10, 100])
+    assert matrix.loc["2021-05"].tolist() == [5.86, 65.86]
+    assert matrix.loc["2021-06"].tolist() == [7.5, 7.5]
+
+
+def test_investment_bank_matrix_with_bank_date_strings() -> None:
+    transactions = [
+        {"Дата операции": "31.12.2021 16:44:00", "Сумма операции": 100},
+        {"Дата операции": "01.12.2021 10:00:00", "Сумма операции": 134.14},
+        {"Дата операции": "30.11.2021 23:59:59", "Сумма операции": -7.5},
+    ]
+    matrix = investment_bank_matrix(transactions, [10, 100])
+    assert matrix.index.tolist() == ["2021-11", "2021-12"]
+    assert matrix.loc["2021-12"].tolist() == [5.86, 65.86]
+    assert matrix.loc["2021-11"].tolist() == [7.5, 7.5]
+    assert investment_bank_matrix(read_excel("operations")).index.str.match(r"^\d{4}-\d{2}$").all()
+
+
+def test_investment_bank_matrix_skips_rows_without_date() -> None:
+    transactions = [
+        {"Дата операции": "31.12.2021 16:44:00", "Сумма операции": 100},
+        {"Дата операции": None, "Сумма операции": 134.14},
+        {"Дата операции": float("nan"), "Сумма операции": 1.5},
+    ]
+    matrix = investment_bank_matrix(transactions, [100])
+    assert matrix.index.tolist() == ["2021-12"]
+    assert matrix.loc["2021-12"].tolist() == [0.0]
+    assert investment_bank_matrix(pd.DataFrame(transactions).iloc[1:], [100]).empty
+
+
+def test_investment_bank_matrix_invalid() -> None:
+    assert investment_bank_matrix([{}]).empty
+
+
+def test_cashback_table(data_for_cashback: list[dict]) -> None:
+    transactions = data_for_cashback + [
+        {"Дата операции": "01.11.2021 10:00:00", "Сумма операции с округлением": 500, "Категория": "Пере"},
+        {"Дата операции": "02.11.2021 10:00:00", "Сумма операции с округлением": 900, "Категория": "Наличные"},
+    ]
+    table = cashback_table(transactions)
+    assert table.index.tolist() == [(2021, 12), (2021, 11)]
+    assert table.loc[(2021, 12)].to_dict() == {"Пере": 3.46, "Переводы": 2.34}
+    assert table.loc[(2021, 11), "Пере"] == 5.0
+    assert "Наличные" not in table.columns
+    assert raised_cashback_for_categories(transactions, 2021, 10) == "{}"
+
+
+@pytest.mark.parametrize("limit, expected", [(10, 5.86), (50, 15.86), (100, 65.86)])
+def test_investment_bank_with_typed_dataframe(limit: int, expected: float) -> None:
+    df = pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(
+                ["2021-06-12 00:00:00", "2021-05-02 10:00:00", "2021-05-31 23:59:59", "2021-04-30 12:00:00"]
+            ),
+            "Сумма операции": [345.96, 100, 134.14, 1.5],
+        }
+    )
+    assert investment_bank("2021-05", df, limit) == expected
+
+
+@pytest.mark.parametrize("transactions", [[], pd.DataFrame()])
+def test_cashback_table_empty(transactions: list) -> None:
+    table = cashback_table(transactions)
+
+    assert table.empty
+    assert table.index.names == ["year", "month"]
+    assert cashback_by_month(transactions) == {}
+
+
+def test_cashback_by_month_from_chunks(data_for_cashback: list[dict]) -> None:
+    df = pd.DataFrame(data_for_cashback)
+    chunks = [df.iloc[:2], df.iloc[2:]]
+    assert cashback_by_month_from_chunks(chunks) == cashback_by_month(data_for_cashback)
+
+
+def test_cashback_by_month_sees_in_place_changes(data_for_cashback: list[dict]) -> None:
+    df = pd.DataFrame(data_for_cashback)
+    first = cashback_by_month(df)
+    df.loc[0, "Сумма операции с округлением"] = 1000
+    assert cashback_by_month(df) != first
+    assert cashback_by_month(df)[(2021, 12)]["Пере"] == 10.0
+
+
+def test_cashback_by_month_is_reused_for_store(data_for_cashback: list[dict]) -> None:
+    records = TransactionStore.from_frame(pd.DataFrame(data_for_cashback)).records
+    assert cashback_by_month(records) is cashback_by_month(records)
+
+
+def test_raised_cashback_for_categories_from_engine() -> None:
+    trans = read_excel("operations")
+    engine = AggregateEngine()
+    engine.append(trans.iloc[:3000])
+    engine.append(trans.iloc[3000:])
+    assert cashback_by_month(engine) == cashback_by_month(trans)
+    assert raised_cashback_for_categories(engine, 2021, 12) == raised_cashback_for_categories(trans, 2021, 12)
@@ -0,0 +1,176 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pandas._testing import assert_frame_equal
+
+from src.store import USED_COLUMNS
+from src.store import TransactionStore
+from src.store import compact_frame
+from src.store import date_index
+from src.store import date_window
+from src.store import get_store
+from src.store import memory_report
+from src.store import own_frame
+from src.store import owned_fingerprint
+from src.store import to_typed_frame
+
+
+def test_to_typed_frame() -> None:
+    df = pd.DataFrame(
+        {
+            "Дата операции": ["31.12.2021 16:44:00", "30.12.2021 10:00:00"],
+            "Дата платежа": ["31.12.2021", None],
+            "Номер карты": ["*7197", "*5091"],
+            "Категория": ["Супермаркеты", "Переводы"],
+        }
+    )
+    typed = to_typed_frame(df)
+
+    assert typed["Дата операции"].dtype == "datetime64[ns]"
+    assert typed["Дата платежа"].isna().tolist() == [False, True]
+    assert isinstance(typed["Номер карты"].dtype, pd.CategoricalDtype)
+    assert typed["Номер карты"].cat.codes.tolist() == [1, 0]
+    assert df["Дата операции"][0] == "31.12.2021 16:44:00"
+
+
+def test_transaction_store(tmp_path: Path) -> None:
+    store = TransactionStore("operations", str(tmp_path))
+
+    assert pd.api.types.is_datetime64_any_dtype(store.frame["Дата операции"])
+    assert isinstance(store.frame["Категория"].dtype, pd.CategoricalDtype)
+    assert len(store.records) == len(store.raw) == len(store.frame)
+    assert store.records[0]["Дата операции"] == store.raw["Дата операции"][0]
+    assert store.version is not None
+
+
+def test_transaction_store_from_frame() -> None:
+    raw = pd.DataFrame(
+        {
+            "Дата операции": ["30.12.2021 10:00:00", "31.12.2021 16:44:00"],
+            "Дата платежа": ["30.12.2021", "31.12.2021"],
+            "Категория": ["Переводы", "Супермаркеты"],
+        }
+    )
+    store = TransactionStore.from_frame(raw)
+
+    assert store.raw is raw
+    assert store.frame["Категория"].tolist() == ["Супермаркеты", "Переводы"]
+    assert store.records[1]["Дата операции"] == "31.12.2021 16:44:00"
+    assert len(store.window(pd.Timestamp("2021-12-31"), pd.Timestamp("2021-12-31 23:59:59"))) == 1
+
+
+def test_compact_frame() -> None:
+    df = pd.DataFrame(
+        {
+            "Статус": ["OK"] * 4,
+            "Описание": ["Магнит", "Магнит", "Пятерочка", None],
+            "Сумма платежа": [-160.89, -64.0, -100.5, None],
+            "Бонусы (включая кэшбэк)": [3, 1, 0, 5],
+            "Сумма операции с округлением": [160.0, 64.0, 100.5, 12.0],
+        }
+    )
+    compact = compact_frame(df)
+
+    assert list(compact.columns) == [column for column in df.columns if column in USED_COLUMNS]
+    assert isinstance(compact["Описание"].dtype, pd.CategoricalDtype)
+    assert compact["Сумма платежа"].dtype == "float64"
+    assert compact["Бонусы (включая кэшбэк)"].dtype == "int8"
+    assert compact["Сумма операции с округлением"].dtype == "float32"
+    assert compact.astype(df[compact.columns].dtypes.to_dict()).equals(df[compact.columns])
+    assert "Статус" in compact_frame(df, drop_unused=False).columns
+
+
+def test_memory_report(tmp_path: Path) -> None:
+    store = TransactionStore("operations", str(tmp_path))
+    compact = TransactionStore("operations", str(tmp_path), compact=True)
+    report = memory_report(store.frame, compact.frame)
+
+    assert report.loc["Статус", "bytes_after"] == 0
+    assert report.loc["total", "bytes_after"] < report.loc["total", "bytes_before"] / 2
+    assert report.loc["total", "bytes_before"] == report["bytes_before"].iloc[:-1].sum()
+    assert compact.frame["Сумма платежа"].equals(store.frame["Сумма платежа"])
+    assert compact.records[0]["Описание"] == store.records[0]["Описание"]
+
+
+def test_compact_store_memory_usage(tmp_path: Path) -> None:
+    store = TransactionStore("operations", str(tmp_path)).load()
+    compact = TransactionStore("operations", str(tmp_path), compact=True).load()
+    usage = compact.memory_usage()
+
+    assert usage["raw"] == 0
+    assert usage["total"] == usage["frame"] >= memory_report(store.frame, compact.frame).loc["total", "bytes_after"]
+    assert usage["total"] < store.memory_usage()["total"] / 4
+    assert_frame_equal(compact.raw, store.raw)
+    assert_frame_equal(pd.DataFrame(compact.records), pd.DataFrame(store.records))
+    assert compact.memory_usage() == usage
+
+
+def test_get_store_is_shared() -> None:
+    assert get_store("operations") is get_store("operations")
+
+
+@pytest.mark.parametrize(
+    "dates",
+    [
+        ["2021-01-01", "2021-01-05", "2021-02-01", "2021-03-01"],
+        ["2021-03-01", "2021-02-01", "2021-01-05", "2021-01-01"],
+        ["2021-02-01", None, "2021-01-01", "2021-03-01", "2021-01-05"],
+    ],
+)
+def test_date_window(dates: list) -> None:
+    df = pd.DataFrame({"Дата платежа": pd.to_datetime(dates), "Сумма платежа": range(len(dates))})
+    expected = df[(df["Дата платежа"] >= "2021-01-05") & (df["Дата платежа"] <= "2021-02-01")]
+    assert_frame_equal(date_window(df, "Дата платежа", "2021-01-05", "2021-02-01"), expected)
+    assert date_window(df, "Дата платежа", "2022-01-01", "2022-02-01").empty
+
+
+def test_date_index_is_reused_for_owned_frame() -> None:
+    df = pd.DataFrame({"Дата платежа": pd.to_datetime(["2021-01-01", "2021-01-02"])})
+    assert date_index(df, "Дата платежа") is not date_index(df, "Дата платежа")
+    own_frame(df, "memory:test")
+    assert owned_fingerprint(df) == "memory:test"
+    assert date_index(df, "Дата платежа") is date_index(df, "Дата платежа")
+
+
+def test_date_window_sees_in_place_changes() -> None:
+    df = pd.DataFrame({"Дата платежа": ["01.01.2021", "15.12.2021", "20.12.2021"], "Сумма платежа": [1.0, 2.0, 3.0]})
+
+    def window() -> pd.DataFrame:
+        return date_window(df, "Дата платежа", "2021-12-01", "2021-12-31", "%d.%m.%Y")
+
+    assert window()["Сумма платежа"].tolist() == [2.0, 3.0]
+    df.sort_values("Сумма платежа", ascending=False, inplace=True, ignore_index=True)
+    assert window()["Сумма платежа"].tolist() == [3.0, 2.0]
+    df.loc[0, "Дата платежа"] = "01.11.2021"
+    result = window()
+    assert result["Сумма платежа"].tolist() == [2.0]
+    assert result["Дата платежа"].tolist() == [pd.Timestamp("2021-12-15")]
+
+
+def test_transaction_store_window(tmp_path: Path) -> None:
+    store = TransactionStore("operations", str(tmp_path))
+    frame = store.frame
+    start, end = pd.Timestamp("2021-12-01"), pd.Timestamp("2021-12-10 23:59:59")
+    expected = frame[(frame["Дата операции"] >= start) & (frame["Дата операции"] <= end)]
+    assert_frame_equal(store.window(start, end), expected)
+    assert frame["Дата операции"].is_monotonic_decreasing
+
+
+def test_transaction_store_fingerprint(tmp_path: Path) -> None:
+    store = TransactionStore("operations", str(tmp_path))
+    assert owned_fingerprint(store.frame).startswith("file:operations:")
+    assert owned_fingerprint(store.raw) != owned_fingerprint(store.frame)
+    assert owned_fingerprint(store.frame.copy()) is None
+    assert owned_fingerprint(store.records) == owned_fingerprint(store.frame)[: -len("frame")] + "records"
+    assert owned_fingerprint(list(store.records)) is None
+
+
+def test_transaction_store_is_stale(tmp_path: Path) -> None:
+    store = TransactionStore("operations", str(tmp_path))
+    assert not store.is_stale()
+    store.load()
+    assert not store.is_stale()
+    store.version = {**store.version, "mtime_ns": 0}
+    assert store.is_stale()
+    assert not TransactionStore.from_frame(store.raw).is_stale()
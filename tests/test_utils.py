@@ -1,17 +1,25 @@
+import time
+from http.server import ThreadingHTTPServer
 from pathlib import Path
 from typing import Any
 from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 import pytest
 from freezegun import freeze_time
 
 import src.utils
+from src.aggregates import AggregateEngine
+from src.utils import format_date
 from src.utils import get_each_cards_datas
+from src.utils import get_each_cards_datas_from_chunks
+from src.utils import get_market_data
 from src.utils import get_month_period
 from src.utils import get_rate_currency
 from src.utils import read_excel
 from src.utils import stock_price
+from src.utils import top_positions
 from src.utils import top_transactions_by_paymant
 
 directory_name = Path(__file__).resolve().parent.parent
@@ -91,3 +99,82 @@ def test_top_transactions_by_paymant_with_empty_datas() -> None:
 def test_read_excel_not_existed_file() -> None:
     with pytest.raises(ValueError):
         assert read_excel("not_existed_file")
+
+
+def test_format_date() -> None:
+    assert format_date(pd.Timestamp("2021-12-31")) == "31.12.2021"
+    assert format_date(pd.NaT) is None
+    assert format_date("31.12.2021") == "31.12.2021"
+
+
+def test_get_market_data(quote_stub_urls: ThreadingHTTPServer) -> None:
+    rates, prices = get_market_data()
+    assert rates == [{"currency": "EUR", "rate": 70.24}, {"currency": "USD", "rate": 70.24}]
+    assert prices == [{"stock": ticker, "price": 100.5} for ticker in ["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"]]
+
+
+def test_get_market_data_is_concurrent(quote_stub_urls: ThreadingHTTPServer) -> None:
+    quote_stub_urls.delay = 0.3  # type: ignore[attr-defined]
+    start = time.perf_counter()
+    get_market_data()
+    assert time.perf_counter() - start < 1.5
+
+
+def test_get_market_data_with_timeout(quote_stub_urls: ThreadingHTTPServer, monkeypatch: pytest.MonkeyPatch) -> None:
+    quote_stub_urls.delay = 0.5  # type: ignore[attr-defined]
+    monkeypatch.setattr("src.utils.request_timeout", 0.05)
+    assert get_market_data() == ([{}], [{}])
+
+
+def test_stock_price_with_stub_server(quote_stub_urls: ThreadingHTTPServer) -> None:
+    assert stock_price()[0] == {"stock": "AAPL", "price": 100.5}
+
+
+def test_get_each_cards_datas_aggregates_repeated_cards() -> None:
+    df = pd.DataFrame(
+        {
+            "Номер карты": ["*7197", None, "*5091", "*7197"],
+            "Сумма платежа": [-100.5, -1.0, 20.0, -50.0],
+            "Бонусы (включая кэшбэк)": [1, 5, 0, 2],
+        }
+    )
+    assert get_each_cards_datas(df) == [
+        {"last_digits": "*7197", "total_spent": -150.5, "cashback": 3.0},
+        {"last_digits": "*5091", "total_spent": 20.0, "cashback": 0.0},
+    ]
+
+
+@pytest.mark.parametrize("limit", [0, 1, 5, 50, 400, 428, 450, 600])
+def test_top_positions_matches_nlargest(limit: int) -> None:
+    values = np.random.default_rng(1).integers(0, 20, 500).astype(float)
+    values[::7] = np.nan
+    expected = pd.Series(values).nlargest(limit).index.to_numpy()
+    assert top_positions(values, limit).tolist() == expected.tolist()
+
+
+def test_top_transactions_by_paymant_argpartition() -> None:
+    trans = read_excel("operations")
+    assert top_transactions_by_paymant(trans, 100, "argpartition") == top_transactions_by_paymant(trans, 100)
+
+
+def test_top_transactions_by_paymant_unknown_method(top_dataframe: pd.DataFrame) -> None:
+    assert top_transactions_by_paymant(top_dataframe, 1, "sort") == [{}]
+
+
+def test_get_each_cards_datas_from_chunks(cards_datas_expected: list[dict], dataframe_returner: pd.DataFrame) -> None:
+    chunks = [dataframe_returner.iloc[:1], dataframe_returner.iloc[1:]]
+    assert get_each_cards_datas_from_chunks(chunks) == get_each_cards_datas(dataframe_returner)
+    assert get_each_cards_datas_from_chunks([pd.DataFrame()]) == [{}]
+
+
+def test_functions_read_from_aggregate_engine() -> None:
+    trans = read_excel("operations")
+    engine = AggregateEngine(top_limit=5)
+    for _, chunk in trans.groupby(np.arange(len(trans)) // 1000):
+        engine.append(chunk)
+
+    assert top_transactions_by_paymant(engine, 5) == top_transactions_by_paymant(trans, 5)
+    assert top_transactions_by_paymant(engine, 6) == [{}]
+    assert [card["last_digits"] for card in get_each_cards_datas(engine)] == [
+        card["last_digits"] for card in get_each_cards_datas(trans)
+    ]
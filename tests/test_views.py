@@ -0,0 +1,31 @@
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.utils import directory_name
+from src.views import get_page_main_datas
+
+
+def test_get_page_main_datas_reloads_changed_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    source = pd.read_excel(os.path.join(directory_name, "data", "operations.xlsx"), nrows=300)
+    operations_file = tmp_path / "data" / "operations.xlsx"
+    os.makedirs(tmp_path / "data")
+    source.to_excel(operations_file, index=False)
+    monkeypatch.setattr("src.utils.directory_name", str(tmp_path))
+    monkeypatch.setattr("src.store.directory_name", str(tmp_path))
+    monkeypatch.setattr("src.cache.cache_dir_default", str(tmp_path / "cache"))
+    monkeypatch.setattr("src.store._stores", {})
+
+    with patch("src.views.get_cached_market_data", return_value=([], [])):
+        first = json.loads(get_page_main_datas("2021-12-31 23:59:59"))
+        source.assign(**{"Сумма платежа": source["Сумма платежа"] * 2}).to_excel(operations_file, index=False)
+        second = json.loads(get_page_main_datas("2021-12-31 23:59:59"))
+
+    assert first["cards"]
+    assert [card["total_spent"] for card in second["cards"]] == pytest.approx(
+        [card["total_spent"] * 2 for card in first["cards"]]
+    )